@@ -1,4 +1,7 @@
+import asyncio
+import sys
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, TypedDict, Annotated
@@ -6,6 +9,7 @@ from langchain_core.messages import HumanMessage
 from datetime import datetime
 import logging
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 import pendulum
 
 # Importar sistema de logging con colores
@@ -28,15 +32,66 @@ logging.getLogger("src").setLevel(logging.DEBUG)
 logger.debug("🐛 [DEBUG] Logging habilitado - Nivel DEBUG para flujo completo")
 
 # Import graph desde el proyecto actual
-from src.graph_whatsapp_etapa8 import crear_grafo_whatsapp
-from src.utils.session_manager import get_or_create_session
+from src.graph_whatsapp_etapa8 import crear_grafo_whatsapp_async
+from src.utils.session_manager import aget_or_create_session
 from src.embeddings.local_embedder import warmup_embedder
-import psycopg  # ✅ Para conexión a BD (rolling window)
+from src.embeddings.batch_executor import shutdown_batch_executor, obtener_metricas_embeddings
+from src.embeddings.embedding_cache import reset_embedding_cache, obtener_metricas_cache
+from src.medical.cache_ocupacion import obtener_metricas_ocupacion
+from src.medical.reservas_slot import obtener_metricas_reservas
+from src.utils.cache_identidad import obtener_metricas_identidad
+from src.utils.registro_actividad import detener_registro_actividad, obtener_metricas_actividad
+from src.utils.registro_sesiones import obtener_metricas_sesiones
+from src.utils.despachador_chats import (
+    ColaLlenaError,
+    get_despachador_chats,
+    detener_despachador,
+    obtener_metricas_despacho
+)
+from src.utils.agrupador_mensajes import get_agrupador_mensajes, obtener_metricas_agrupador
+from src.utils.cache_clasificacion import obtener_metricas_clasificacion
+from src.utils.clasificador_local import obtener_metricas_clasificador_local
+from src.nodes.filtrado_inteligente_node import precargar_cache_clasificacion
+from src.medical.connection_pool import (
+    POOL_MAX_SIZE,
+    get_async_connection_pool,
+    close_async_connection_pool,
+    close_connection_pool,
+    verificar_salud_pool,
+    obtener_metricas_pool
+)
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# psycopg async no soporta ProactorEventLoop (default en Windows)
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+
+# Threads para los nodos sync del grafo (LangGraph los corre en el executor
+# por defecto del loop). El default de Python es min(32, cpus + 4): con pocos
+# CPUs serializa los chats antes de llegar al límite del pool de BD.
+GRAPH_EXECUTOR_WORKERS = int(os.getenv("GRAPH_EXECUTOR_WORKERS", str(max(32, POOL_MAX_SIZE * 2))))
+
+
+def configurar_executor_grafo() -> ThreadPoolExecutor:
+    """
+    Fija el executor por defecto del event loop actual.
+    
+    Los nodos sync (identificacion_usuario, cache_sesion, recepcionista,
+    recuperacion_*) y los asyncio.to_thread corren ahí durante grafo.ainvoke.
+    Debe tener al menos POOL_MAX_SIZE threads para que el pool sync, y no
+    el executor, sea el límite de concurrencia hacia PostgreSQL.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=GRAPH_EXECUTOR_WORKERS,
+        thread_name_prefix="grafo_sync"
+    )
+    asyncio.get_running_loop().set_default_executor(executor)
+    return executor
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -45,7 +100,12 @@ async def lifespan(app: FastAPI):
     
     Pre-carga el modelo de embeddings en memoria al iniciar
     para eliminar latencia de ~4-7 segundos en el primer mensaje.
+    
+    También abre el pool async de PostgreSQL y compila el grafo en modo
+    async (AsyncPostgresSaver) dentro del event loop.
     """
+    global grafo, session_pool
+    
     # Startup
     logger.info("🚀 Iniciando servidor FastAPI...")
     
@@ -65,6 +125,25 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Error en startup: {e}")
         logger.warning("⚠️  El servidor continuará, pero los embeddings se cargarán bajo demanda")
     
+    # ✅ Pool async para rolling window de sesiones (reemplaza conexión global compartida)
+    if os.getenv("DATABASE_URL"):
+        try:
+            session_pool = await get_async_connection_pool()
+            logger.info("✅ Pool async de PostgreSQL listo para session manager")
+        except Exception as e:
+            logger.error(f"❌ Error conectando a PostgreSQL: {e}")
+            session_pool = None
+        # Mensajes frecuentes ya clasificados (después del warmup: usa embeddings)
+        await asyncio.to_thread(precargar_cache_clasificacion)
+    else:
+        session_pool = None
+        logger.warning("⚠️  DATABASE_URL no configurado - rolling window deshabilitado")
+    
+    # Crear grafo async una vez al inicio
+    configurar_executor_grafo()
+    logger.info(f"🧵 Executor del grafo: {GRAPH_EXECUTOR_WORKERS} threads (pool BD: {POOL_MAX_SIZE})")
+    grafo = await crear_grafo_whatsapp_async()
+    
     logger.info("")
     logger.info("🌐 API disponible en http://localhost:8000")
     logger.info("📚 Documentación en http://localhost:8000/docs")
@@ -72,7 +151,13 @@ async def lifespan(app: FastAPI):
     
     yield  # Servidor corriendo
     
-    # Shutdown (opcional)
+    # Shutdown
+    await detener_despachador()  # terminar los mensajes ya encolados
+    await asyncio.to_thread(detener_registro_actividad)  # flush de last_seen / last_activity
+    await close_async_connection_pool()
+    await asyncio.to_thread(close_connection_pool)
+    await asyncio.to_thread(shutdown_batch_executor)
+    await asyncio.to_thread(reset_embedding_cache)  # flush del tier de disco
     logger.info("👋 Servidor detenido")
 
 
@@ -89,21 +174,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Crear grafo una vez al inicio
-grafo = crear_grafo_whatsapp()
-
-# ✅ Conexión global a PostgreSQL para rolling window de sesiones
-try:
-    database_url = os.getenv("DATABASE_URL")
-    if database_url:
-        db_conn = psycopg.connect(database_url)
-        logger.info("✅ Conexión a PostgreSQL establecida para session manager")
-    else:
-        db_conn = None
-        logger.warning("⚠️  DATABASE_URL no configurado - rolling window deshabilitado")
-except Exception as e:
-    logger.error(f"❌ Error conectando a PostgreSQL: {e}")
-    db_conn = None
+# Grafo async y pool de sesiones (se inicializan en lifespan, dentro del event loop)
+grafo = None
+session_pool = None
 
 
 
@@ -151,8 +224,8 @@ async def invoke_graph(data: UserInput):
         # Simular número de teléfono del usuario (en producción vendría del webhook de WhatsApp)
         phone_number = "+521234567890"  # Usuario demo
 
-        # ✅ Obtener o crear sesión con rolling window (pasando conexión BD)
-        user_id, session_id, config = get_or_create_session(phone_number, db_conn)
+        # ✅ Obtener o crear sesión con rolling window (pool async)
+        user_id, session_id, config = await aget_or_create_session(phone_number, session_pool)
         
         # Crear estado inicial
         estado = {
@@ -166,8 +239,8 @@ async def invoke_graph(data: UserInput):
             "timestamp": pendulum.now('America/Tijuana').to_iso8601_string()
         }
         
-        # Invocar grafo con config (incluye thread_id para PostgresSaver)
-        result = grafo.invoke(estado, config)
+        # Invocar grafo con config (incluye thread_id para AsyncPostgresSaver)
+        result = await grafo.ainvoke(estado, config)
 
         # Extract the most useful result for client consumption
         # Priority: tool results (for structured data) > assistant message
@@ -223,18 +296,50 @@ async def whatsapp_message(data: WhatsAppMessage):
     """
     Endpoint específico para el servicio de WhatsApp.
     Adapta el formato de WhatsApp al formato del grafo.
+    
+    Los mensajes pasan por el despachador: los de un mismo chat_id se
+    procesan en orden (nunca dos a la vez sobre el mismo checkpoint) y
+    chats distintos en paralelo hasta DESPACHO_CONCURRENCIA.
+    
+    Con AGRUPAR_MENSAJES=true, los fragmentos en ráfaga de un chat se
+    envían al grafo como un solo turno; los absorbidos responden sin texto.
     """
+    # LOGGING DETALLADO: Mensaje de entrada
+    logger.info(f"📥 === MENSAJE ENTRANTE ===")
+    logger.info(f"📱 Chat ID: {data.chat_id}")
+    logger.info(f"👤 Sender: {data.sender_name}")
+    logger.info(f"💬 Message: {data.message}")
+    logger.info(f"⏰ Timestamp: {data.timestamp}")
+
+    texto = data.message
+    agrupador = get_agrupador_mensajes()
+    if agrupador is not None:
+        texto = await agrupador.agrupar(data.chat_id, data.message)
+        if texto is None:
+            logger.info(f"🧩 Mensaje agrupado con uno posterior del chat {data.chat_id}")
+            return {"response": None, "agrupado": True}
+
+    try:
+        return await get_despachador_chats().despachar(
+            data.chat_id,
+            lambda: _procesar_mensaje_whatsapp(data, texto)
+        )
+    except ColaLlenaError as e:
+        logger.warning(f"🚦 Mensaje rechazado: {e}")
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(e), "response": None},
+            headers={"Retry-After": "1"}
+        )
+
+
+async def _procesar_mensaje_whatsapp(data: WhatsAppMessage, texto: str) -> dict:
+    """Sesión + grafo para un turno (corre dentro del carril de su chat)."""
     try:
-        # LOGGING DETALLADO: Mensaje de entrada
-        logger.info(f"📥 === MENSAJE ENTRANTE ===")
-        logger.info(f"📱 Chat ID: {data.chat_id}")
-        logger.info(f"👤 Sender: {data.sender_name}")
-        logger.info(f"💬 Message: {data.message}")
-        logger.info(f"⏰ Timestamp: {data.timestamp}")
         logger.info(f"🔄 === INICIANDO PROCESAMIENTO ===")
 
         # Log del mensaje del usuario
-        log_user_message(logger, data.message)
+        log_user_message(logger, texto)
 
         # Extraer phone_number del chat_id (formato: 521234567890@c.us)
         phone_number = data.chat_id.replace('@c.us', '')
@@ -243,8 +348,8 @@ async def whatsapp_message(data: WhatsAppMessage):
 
         logger.debug(f"📞 Phone extracted: {phone_number}")
 
-        # ✅ Obtener o crear sesión con rolling window (pasando conexión BD)
-        user_id, session_id, config = get_or_create_session(phone_number, db_conn)
+        # ✅ Obtener o crear sesión con rolling window (pool async, no bloquea el event loop)
+        user_id, session_id, config = await aget_or_create_session(phone_number, session_pool)
         logger.debug(f"🗂️ Session - User ID: {user_id}, Session ID: {session_id}")
 
         # Generar timestamp actual (siempre en backend para consistencia)
@@ -253,7 +358,7 @@ async def whatsapp_message(data: WhatsAppMessage):
         # Crear estado mínimo - solo el nuevo mensaje y datos esenciales
         # Los demás campos se restaurarán del checkpoint si existe
         estado = {
-            "messages": [HumanMessage(content=data.message)],
+            "messages": [HumanMessage(content=texto)],
             "user_id": phone_number,
             "session_id": session_id,
             "timestamp": timestamp_actual
@@ -264,8 +369,13 @@ async def whatsapp_message(data: WhatsAppMessage):
         logger.debug(f"📊 Estado inicial: {estado}")
         logger.info(f"🚀 === EJECUTANDO GRAFO WHATSAPP OPTIMIZADO ===")
 
-        # Invocar grafo con config
-        result = grafo.invoke(estado, config)
+        # Invocar grafo async: mientras este chat espera al LLM,
+        # el event loop sigue atendiendo otros chats
+        result = await grafo.ainvoke(estado, config)
+
+        agrupador = get_agrupador_mensajes()
+        if agrupador is not None:
+            agrupador.registrar_estado(data.chat_id, result.get("estado_conversacion"))
 
         logger.info(f"✅ === GRAFO COMPLETADO ===")
         logger.debug(f"📋 Resultado completo: {result}")
@@ -300,7 +410,28 @@ async def whatsapp_message(data: WhatsAppMessage):
 
 @app.get("/health")
 async def health_check():
-    return {"status": "API is running"}
+    return {
+        "status": "API is running",
+        "db_pool": obtener_metricas_pool(),
+        "embeddings": obtener_metricas_embeddings(),
+        "embeddings_cache": obtener_metricas_cache(),
+        "ocupacion_cache": obtener_metricas_ocupacion(),
+        "reservas_slot": obtener_metricas_reservas(),
+        "identidad_cache": obtener_metricas_identidad(),
+        "actividad": obtener_metricas_actividad(),
+        "sesiones_cache": obtener_metricas_sesiones(),
+        "despacho": obtener_metricas_despacho(),
+        "agrupador": obtener_metricas_agrupador(),
+        "clasificacion_cache": obtener_metricas_clasificacion(),
+        "clasificador_local": obtener_metricas_clasificador_local()
+    }
+
+
+@app.get("/health/db")
+async def health_check_db():
+    """Health check del pool compartido de PostgreSQL (SELECT 1)."""
+    salud = await asyncio.to_thread(verificar_salud_pool)
+    return {"db": salud, "db_pool": obtener_metricas_pool()}
 
 
 if __name__ == "__main__":
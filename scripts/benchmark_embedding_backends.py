@@ -0,0 +1,123 @@
+"""
+Benchmark de backends de inferencia de embeddings (torch / int8 / onnx)
+
+Cada backend corre en un proceso aparte para que el RSS sea comparable.
+Mide latencia por mensaje (encode de un texto, como en persistencia y
+recuperación episódica), RSS tras cargar el modelo y la paridad coseno
+contra torch fp32 sobre tests/fixtures/frases_embeddings.csv.
+
+Uso:
+    python scripts/benchmark_embedding_backends.py
+    python scripts/benchmark_embedding_backends.py --backends torch int8 --repeticiones 20
+"""
+
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).parent.parent
+sys.path.insert(0, str(RAIZ))
+
+FIXTURE = RAIZ / "tests" / "fixtures" / "frases_embeddings.csv"
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    idx = max(0, int(round(p / 100 * len(ordenados))) - 1)
+    return ordenados[idx]
+
+
+def rss_mb() -> float:
+    """RSS actual del proceso (Linux: /proc; otros: pico vía resource)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def cargar_frases():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return [fila["texto"] for fila in csv.DictReader(f)]
+
+
+def medir_backend(backend: str, repeticiones: int) -> dict:
+    """Corre dentro del proceso hijo: carga el backend y mide."""
+    from src.embeddings.embedding_service import EmbeddingService
+
+    frases = cargar_frases()
+    rss_inicial = rss_mb()
+
+    servicio = EmbeddingService(backend=backend)
+    inicio = time.perf_counter()
+    servicio.warmup()
+    carga_s = time.perf_counter() - inicio
+
+    latencias = []
+    for _ in range(repeticiones):
+        for frase in frases:
+            t0 = time.perf_counter()
+            servicio.encode([frase])
+            latencias.append(time.perf_counter() - t0)
+
+    return {
+        "backend": servicio.backend,  # Puede haber caído a torch
+        "carga_s": carga_s,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+        "rss_modelo_mb": rss_mb() - rss_inicial,
+        "rss_total_mb": rss_mb(),
+        "vectores": servicio.encode(frases).tolist(),
+    }
+
+
+def main(backends, repeticiones):
+    import numpy as np
+
+    resultados = {}
+    for backend in backends:
+        print(f"⏱️  Midiendo {backend}...")
+        salida = subprocess.run(
+            [sys.executable, __file__, "--hijo", backend, "--repeticiones", str(repeticiones)],
+            capture_output=True, text=True, cwd=RAIZ, env=os.environ.copy()
+        )
+        if salida.returncode != 0:
+            print(f"❌ {backend}: {salida.stderr.strip().splitlines()[-1] if salida.stderr else 'error'}")
+            continue
+        resultados[backend] = json.loads(salida.stdout.strip().splitlines()[-1])
+
+    referencia = resultados.get("torch")
+    print(f"\n{'backend':<8} {'real':<6} {'carga':>7} {'p50':>8} {'p99':>8} {'RSS modelo':>11} {'cos min':>8}")
+    for backend, r in resultados.items():
+        paridad = "-"
+        if referencia is not None:
+            a = np.asarray(referencia["vectores"])
+            b = np.asarray(r["vectores"])
+            paridad = f"{float(np.min(np.sum(a * b, axis=1))):.4f}"
+        print(
+            f"{backend:<8} {r['backend']:<6} {r['carga_s']:6.2f}s {r['p50_ms']:7.2f}ms "
+            f"{r['p99_ms']:7.2f}ms {r['rss_modelo_mb']:9.0f}MB {paridad:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de backends de embeddings")
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(medir_backend(args.hijo, args.repeticiones)))
+    else:
+        main(args.backends, args.repeticiones)
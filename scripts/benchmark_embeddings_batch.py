@@ -0,0 +1,101 @@
+"""
+Benchmark del micro-batching de embeddings
+
+Compara N threads concurrentes llamando encode() directo (una pasada del
+modelo por petición) contra el mismo tráfico a través del
+EmbeddingBatchExecutor. Reporta throughput, p50/p99 y tamaño de lote.
+
+Uso:
+    python scripts/benchmark_embeddings_batch.py --threads 32 --peticiones 512
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.embeddings.batch_executor import EmbeddingBatchExecutor
+from src.embeddings.embedding_service import get_embedding_service
+
+FRASES = [
+    "Hola, buenos días",
+    "Quiero agendar una cita para el martes",
+    "Me duele la cabeza desde ayer",
+    "¿A qué hora abre la clínica?",
+    "Necesito cancelar mi cita",
+    "Busca el historial del paciente Juan Pérez",
+    "Gracias, hasta luego",
+    "¿Tienen disponibilidad mañana en la tarde?",
+]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    idx = max(0, int(round(p / 100 * len(ordenados))) - 1)
+    return ordenados[idx]
+
+
+def correr(funcion, threads, peticiones):
+    latencias = []
+    lock = threading.Lock()
+    por_thread = peticiones // threads
+
+    def trabajador(offset):
+        for i in range(por_thread):
+            # Texto único por petición: mide el modelo, no la deduplicación
+            texto = f"{FRASES[(offset + i) % len(FRASES)]} #{offset}-{i}"
+            inicio = time.perf_counter()
+            funcion(texto)
+            with lock:
+                latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=trabajador, args=(t,)) for t in range(threads)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return time.perf_counter() - inicio, latencias
+
+
+def reportar(nombre, total, latencias):
+    print(
+        f"{nombre:<12} {len(latencias) / total:8.1f} emb/s | "
+        f"p50 {statistics.median(latencias) * 1000:7.1f}ms | "
+        f"p99 {percentil(latencias, 99) * 1000:7.1f}ms"
+    )
+
+
+def main(threads, peticiones, ventana_ms, max_batch):
+    servicio = get_embedding_service()
+    print(f"📦 Modelo: {servicio.model_version}")
+    servicio.warmup()
+
+    total, latencias = correr(servicio.encode_one, threads, peticiones)
+    reportar("directo", total, latencias)
+
+    ejecutor = EmbeddingBatchExecutor(servicio, ventana_ms=ventana_ms, max_batch_size=max_batch)
+    try:
+        total, latencias = correr(ejecutor.encode, threads, peticiones)
+        reportar("batching", total, latencias)
+        metricas = ejecutor.obtener_metricas()
+        print(
+            f"🧺 Lotes: {metricas['lotes']} | promedio {metricas['tamano_lote_promedio']} | "
+            f"máx {metricas['tamano_lote_max']} | cola máx {metricas['profundidad_cola_max']}"
+        )
+    finally:
+        ejecutor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de micro-batching de embeddings")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--peticiones", type=int, default=512)
+    parser.add_argument("--ventana-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+    main(args.threads, args.peticiones, args.ventana_ms, args.max_batch)
@@ -0,0 +1,105 @@
+"""
+Benchmark de generación de slots: verificación por slot vs motor en bloque
+
+Cuenta las consultas SQL y el tiempo de:
+- por_slot: check_doctor_availability() por cada slot (algoritmo anterior,
+  2 consultas por verificación + fallback al otro doctor)
+- motor:    generar_slots_con_turnos() con motor_disponibilidad (1 consulta)
+
+Requiere DATABASE_URL con doctores y citas_medicas.
+
+Uso:
+    python scripts/benchmark_slots_disponibilidad.py
+    python scripts/benchmark_slots_disponibilidad.py --dias 7 14 30
+"""
+
+import argparse
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.medical import connection_pool, disponibilidad, motor_disponibilidad, slots
+
+
+class ContadorConsultas:
+    """Envuelve get_connection() y cuenta cada cursor.execute()."""
+
+    def __init__(self):
+        self.consultas = 0
+
+    @contextmanager
+    def get_connection(self):
+        with connection_pool.get_connection() as conn:
+            contador = self
+
+            class CursorContado:
+                def __init__(self, cur):
+                    self._cur = cur
+
+                def __enter__(self):
+                    self._cur.__enter__()
+                    return self
+
+                def __exit__(self, *args):
+                    return self._cur.__exit__(*args)
+
+                def execute(self, *args, **kwargs):
+                    contador.consultas += 1
+                    return self._cur.execute(*args, **kwargs)
+
+                def __getattr__(self, nombre):
+                    return getattr(self._cur, nombre)
+
+            class ConexionContada:
+                def cursor(self, *args, **kwargs):
+                    return CursorContado(conn.cursor(*args, **kwargs))
+
+                def __getattr__(self, nombre):
+                    return getattr(conn, nombre)
+
+            yield ConexionContada()
+
+
+def slots_por_consulta(dias_adelante: int) -> int:
+    """Algoritmo anterior: una verificación en BD por slot (y por fallback)."""
+    ahora = datetime.now(slots.TIMEZONE)
+    total = 0
+    for turno, (ini, fin, _, _) in enumerate(slots._iterar_slots(ahora, dias_adelante)):
+        doctor_id = 1 if turno % 2 == 0 else 2
+        disp = disponibilidad.check_doctor_availability(doctor_id, ini, fin, use_cache=False)
+        if not disp["disponible"]:
+            otro = 2 if doctor_id == 1 else 1
+            disp = disponibilidad.check_doctor_availability(otro, ini, fin, use_cache=False)
+        total += int(disp["disponible"])
+    return total
+
+
+def medir(nombre, funcion, dias_adelante):
+    contador = ContadorConsultas()
+    with patch.object(disponibilidad, "get_connection", contador.get_connection), \
+         patch.object(motor_disponibilidad, "get_connection", contador.get_connection):
+        inicio = time.perf_counter()
+        resultado = funcion(dias_adelante)
+        duracion = time.perf_counter() - inicio
+
+    n_slots = resultado if isinstance(resultado, int) else len(resultado)
+    print(f"{nombre:<10} {dias_adelante:>5} {n_slots:>7} {contador.consultas:>9} {duracion * 1000:>9.1f}ms")
+
+
+def main(lista_dias):
+    print(f"{'algoritmo':<10} {'días':>5} {'slots':>7} {'consultas':>9} {'tiempo':>11}")
+    for dias in lista_dias:
+        medir("por_slot", slots_por_consulta, dias)
+        medir("motor", slots.generar_slots_con_turnos, dias)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de generación de slots")
+    parser.add_argument("--dias", nargs="+", type=int, default=[7, 14, 30])
+    args = parser.parse_args()
+    main(args.dias)
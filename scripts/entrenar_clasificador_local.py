@@ -0,0 +1,74 @@
+"""
+Entrenamiento y evaluación offline del clasificador local de intención
+
+Lee clasificaciones_llm (etiquetas de DeepSeek/Claude), vectoriza los
+mensajes con el modelo de embeddings del servidor y entrena la regresión
+logística de src/utils/clasificador_local.py. Reporta, contra las
+etiquetas del LLM:
+
+- exactitud de todas las predicciones
+- cobertura local: fracción del tráfico con confianza >= umbral (no va al LLM)
+- exactitud dentro de esa fracción
+
+Uso:
+    python scripts/entrenar_clasificador_local.py --dias 90
+    python scripts/entrenar_clasificador_local.py --evaluar   # modelo ya guardado, sin reentrenar
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.embeddings.local_embedder import generate_embeddings, get_model_version
+from src.nodes.filtrado_inteligente_node import leer_clasificaciones_llm
+from src.utils.cache_clasificacion import normalizar_texto
+from src.utils.clasificador_local import RUTA_MODELO, UMBRAL_CONFIANZA, ClasificadorLocal
+
+
+def reportar(titulo, reporte):
+    print(
+        f"{titulo:<12} {reporte['muestras']:6d} mensajes | exactitud {reporte['exactitud']:.1%} | "
+        f"local {reporte['cobertura_local']:.1%} (exactitud {reporte['exactitud_local']:.1%}) "
+        f"con umbral {reporte['umbral']}"
+    )
+
+
+def main(dias, limite, umbral, validacion, ruta, solo_evaluar):
+    filas = [f for f in leer_clasificaciones_llm(dias, limite) if normalizar_texto(f[0] or "")]
+    print(f"📚 {len(filas)} clasificaciones del LLM (últimos {dias} días)")
+    if not filas:
+        return
+
+    mensajes, tipos, etiquetas = (list(columna) for columna in zip(*filas))
+    vectores = generate_embeddings(mensajes)
+    print(f"📦 Embeddings: {get_model_version()}")
+
+    if solo_evaluar:
+        modelo = ClasificadorLocal.cargar(ruta)
+        reportar("evaluación", modelo.evaluar(vectores, tipos, etiquetas, umbral))
+        return
+
+    modelo, reporte = ClasificadorLocal.entrenar(
+        vectores, tipos, etiquetas, validacion=validacion, umbral=umbral, modelo_embeddings=get_model_version()
+    )
+    print(f"🧮 Clases: {', '.join(reporte['clases'])} | T={reporte['temperatura']:.2f}")
+    if reporte["validacion"]:
+        reportar("validación", reporte)  # Mensajes que el modelo no vio al entrenar
+    reportar("histórico", modelo.evaluar(vectores, tipos, etiquetas, umbral))
+
+    modelo.guardar(ruta)
+    print(f"💾 Modelo guardado en {ruta} (reiniciar el servidor para cargarlo)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena/evalúa el clasificador local de intención")
+    parser.add_argument("--dias", type=int, default=90)
+    parser.add_argument("--limite", type=int, default=50000)
+    parser.add_argument("--umbral", type=float, default=UMBRAL_CONFIANZA)
+    parser.add_argument("--validacion", type=float, default=0.2)
+    parser.add_argument("--ruta", default=RUTA_MODELO)
+    parser.add_argument("--evaluar", action="store_true", help="Solo evaluar el modelo guardado")
+    args = parser.parse_args()
+    main(args.dias, args.limite, args.umbral, args.validacion, args.ruta, args.evaluar)
@@ -0,0 +1,67 @@
+"""
+Prueba de carga del endpoint /api/whatsapp-agent/message
+
+Mide la latencia de 1 chat aislado y luego el p50/p95/p99 con N chats
+concurrentes (chat_id distintos) contra un backend real en ejecución.
+
+Con el camino async (grafo.ainvoke) el p99 con 50 chats debe quedar cerca
+de la latencia de un solo chat; con el camino bloqueante crece ~N veces.
+
+Uso:
+    python scripts/load_test_whatsapp.py --url http://localhost:8002 --chats 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    idx = max(0, int(round(p / 100 * len(ordenados))) - 1)
+    return ordenados[idx]
+
+
+async def enviar(client, url, chat, mensaje):
+    inicio = time.perf_counter()
+    resp = await client.post(
+        f"{url}/api/whatsapp-agent/message",
+        json={"chat_id": f"5299{chat:08d}@c.us", "message": mensaje, "sender_name": f"Carga {chat}"}
+    )
+    resp.raise_for_status()
+    return time.perf_counter() - inicio
+
+
+async def main(url, chats, mensaje, timeout):
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        print(f"🔥 Calentando ({url})...")
+        await enviar(client, url, 0, mensaje)
+
+        base = await enviar(client, url, 0, mensaje)
+        print(f"⏱️  1 chat: {base * 1000:.0f}ms")
+
+        inicio = time.perf_counter()
+        latencias = await asyncio.gather(
+            *[enviar(client, url, chat, mensaje) for chat in range(1, chats + 1)]
+        )
+        total = time.perf_counter() - inicio
+
+    print(f"\n📊 {chats} chats concurrentes (total {total:.2f}s)")
+    print(f"   p50: {statistics.median(latencias) * 1000:.0f}ms")
+    print(f"   p95: {percentil(latencias, 95) * 1000:.0f}ms")
+    print(f"   p99: {percentil(latencias, 99) * 1000:.0f}ms")
+    print(f"   p99 / 1 chat: {percentil(latencias, 99) / base:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga WhatsApp backend")
+    parser.add_argument("--url", default="http://localhost:8002")
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--mensaje", default="Hola, quiero una cita")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.chats, args.mensaje, args.timeout))
@@ -869,6 +869,35 @@ COMMENT ON COLUMN citas_medicas.recordatorio_2h_enviado IS 'Indica si se envió
 COMMENT ON COLUMN citas_medicas.recordatorio_2h_fecha IS 'Fecha/hora de envío del recordatorio 2h';
 
 
+-- =====================================================================
+-- MIGRACIÓN: Modelo de embeddings junto a cada vector
+-- =====================================================================
+-- Todos los vectores salen de src/embeddings/embedding_service.py.
+-- embedding_modelo guarda el modelo (y revisión) que generó cada vector
+-- para no comparar espacios distintos si se cambia EMBEDDING_MODEL.
+
+ALTER TABLE memoria_episodica
+ADD COLUMN IF NOT EXISTS embedding_modelo VARCHAR(150);
+
+ALTER TABLE historiales_medicos
+ADD COLUMN IF NOT EXISTS embedding_modelo VARCHAR(150);
+
+-- Vectores previos: generados con el modelo default del proyecto
+UPDATE memoria_episodica
+SET embedding_modelo = 'paraphrase-multilingual-MiniLM-L12-v2'
+WHERE embedding_modelo IS NULL;
+
+UPDATE historiales_medicos
+SET embedding_modelo = 'paraphrase-multilingual-MiniLM-L12-v2'
+WHERE embedding_modelo IS NULL AND embedding IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_memoria_user_modelo
+    ON memoria_episodica(user_id, embedding_modelo);
+
+COMMENT ON COLUMN memoria_episodica.embedding_modelo IS 'Modelo[@revisión] que generó el embedding';
+COMMENT ON COLUMN historiales_medicos.embedding_modelo IS 'Modelo[@revisión] que generó el embedding';
+
+
 -- =====================================================================
 -- 10. SEED DE DATOS CRÍTICOS (ADMIN Y DOCTOR INICIAL)
 -- =====================================================================
@@ -5,13 +5,11 @@ Módulo de Exports para Database
 from .db_procedimental import (
     get_herramientas_disponibles,
     clear_cache,
-    test_connection,
-    get_db_connection
+    test_connection
 )
 
 __all__ = [
     'get_herramientas_disponibles',
     'clear_cache',
-    'test_connection',
-    'get_db_connection'
+    'test_connection'
 ]
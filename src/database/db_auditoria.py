@@ -7,8 +7,8 @@ Retención: 6 meses (limpieza manual via SQL)
 
 import logging
 from typing import Optional
-import psycopg2
-from src.database.db_config import get_db_connection
+import psycopg
+from src.medical.connection_pool import get_connection
 from src.utils.time_utils import get_current_time
 
 logger = logging.getLogger(__name__)
@@ -47,14 +47,6 @@ def insertar_auditoria(
             logger.debug("    ⚠️  Contenido vacío, omitiendo auditoría")
             return False
 
-        # Obtener conexión
-        conn = get_db_connection()
-        if not conn:
-            logger.warning("    ⚠️  Auditoría: No se pudo conectar a PostgreSQL")
-            return False
-
-        cursor = conn.cursor()
-
         # Query de inserción
         query = """
         INSERT INTO auditoria_conversaciones
@@ -66,26 +58,23 @@ def insertar_auditoria(
         # Obtener timestamp actual
         timestamp = get_current_time().to_datetime_string()
 
-        # Ejecutar
-        cursor.execute(query, (
-            user_id,
-            session_id,
-            rol,
-            contenido.strip(),
-            timestamp
-        ))
+        # Conexión del pool compartido (commit al salir del bloque)
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, (
+                    user_id,
+                    session_id,
+                    rol,
+                    contenido.strip(),
+                    timestamp
+                ))
 
-        audit_id = cursor.fetchone()[0]
-
-        # Commit
-        conn.commit()
-        cursor.close()
-        conn.close()
+                audit_id = cursor.fetchone()[0]
 
         logger.debug(f"    📝 Auditoría registrada (ID: {audit_id}, rol: {rol})")
         return True
 
-    except psycopg2.Error as e:
+    except psycopg.Error as e:
         logger.warning(f"    ⚠️  Error PostgreSQL en auditoría: {e}")
         return False
     except Exception as e:
@@ -108,12 +97,6 @@ def obtener_historial_usuario(
         Lista de diccionarios con {rol, contenido, timestamp}
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return []
-
-        cursor = conn.cursor()
-
         query = """
         SELECT rol, contenido, timestamp
         FROM auditoria_conversaciones
@@ -122,11 +105,10 @@ def obtener_historial_usuario(
         LIMIT %s
         """
 
-        cursor.execute(query, (user_id, limite))
-        resultados = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, (user_id, limite))
+                resultados = cursor.fetchall()
 
         return [
             {
@@ -153,21 +135,14 @@ def contar_mensajes_usuario(user_id: str) -> int:
         Número total de mensajes
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return 0
-
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "SELECT COUNT(*) FROM auditoria_conversaciones WHERE user_id = %s",
-            (user_id,)
-        )
-
-        count = cursor.fetchone()[0]
-
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM auditoria_conversaciones WHERE user_id = %s",
+                    (user_id,)
+                )
+
+                count = cursor.fetchone()[0]
 
         return count
 
@@ -1,16 +1,16 @@
 """
 Módulo de Base de Datos para Memoria Procedimental
-Gestiona la conexión a PostgreSQL y caché de herramientas
+Consulta PostgreSQL (pool compartido) y mantiene caché de herramientas
 """
 
-import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg.rows import dict_row
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import logging
 from dotenv import load_dotenv
 
+from src.medical.connection_pool import get_connection
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -20,32 +20,6 @@ _cache_timestamp: Optional[datetime] = None
 CACHE_DURATION_MINUTES = 5
 
 
-def get_db_connection():
-    """
-    Crea conexión a PostgreSQL usando variables de entorno
-    
-    Variables requeridas en .env:
-        POSTGRES_HOST
-        POSTGRES_PORT
-        POSTGRES_DB
-        POSTGRES_USER
-        POSTGRES_PASSWORD
-    """
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv('POSTGRES_HOST', 'localhost'),
-            port=os.getenv('POSTGRES_PORT', '5432'),
-            database=os.getenv('POSTGRES_DB', 'calendar_agent'),
-            user=os.getenv('POSTGRES_USER', 'postgres'),
-            password=os.getenv('POSTGRES_PASSWORD', ''),
-            cursor_factory=RealDictCursor
-        )
-        return conn
-    except psycopg2.Error as e:
-        logger.error(f"❌ Error conectando a PostgreSQL: {e}")
-        raise
-
-
 def is_cache_valid() -> bool:
     """Verifica si el caché de herramientas aún es válido (< 5 minutos)"""
     global _cache_timestamp
@@ -84,18 +58,17 @@ def get_herramientas_disponibles(force_refresh: bool = False) -> List[Dict[str,
     try:
         logger.info("🔍 Consultando herramientas disponibles desde PostgreSQL...")
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # ✅ ACTUALIZADO: Ahora usa 'id' y 'tool_name'
-        cursor.execute("""
-            SELECT id, tool_name, descripcion 
-            FROM herramientas_disponibles 
-            WHERE activa = TRUE
-            ORDER BY id
-        """)
-        
-        resultados = cursor.fetchall()
+        with get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cursor:
+                # ✅ ACTUALIZADO: Ahora usa 'id' y 'tool_name'
+                cursor.execute("""
+                    SELECT id, tool_name, descripcion 
+                    FROM herramientas_disponibles 
+                    WHERE activa = TRUE
+                    ORDER BY id
+                """)
+                
+                resultados = cursor.fetchall()
         
         # Convertir a lista de dicts
         herramientas = [
@@ -106,9 +79,6 @@ def get_herramientas_disponibles(force_refresh: bool = False) -> List[Dict[str,
             for row in resultados
         ]
         
-        cursor.close()
-        conn.close()
-        
         # Actualizar caché
         _herramientas_cache = herramientas
         _cache_timestamp = datetime.now()
@@ -161,11 +131,8 @@ def test_connection() -> bool:
         True si la conexión es exitosa, False en caso contrario
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            conn.execute("SELECT 1")
         logger.info("✅ Conexión a PostgreSQL exitosa")
         return True
     except Exception as e:
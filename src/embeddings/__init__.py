@@ -1,4 +1,25 @@
 """Módulo de embeddings"""
-from .local_embedder import get_embedder, generate_embedding, get_embedding_dimension
+from .embedding_service import EmbeddingService, get_embedding_service
+from .batch_executor import EmbeddingBatchExecutor, get_batch_executor
+from .embedding_cache import EmbeddingCache, get_embedding_cache
+from .local_embedder import (
+    get_embedder,
+    generate_embedding,
+    generate_embeddings,
+    get_embedding_dimension,
+    get_model_version
+)
 
-__all__ = ['get_embedder', 'generate_embedding', 'get_embedding_dimension']
+__all__ = [
+    'EmbeddingService',
+    'get_embedding_service',
+    'EmbeddingBatchExecutor',
+    'get_batch_executor',
+    'EmbeddingCache',
+    'get_embedding_cache',
+    'get_embedder',
+    'generate_embedding',
+    'generate_embeddings',
+    'get_embedding_dimension',
+    'get_model_version'
+]
@@ -0,0 +1,241 @@
+"""
+Executor de Micro-Batching para Embeddings
+
+Con varios chats concurrentes, cada generate_embedding hacía su propia
+pasada del modelo. Este executor junta las peticiones que llegan en una
+ventana de pocos milisegundos y las resuelve con un solo encode() batched
+en un thread dedicado; en CPU el costo crece con el número de lotes, no
+con el número de peticiones.
+
+Configuración (variables de entorno):
+    EMBEDDING_BATCH_WINDOW_MS  Ventana para juntar peticiones (default: 5)
+    EMBEDDING_MAX_BATCH        Tamaño máximo de lote (default: 64)
+    EMBEDDING_BATCHING         "false" para encode directo sin executor
+
+Uso:
+    future = get_batch_executor().submit("quiero una cita")
+    vector = future.result()                          # código sync
+    vector = await asyncio.wrap_future(future)        # código async
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.embeddings.embedding_service import EmbeddingService, get_embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+def _env_int(nombre: str, default: int) -> int:
+    try:
+        return int(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+BATCH_WINDOW_MS = _env_float("EMBEDDING_BATCH_WINDOW_MS", 5.0)
+MAX_BATCH_SIZE = max(1, _env_int("EMBEDDING_MAX_BATCH", 64))
+BATCHING_HABILITADO = os.getenv("EMBEDDING_BATCHING", "true").lower() != "false"
+
+_FIN = object()  # Señal de apagado para el worker
+
+
+class EmbeddingBatchExecutor:
+    """
+    Junta peticiones de embedding y las resuelve en lotes.
+
+    - submit(texto) → Future con el vector (np.ndarray float32)
+    - Un thread worker toma la primera petición, espera hasta `ventana_ms`
+      (o hasta `max_batch_size`) por más, y llama una vez a service.encode()
+    - Textos repetidos dentro del lote se codifican una sola vez
+    """
+
+    def __init__(
+        self,
+        service: Optional[EmbeddingService] = None,
+        ventana_ms: float = BATCH_WINDOW_MS,
+        max_batch_size: int = MAX_BATCH_SIZE
+    ):
+        self._service = service
+        self.ventana_s = ventana_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self._cola: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._cerrado = False
+        self._worker: Optional[threading.Thread] = None
+
+        # Métricas
+        self._total_peticiones = 0
+        self._total_lotes = 0
+        self._total_en_lotes = 0
+        self._total_textos_codificados = 0
+        self._ultimo_lote = 0
+        self._lote_max = 0
+        self._cola_max = 0
+        self._errores = 0
+
+    @property
+    def service(self) -> EmbeddingService:
+        return self._service or get_embedding_service()
+
+    def submit(self, texto: str) -> "Future[np.ndarray]":
+        """Encola un texto; el Future se resuelve cuando su lote termina."""
+        future: "Future[np.ndarray]" = Future()
+        with self._lock:
+            if self._cerrado:
+                raise RuntimeError("EmbeddingBatchExecutor cerrado")
+            self._asegurar_worker()
+            self._total_peticiones += 1
+            self._cola.put((texto, future))
+            self._cola_max = max(self._cola_max, self._cola.qsize())
+        return future
+
+    def encode(self, texto: str, timeout: Optional[float] = None) -> List[float]:
+        """Atajo sync: submit() y espera el vector como lista de floats."""
+        return self.submit(texto).result(timeout=timeout).tolist()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el worker después de procesar lo ya encolado."""
+        with self._lock:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            worker = self._worker
+            self._cola.put(_FIN)
+        if wait and worker is not None:
+            worker.join()
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Profundidad de cola y tamaños de lote (para /health)."""
+        with self._lock:
+            promedio = self._total_en_lotes / self._total_lotes if self._total_lotes else 0.0
+            return {
+                "profundidad_cola": self._cola.qsize(),
+                "profundidad_cola_max": self._cola_max,
+                "peticiones": self._total_peticiones,
+                "lotes": self._total_lotes,
+                "textos_codificados": self._total_textos_codificados,
+                "tamano_lote_promedio": round(promedio, 2),
+                "tamano_lote_ultimo": self._ultimo_lote,
+                "tamano_lote_max": self._lote_max,
+                "errores": self._errores,
+                "ventana_ms": self.ventana_s * 1000.0,
+                "max_batch_size": self.max_batch_size,
+            }
+
+    # ==================== WORKER ====================
+
+    def _asegurar_worker(self) -> None:
+        # Se llama con self._lock tomado
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._loop,
+                name="embedding_batcher",
+                daemon=True
+            )
+            self._worker.start()
+
+    def _juntar_lote(self, primero: Tuple[str, Future]) -> Tuple[List[Tuple[str, Future]], bool]:
+        """Junta peticiones hasta llenar el lote o agotar la ventana."""
+        lote = [primero]
+        limite = time.monotonic() + self.ventana_s
+        while len(lote) < self.max_batch_size:
+            restante = limite - time.monotonic()
+            try:
+                item = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if item is _FIN:
+                return lote, True
+            lote.append(item)
+        return lote, False
+
+    def _loop(self) -> None:
+        while True:
+            item = self._cola.get()
+            if item is _FIN:
+                return
+            lote, fin = self._juntar_lote(item)
+            self._procesar(lote)
+            if fin:
+                return
+
+    def _procesar(self, lote: List[Tuple[str, Future]]) -> None:
+        # Descartar futures cancelados antes de gastar CPU
+        vivos = [(texto, fut) for texto, fut in lote if fut.set_running_or_notify_cancel()]
+        if not vivos:
+            return
+
+        unicos = list(dict.fromkeys(texto for texto, _ in vivos))
+        try:
+            vectores = self.service.encode(unicos)
+        except Exception as e:
+            logger.error(f"❌ Error en lote de embeddings ({len(vivos)} textos): {e}")
+            with self._lock:
+                self._errores += 1
+            for _, fut in vivos:
+                fut.set_exception(e)
+            return
+
+        with self._lock:
+            self._total_lotes += 1
+            self._total_en_lotes += len(vivos)
+            self._total_textos_codificados += len(unicos)
+            self._ultimo_lote = len(vivos)
+            self._lote_max = max(self._lote_max, len(vivos))
+
+        posicion = {texto: i for i, texto in enumerate(unicos)}
+        for texto, fut in vivos:
+            fut.set_result(vectores[posicion[texto]])
+
+
+# ==================== SINGLETON ====================
+
+_executor_instance: Optional[EmbeddingBatchExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_batch_executor() -> EmbeddingBatchExecutor:
+    """Executor de micro-batching del proceso (singleton)."""
+    global _executor_instance
+
+    if _executor_instance is None:
+        with _executor_lock:
+            if _executor_instance is None:
+                _executor_instance = EmbeddingBatchExecutor()
+                logger.info(
+                    f"🧺 Micro-batching de embeddings: ventana {BATCH_WINDOW_MS}ms, "
+                    f"lote máx {MAX_BATCH_SIZE}"
+                )
+
+    return _executor_instance
+
+
+def shutdown_batch_executor() -> None:
+    """Apaga el executor (shutdown del servidor o tests)."""
+    global _executor_instance
+    with _executor_lock:
+        if _executor_instance is not None:
+            _executor_instance.shutdown()
+            _executor_instance = None
+
+
+def obtener_metricas_embeddings() -> Optional[Dict[str, Any]]:
+    """Métricas del executor sin crearlo (None si aún no se usó)."""
+    executor = _executor_instance
+    return executor.obtener_metricas() if executor is not None else None
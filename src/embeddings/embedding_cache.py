@@ -0,0 +1,260 @@
+"""
+Cache de Embeddings por Contenido
+
+Los mismos textos cortos se vectorizan una y otra vez (saludos, "quiero una
+cita", resúmenes repetidos, consultas de doctores). Este cache guarda el
+vector por hash del texto delante de generate_embedding:
+
+- Tier 1: LRU en memoria acotado por número de entradas
+- Tier 2 (opcional): disco, un np.memmap float32 (filas x dims) más un
+  índice append-only "hash fila" que sobrevive reinicios
+
+La clave incluye la versión del modelo (y los archivos de disco llevan el
+modelo en el nombre): cambiar EMBEDDING_MODEL invalida el cache solo.
+
+Configuración (variables de entorno):
+    EMBEDDING_CACHE_SIZE       Entradas del LRU en memoria (default: 4096, 0 = apagado)
+    EMBEDDING_CACHE_DIR        Directorio del tier de disco (sin valor = sin disco)
+    EMBEDDING_CACHE_DISK_ROWS  Filas del memmap; al llenarse se reutilizan en anillo
+                               (default: 100000)
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(nombre: str, default: int) -> int:
+    try:
+        return int(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+CACHE_SIZE = max(0, _env_int("EMBEDDING_CACHE_SIZE", 4096))
+CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR") or None
+CACHE_DISK_ROWS = max(1, _env_int("EMBEDDING_CACHE_DISK_ROWS", 100_000))
+
+
+def hash_texto(model_version: str, texto: str) -> str:
+    """Clave del cache: sha256 de modelo + texto (el modelo invalida solo)."""
+    return hashlib.sha256(f"{model_version}\x00{texto}".encode("utf-8")).hexdigest()
+
+
+class CacheDiscoEmbeddings:
+    """
+    Tier de disco: memmap float32 de `filas` x `dims` + índice append-only.
+
+    El índice es un archivo de texto con líneas "hash fila"; al cargarlo, la
+    última línea de cada fila gana (las filas se reutilizan en anillo).
+    """
+
+    def __init__(self, directorio: str, model_version: str, dims: int, filas: int = CACHE_DISK_ROWS):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_version)
+        ruta = Path(directorio)
+        ruta.mkdir(parents=True, exist_ok=True)
+
+        self.dims = dims
+        self.filas = filas
+        self.ruta_vectores = ruta / f"embeddings_{slug}_{dims}.f32"
+        self.ruta_indice = ruta / f"embeddings_{slug}_{dims}.idx"
+
+        modo = "r+" if self.ruta_vectores.exists() else "w+"
+        self._vectores = np.memmap(self.ruta_vectores, dtype=np.float32, mode=modo, shape=(filas, dims))
+        self._indice: Dict[str, int] = {}
+        self._clave_por_fila: Dict[int, str] = {}
+        self._siguiente = 0
+        self._cargar_indice()
+        self._archivo_indice = open(self.ruta_indice, "a", encoding="utf-8")
+
+    def _cargar_indice(self) -> None:
+        if not self.ruta_indice.exists():
+            return
+        escritas = 0
+        with open(self.ruta_indice, encoding="utf-8") as f:
+            for linea in f:
+                partes = linea.split()
+                if len(partes) != 2:
+                    continue  # Línea truncada por un corte
+                clave, fila = partes[0], int(partes[1])
+                if fila >= self.filas:
+                    continue
+                anterior = self._clave_por_fila.get(fila)
+                if anterior is not None:
+                    self._indice.pop(anterior, None)
+                self._indice[clave] = fila
+                self._clave_por_fila[fila] = clave
+                escritas += 1
+        self._siguiente = escritas % self.filas
+        logger.info(f"💾 Cache de embeddings en disco: {len(self._indice)} vectores ({self.ruta_vectores.name})")
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def get(self, clave: str) -> Optional[np.ndarray]:
+        fila = self._indice.get(clave)
+        if fila is None:
+            return None
+        return np.array(self._vectores[fila])
+
+    def put(self, clave: str, vector: np.ndarray) -> None:
+        if clave in self._indice:
+            return
+        fila = self._siguiente
+        self._siguiente = (self._siguiente + 1) % self.filas
+
+        anterior = self._clave_por_fila.get(fila)
+        if anterior is not None:
+            self._indice.pop(anterior, None)
+
+        self._vectores[fila] = vector
+        self._vectores.flush()
+        self._archivo_indice.write(f"{clave} {fila}\n")
+        self._archivo_indice.flush()
+
+        self._indice[clave] = fila
+        self._clave_por_fila[fila] = clave
+
+    def close(self) -> None:
+        self._vectores.flush()
+        self._archivo_indice.close()
+
+
+class EmbeddingCache:
+    """
+    Cache de dos niveles (LRU en memoria + disco opcional) con contadores.
+
+    Thread-safe: un lock protege ambos tiers.
+    """
+
+    def __init__(
+        self,
+        model_version: str,
+        dims: int,
+        max_entradas: int = CACHE_SIZE,
+        directorio: Optional[str] = CACHE_DIR,
+        filas_disco: int = CACHE_DISK_ROWS
+    ):
+        self.model_version = model_version
+        self.dims = dims
+        self.max_entradas = max_entradas
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disco: Optional[CacheDiscoEmbeddings] = None
+        if directorio:
+            try:
+                self._disco = CacheDiscoEmbeddings(directorio, model_version, dims, filas_disco)
+            except OSError as e:
+                logger.warning(f"⚠️  Cache de embeddings en disco deshabilitado: {e}")
+
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+
+    def get(self, texto: str) -> Optional[np.ndarray]:
+        clave = hash_texto(self.model_version, texto)
+        with self._lock:
+            vector = self._lru.get(clave)
+            if vector is not None:
+                self._lru.move_to_end(clave)
+                self.hits_memoria += 1
+                return vector
+
+            if self._disco is not None:
+                vector = self._disco.get(clave)
+                if vector is not None:
+                    self.hits_disco += 1
+                    self._guardar_lru(clave, vector)
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, texto: str, vector: Any) -> None:
+        clave = hash_texto(self.model_version, texto)
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._guardar_lru(clave, vector)
+            if self._disco is not None:
+                self._disco.put(clave, vector)
+
+    def _guardar_lru(self, clave: str, vector: np.ndarray) -> None:
+        # Se llama con self._lock tomado
+        if self.max_entradas <= 0:
+            return
+        self._lru[clave] = vector
+        self._lru.move_to_end(clave)
+        while len(self._lru) > self.max_entradas:
+            self._lru.popitem(last=False)
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.hits_memoria + self.hits_disco + self.misses
+            return {
+                "modelo": self.model_version,
+                "entradas_memoria": len(self._lru),
+                "max_entradas_memoria": self.max_entradas,
+                "entradas_disco": len(self._disco) if self._disco is not None else None,
+                "hits_memoria": self.hits_memoria,
+                "hits_disco": self.hits_disco,
+                "misses": self.misses,
+                "hit_rate": round((self.hits_memoria + self.hits_disco) / consultas, 4) if consultas else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._disco is not None:
+                self._disco.close()
+                self._disco = None
+
+
+# ==================== SINGLETON ====================
+
+_cache_instance: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Cache del modelo actual. Si el servicio cambió de modelo se crea uno
+    nuevo, así un vector nunca se sirve para otro modelo.
+    """
+    global _cache_instance
+    from src.embeddings.embedding_service import get_embedding_service
+
+    service = get_embedding_service()
+    cache = _cache_instance
+    if cache is None or cache.model_version != service.model_version:
+        with _cache_lock:
+            cache = _cache_instance
+            if cache is None or cache.model_version != service.model_version:
+                if cache is not None:
+                    cache.close()
+                cache = EmbeddingCache(service.model_version, service.dimension)
+                _cache_instance = cache
+    return cache
+
+
+def reset_embedding_cache() -> None:
+    """Descarta el cache (tests o cambio de configuración)."""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is not None:
+            _cache_instance.close()
+        _cache_instance = None
+
+
+def obtener_metricas_cache() -> Optional[Dict[str, Any]]:
+    """Contadores del cache sin crearlo (None si aún no se usó)."""
+    cache = _cache_instance
+    return cache.obtener_metricas() if cache is not None else None
+
@@ -0,0 +1,255 @@
+"""
+Servicio Unificado de Embeddings
+
+Un solo modelo de sentence-transformers para todo el proceso: memoria
+episódica, historiales médicos y el índice semántico del store de LangGraph.
+Antes cada consumidor cargaba su propio modelo (3 modelos en RAM) y los
+vectores de espacios distintos se comparaban contra las mismas columnas
+de pgvector.
+
+Configuración (variables de entorno):
+    EMBEDDING_MODEL           Modelo registrado en MODELOS_EMBEDDING
+                              (default: paraphrase-multilingual-MiniLM-L12-v2)
+    EMBEDDING_MODEL_REVISION  Revisión del modelo en HuggingFace (opcional)
+    EMBEDDING_DEVICE          Dispositivo de torch (default: cpu)
+    EMBEDDING_BACKEND         Backend de inferencia (default: torch):
+                                torch → PyTorch fp32
+                                int8  → cuantización dinámica int8 de las capas
+                                        Linear (torch, sin dependencias extra)
+                                onnx  → ONNX Runtime (requiere optimum[onnxruntime])
+    EMBEDDING_ONNX_FILE       Archivo ONNX dentro del repo del modelo (opcional,
+                              p. ej. onnx/model_qint8_avx512_vnni.onnx)
+
+Cada vector guardado en PostgreSQL lleva junto a él la etiqueta
+`model_version` (columna embedding_modelo) para no mezclar espacios
+si se cambia de modelo.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== REGISTRO DE MODELOS ====================
+
+# Solo modelos de 384 dimensiones: las columnas de pgvector son vector(384)
+MODELOS_EMBEDDING: Dict[str, Dict[str, object]] = {
+    "paraphrase-multilingual-MiniLM-L12-v2": {
+        "dims": 384,
+        "descripcion": "Multilingüe, optimizado para español (default)",
+    },
+    "sentence-transformers/paraphrase-MiniLM-L6-v2": {
+        "dims": 384,
+        "descripcion": "Inglés, más ligero",
+    },
+    "all-MiniLM-L6-v2": {
+        "dims": 384,
+        "descripcion": "Inglés, propósito general",
+    },
+}
+
+MODELO_DEFAULT = "paraphrase-multilingual-MiniLM-L12-v2"
+BATCH_SIZE_DEFAULT = 32
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def cuantizar_int8(model: SentenceTransformer) -> SentenceTransformer:
+    """
+    Cuantización dinámica int8 de las capas Linear del transformer.
+
+    Los pesos pasan a int8 y las activaciones se cuantizan al vuelo: en CPU
+    baja la latencia y la RAM del modelo sin cambiar el espacio de vectores
+    (paridad coseno ≥ 0.99 contra fp32, ver tests/test_embedding_backends.py).
+    """
+    import torch
+
+    # In place sobre todo el SentenceTransformer: no depende de cómo cada
+    # versión de sentence-transformers expone el modelo HF interno
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+class EmbeddingService:
+    """
+    Modelo de embeddings compartido (carga perezosa, thread-safe).
+
+    - get_model(): carga el modelo una sola vez (double-checked locking)
+    - encode(): API batched, devuelve np.ndarray float32 normalizado (n, dims)
+    - model_version: etiqueta que se guarda junto a cada vector
+
+    Los tokenizers rápidos de HuggingFace no admiten uso concurrente desde
+    varios threads ("Already borrowed"), por eso encode() se serializa con
+    un lock; agrupar textos en una sola llamada compensa ese costo.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        revision: Optional[str] = None,
+        device: Optional[str] = None,
+        backend: Optional[str] = None
+    ):
+        self.model_name = model_name or os.getenv("EMBEDDING_MODEL", MODELO_DEFAULT)
+        if self.model_name not in MODELOS_EMBEDDING:
+            raise ValueError(
+                f"Modelo de embeddings no registrado: {self.model_name}. "
+                f"Opciones: {', '.join(MODELOS_EMBEDDING)}"
+            )
+        self.revision = revision or os.getenv("EMBEDDING_MODEL_REVISION") or None
+        self.device = device or os.getenv("EMBEDDING_DEVICE", "cpu")
+        self.backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Backend de embeddings inválido: {self.backend}. Opciones: {', '.join(BACKENDS)}")
+        self.dimension = int(MODELOS_EMBEDDING[self.model_name]["dims"])
+
+        self._model: Optional[SentenceTransformer] = None
+        self._load_lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+
+    @property
+    def model_version(self) -> str:
+        """Etiqueta guardada junto a cada vector (modelo[@revisión])."""
+        if self.revision:
+            return f"{self.model_name}@{self.revision}"
+        return self.model_name
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def get_model(self) -> SentenceTransformer:
+        """Obtiene el modelo, cargándolo la primera vez."""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    logger.info("🚀 [INIT] Cargando modelo de embeddings en memoria por primera y única vez...")
+                    logger.info(f"   📦 Modelo: {self.model_version}")
+                    logger.info(f"   📏 Dimensiones: {self.dimension}")
+                    logger.info(f"   💻 Dispositivo: {self.device} | Backend: {self.backend}")
+
+                    start_time = time.time()
+                    try:
+                        self._model = self._cargar_modelo()
+                    except Exception as e:
+                        logger.error(f"❌ Error al cargar modelo: {e}")
+                        raise
+
+                    logger.info(f"✅ Modelo cargado exitosamente en {time.time() - start_time:.2f}s")
+
+        return self._model
+
+    def _cargar_modelo(self) -> SentenceTransformer:
+        """Carga el modelo con el backend configurado (fallback a torch fp32)."""
+        if self.backend == "onnx":
+            try:
+                onnx_file = os.getenv("EMBEDDING_ONNX_FILE")
+                return SentenceTransformer(
+                    self.model_name,
+                    device=self.device,
+                    revision=self.revision,
+                    backend="onnx",
+                    model_kwargs={"file_name": onnx_file} if onnx_file else None
+                )
+            except Exception as e:
+                logger.warning(f"⚠️  Backend ONNX no disponible ({e}), usando torch fp32")
+                self.backend = "torch"
+
+        model = SentenceTransformer(self.model_name, device=self.device, revision=self.revision)
+
+        if self.backend == "int8":
+            if self.device != "cpu":
+                logger.warning("⚠️  Cuantización int8 solo aplica en CPU, usando torch fp32")
+                self.backend = "torch"
+            else:
+                model = cuantizar_int8(model)
+
+        return model
+
+    def warmup(self) -> None:
+        """Carga el modelo y ejecuta un encode de prueba (idempotente)."""
+        self.encode(["warmup"])
+
+    def encode(self, textos: Sequence[str], batch_size: int = BATCH_SIZE_DEFAULT) -> np.ndarray:
+        """
+        Genera embeddings normalizados para varios textos en una sola pasada.
+
+        Args:
+            textos: Lista de textos a vectorizar
+            batch_size: Tamaño de lote interno del modelo
+
+        Returns:
+            np.ndarray float32 de forma (len(textos), dimension)
+        """
+        if isinstance(textos, str):
+            raise TypeError("encode() recibe una lista de textos; usar encode_one() para un solo texto")
+        if len(textos) == 0:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        model = self.get_model()
+        with self._encode_lock:
+            vectores = model.encode(
+                list(textos),
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                normalize_embeddings=True  # Normalizar para similitud de coseno
+            )
+
+        return np.asarray(vectores, dtype=np.float32).reshape(len(textos), self.dimension)
+
+    def encode_one(self, texto: str) -> List[float]:
+        """Embedding de un solo texto como lista de floats (formato de pgvector)."""
+        return self.encode([texto])[0].tolist()
+
+    def as_langchain_embeddings(self) -> "ServiceEmbeddings":
+        """Adaptador para el índice semántico del store de LangGraph."""
+        return ServiceEmbeddings(self)
+
+
+class ServiceEmbeddings(Embeddings):
+    """Interfaz de LangChain sobre EmbeddingService (sin cargar otro modelo)."""
+
+    def __init__(self, service: EmbeddingService):
+        self.service = service
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.service.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.service.encode_one(text)
+
+
+# ==================== SINGLETON ====================
+
+_service_instance: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Obtiene el servicio de embeddings del proceso (singleton)."""
+    global _service_instance
+
+    if _service_instance is None:
+        with _service_lock:
+            if _service_instance is None:
+                _service_instance = EmbeddingService()
+
+    return _service_instance
+
+
+def reset_embedding_service() -> None:
+    """Descarta el singleton (tests o cambio de configuración)."""
+    global _service_instance
+    with _service_lock:
+        _service_instance = None
@@ -6,79 +6,47 @@ de embeddings multilingües para búsqueda semántica.
 
 OPTIMIZACIÓN: Singleton real - el modelo se carga UNA SOLA VEZ en memoria
 para evitar latencia de ~4 segundos en cada invocación.
+
+El modelo vive en src/embeddings/embedding_service.py (servicio único del
+proceso); estas funciones son la API histórica sobre ese servicio.
 """
 
 from sentence_transformers import SentenceTransformer
 import logging
-from typing import List, Optional
-import numpy as np
-import threading
+from typing import List, Sequence
 
-logger = logging.getLogger(__name__)
+from src.embeddings.embedding_service import get_embedding_service
+from src.embeddings.batch_executor import BATCHING_HABILITADO, get_batch_executor
+from src.embeddings.embedding_cache import get_embedding_cache
 
-# Singleton: modelo se carga una sola vez (thread-safe)
-_model_instance: Optional[SentenceTransformer] = None
-_model_lock = threading.Lock()
-_model_loaded = False
+logger = logging.getLogger(__name__)
 
 
 def get_embedder() -> SentenceTransformer:
     """
     Obtiene la instancia del modelo de embeddings (patrón singleton thread-safe).
-    
-    Usa paraphrase-multilingual-MiniLM-L12-v2:
-    - 384 dimensiones
-    - Optimizado para español y otros idiomas
-    - Ligero y rápido en CPU
-    
+
+    Usa el modelo configurado en EMBEDDING_MODEL
+    (default: paraphrase-multilingual-MiniLM-L12-v2, 384 dimensiones, CPU).
+
     Returns:
         Instancia del modelo SentenceTransformer
     """
-    global _model_instance, _model_loaded
-    
-    # Double-checked locking para thread safety
-    if not _model_loaded:
-        with _model_lock:
-            if not _model_loaded:
-                logger.info("🚀 [INIT] Cargando modelo de embeddings en memoria por primera y única vez...")
-                logger.info("   📦 Modelo: paraphrase-multilingual-MiniLM-L12-v2")
-                logger.info("   📏 Dimensiones: 384")
-                logger.info("   💻 Dispositivo: CPU")
-                
-                try:
-                    import time
-                    start_time = time.time()
-                    
-                    _model_instance = SentenceTransformer(
-                        'paraphrase-multilingual-MiniLM-L12-v2',
-                        device='cpu'  # Forzar CPU (ya que torch es CPU-only)
-                    )
-                    
-                    elapsed = time.time() - start_time
-                    _model_loaded = True
-                    
-                    logger.info(f"✅ Modelo cargado exitosamente en {elapsed:.2f}s")
-                    logger.info("⚡ Las siguientes invocaciones serán instantáneas")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Error al cargar modelo: {e}")
-                    raise
-    
-    return _model_instance
+    return get_embedding_service().get_model()
 
 
 def warmup_embedder():
     """
     Pre-carga el modelo de embeddings en memoria.
-    
+
     Llamar esta función al inicio del servidor (startup event) para que
     el modelo esté "caliente" cuando llegue el primer mensaje.
-    
+
     Esta función es idempotente: puede llamarse múltiples veces sin efecto.
     """
     logger.info("🔥 Warming up embedder...")
     try:
-        get_embedder()
+        get_embedding_service().warmup()
         logger.info("🔥 Embedder warmup completado")
     except Exception as e:
         logger.error(f"❌ Error en warmup del embedder: {e}")
@@ -88,56 +56,95 @@ def warmup_embedder():
 def generate_embedding(text: str) -> List[float]:
     """
     Genera embedding para un texto dado.
-    
+
+    Primero busca en el cache por contenido (LRU + disco opcional); si no
+    está, con EMBEDDING_BATCHING activo (default) el texto pasa por el executor
+    de micro-batching: peticiones concurrentes comparten una sola pasada del modelo.
+
     Args:
         text: Texto a vectorizar
-        
+
     Returns:
         Vector de 384 dimensiones como lista de floats
-        
+
     Raises:
         ValueError: Si el texto está vacío
         RuntimeError: Si hay error al generar embedding
     """
     if not text or not text.strip():
         raise ValueError("El texto no puede estar vacío")
-    
+
     try:
-        model = get_embedder()
-        
-        # Generar embedding
-        embedding = model.encode(
-            text,
-            convert_to_numpy=True,
-            show_progress_bar=False,
-            normalize_embeddings=True  # Normalizar para similitud de coseno
-        )
-        
-        # Convertir a lista de floats
-        return embedding.tolist()
-        
+        cache = get_embedding_cache()
+        vector = cache.get(text)
+        if vector is not None:
+            return vector.tolist()
+
+        if BATCHING_HABILITADO:
+            embedding = get_batch_executor().encode(text)
+        else:
+            embedding = get_embedding_service().encode_one(text)
+        cache.put(text, embedding)
+        return embedding
+
     except Exception as e:
         logger.error(f"Error al generar embedding: {e}")
         raise RuntimeError(f"No se pudo generar embedding: {e}")
 
 
+def generate_embeddings(texts: Sequence[str]) -> List[List[float]]:
+    """
+    Genera embeddings para varios textos en una sola pasada del modelo.
+
+    Raises:
+        ValueError: Si algún texto está vacío
+        RuntimeError: Si hay error al generar embeddings
+    """
+    if any(not text or not text.strip() for text in texts):
+        raise ValueError("El texto no puede estar vacío")
+
+    try:
+        cache = get_embedding_cache()
+        encontrados = {text: cache.get(text) for text in dict.fromkeys(texts)}
+        faltantes = [text for text, vector in encontrados.items() if vector is None]
+
+        if faltantes:
+            vectores = get_embedding_service().encode(faltantes)
+            for text, vector in zip(faltantes, vectores):
+                cache.put(text, vector)
+                encontrados[text] = vector
+
+        return [encontrados[text].tolist() for text in texts]
+
+    except Exception as e:
+        logger.error(f"Error al generar embeddings: {e}")
+        raise RuntimeError(f"No se pudo generar embeddings: {e}")
+
+
 def get_embedding_dimension() -> int:
     """
     Retorna la dimensión del modelo de embeddings.
-    
+
     Returns:
         384 (dimensiones del modelo multilingüe)
     """
-    return 384
+    return get_embedding_service().dimension
+
+
+def get_model_version() -> str:
+    """
+    Etiqueta del modelo que se guarda junto a cada vector (columna embedding_modelo).
+    """
+    return get_embedding_service().model_version
 
 
 def is_model_loaded() -> bool:
     """
     Verifica si el modelo ya está cargado en memoria.
-    
+
     Útil para debugging y monitoring.
-    
+
     Returns:
         True si el modelo está cargado, False en caso contrario
     """
-    return _model_loaded
+    return get_embedding_service().is_loaded
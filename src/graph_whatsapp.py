@@ -50,6 +50,7 @@ OPTIMIZACIÓN CLAVE:
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.postgres import PostgresSaver
+from langchain_core.runnables import RunnableLambda
 from typing import Literal
 from datetime import datetime, timedelta
 import logging
@@ -57,7 +58,6 @@ import sys
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-import psycopg
 
 # Importar sistema de logging con colores
 from src.utils.logging_config import setup_colored_logging, log_separator
@@ -78,9 +78,18 @@ from src.state.agent_state import WhatsAppAgentState
 from src.nodes.identificacion_usuario_node import nodo_identificacion_usuario_wrapper
 from src.nodes.cache_sesion_node import nodo_cache_sesion_wrapper
 from src.nodes.router_identidad_node import nodo_router_identidad_wrapper
-from src.nodes.maya_detective_paciente_node import nodo_maya_detective_paciente_wrapper
-from src.nodes.maya_detective_doctor_node import nodo_maya_detective_doctor_wrapper
-from src.nodes.filtrado_inteligente_node import nodo_filtrado_inteligente_wrapper
+from src.nodes.maya_detective_paciente_node import (
+    nodo_maya_detective_paciente_wrapper,
+    anodo_maya_detective_paciente_wrapper
+)
+from src.nodes.maya_detective_doctor_node import (
+    nodo_maya_detective_doctor_wrapper,
+    anodo_maya_detective_doctor_wrapper
+)
+from src.nodes.filtrado_inteligente_node import (
+    nodo_filtrado_inteligente_wrapper,
+    anodo_filtrado_inteligente_wrapper
+)
 from src.nodes.recuperacion_episodica_node import nodo_recuperacion_episodica_wrapper
 from src.nodes.recuperacion_medica_node import nodo_recuperacion_medica_wrapper
 from src.nodes.seleccion_herramientas_node import nodo_seleccion_herramientas_wrapper
@@ -235,13 +244,23 @@ def crear_grafo_whatsapp() -> StateGraph:
     workflow.add_node("router_identidad", nodo_router_identidad_wrapper)
     
     # N2A: Maya Detective de Intención (para pacientes externos)
-    workflow.add_node("maya_detective_paciente", nodo_maya_detective_paciente_wrapper)
+    # (sync + async: grafo.ainvoke usa la versión async con LLM no bloqueante)
+    workflow.add_node(
+        "maya_detective_paciente",
+        RunnableLambda(nodo_maya_detective_paciente_wrapper, afunc=anodo_maya_detective_paciente_wrapper)
+    )
     
     # N2B: Maya Detective de Intención (para doctores)
-    workflow.add_node("maya_detective_doctor", nodo_maya_detective_doctor_wrapper)
+    workflow.add_node(
+        "maya_detective_doctor",
+        RunnableLambda(nodo_maya_detective_doctor_wrapper, afunc=anodo_maya_detective_doctor_wrapper)
+    )
     
     # N2-LLM: Filtrado Inteligente (clasificación LLM - solo casos ambiguos)
-    workflow.add_node("filtrado_inteligente", nodo_filtrado_inteligente_wrapper)
+    workflow.add_node(
+        "filtrado_inteligente",
+        RunnableLambda(nodo_filtrado_inteligente_wrapper, afunc=anodo_filtrado_inteligente_wrapper)
+    )
     
     # N3A: Recuperación Episódica (personal)
     workflow.add_node("recuperacion_episodica", nodo_recuperacion_episodica_wrapper)
@@ -409,11 +428,11 @@ def crear_grafo_whatsapp() -> StateGraph:
         try:
             logger.info("    🔗 Conectando PostgresSaver...")
             
-            # Crear conexión con psycopg (sync) usando autocommit
-            conn = psycopg.connect(database_url, autocommit=True)
+            # Pool compartido del checkpointer (autocommit + dict_row)
+            from src.medical.connection_pool import get_checkpointer_pool
             
             # Crear checkpointer
-            checkpointer = PostgresSaver(conn)
+            checkpointer = PostgresSaver(get_checkpointer_pool())
             
             # Setup: crear tablas de LangGraph (checkpoints, checkpoint_writes, checkpoint_blobs)
             checkpointer.setup()
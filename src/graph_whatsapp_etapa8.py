@@ -45,7 +45,6 @@ import sys
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-import psycopg
 
 # Importar sistema de logging con colores
 from src.utils.logging_config import setup_colored_logging, log_separator
@@ -64,15 +63,22 @@ from src.state.agent_state import WhatsAppAgentState
 
 # ==================== IMPORTS DE NODOS ====================
 from src.nodes.identificacion_usuario_node import nodo_identificacion_usuario_wrapper
-from src.nodes.filtrado_inteligente_node import nodo_filtrado_inteligente_wrapper
+from src.nodes.filtrado_inteligente_node import (
+    nodo_filtrado_inteligente_wrapper,
+    anodo_filtrado_inteligente_wrapper
+)
 from src.nodes.recuperacion_medica_node import nodo_recuperacion_medica_wrapper
 from src.nodes.recepcionista_optimizado_node import nodo_recepcionista_optimizado_wrapper
-from src.nodes.respuesta_conversacional_node import nodo_respuesta_conversacional_wrapper
+from src.nodes.respuesta_conversacional_node import (
+    nodo_respuesta_conversacional_wrapper,
+    anodo_respuesta_conversacional_wrapper
+)
 from src.nodes.sincronizador_hibrido_node import nodo_sincronizador_hibrido_wrapper
 from src.nodes.resumen_async_node import nodo_resumen_async_wrapper
 
 # ToolNode unificado y herramientas
 from langgraph.prebuilt import ToolNode
+from langchain_core.runnables import RunnableLambda
 from src.tools.all_tools import get_all_tools
 from src.nodes.resumen_async_node import nodo_resumen_async_wrapper
 from src.tools.all_tools import get_all_tools
@@ -267,26 +273,16 @@ def decidir_despues_recepcionista(state: WhatsAppAgentState) -> Literal[
 
 # ==================== FUNCIÓN PRINCIPAL ====================
 
-def crear_grafo_whatsapp() -> StateGraph:
+def _construir_workflow() -> StateGraph:
     """
-    Crea y configura el grafo optimizado del agente de WhatsApp.
+    Construye el StateGraph (nodos + aristas) sin compilar.
     
-    Optimizaciones implementadas:
-    - ToolNode unificado en lugar de múltiples nodos de ejecución
-    - Decisión temprana para saltear clasificación en flujos activos  
-    - Resumen asíncrono para mejorar latencia
-    - Eliminación de nodos redundantes
+    Compartido por crear_grafo_whatsapp() (sync, PostgresSaver) y
+    crear_grafo_whatsapp_async() (async, AsyncPostgresSaver).
     
     Returns:
-        Grafo compilado listo para ejecutar
+        StateGraph sin compilar
     """
-    logger.info("🏗️  Construyendo grafo OPTIMIZADO de WhatsApp Agent...")
-
-    # ✅ Inicializar memory store para memoria semántica
-    from src.memory import get_memory_store
-    memory_store = get_memory_store()
-    logger.info("    ✅ Memory store inicializado (memoria semántica)")
-
     # Crear grafo con estado typed
     workflow = StateGraph(WhatsAppAgentState)
     
@@ -299,7 +295,11 @@ def crear_grafo_whatsapp() -> StateGraph:
     workflow.add_node("cache_sesion", nodo_cache_sesion)
     
     # N2: Filtrado Inteligente (clasificación) - solo cuando es necesario
-    workflow.add_node("filtrado_inteligente", nodo_filtrado_inteligente_wrapper)
+    # (sync + async: grafo.invoke usa la versión sync, grafo.ainvoke la async)
+    workflow.add_node(
+        "filtrado_inteligente",
+        RunnableLambda(nodo_filtrado_inteligente_wrapper, afunc=anodo_filtrado_inteligente_wrapper)
+    )
     
     # N3: Recuperación Médica (solo consultas sin herramientas)
     workflow.add_node("recuperacion_medica", nodo_recuperacion_medica_wrapper)
@@ -313,7 +313,10 @@ def crear_grafo_whatsapp() -> StateGraph:
     workflow.add_node("recepcionista", nodo_recepcionista_optimizado_wrapper)
     
     # N6: Respuesta Conversacional (chat casual)
-    workflow.add_node("respuesta_conversacional", nodo_respuesta_conversacional_wrapper)
+    workflow.add_node(
+        "respuesta_conversacional",
+        RunnableLambda(nodo_respuesta_conversacional_wrapper, afunc=anodo_respuesta_conversacional_wrapper)
+    )
     
     # N7: Sincronizador Híbrido (sincronización Google Calendar)
     workflow.add_node("sincronizador_hibrido", nodo_sincronizador_hibrido_wrapper)
@@ -386,6 +389,31 @@ def crear_grafo_whatsapp() -> StateGraph:
     
     logger.info("    ✓ Flujo optimizado configurado - 3 decisiones condicionales")
     
+    return workflow
+
+
+def crear_grafo_whatsapp() -> StateGraph:
+    """
+    Crea y configura el grafo optimizado del agente de WhatsApp.
+    
+    Optimizaciones implementadas:
+    - ToolNode unificado en lugar de múltiples nodos de ejecución
+    - Decisión temprana para saltear clasificación en flujos activos  
+    - Resumen asíncrono para mejorar latencia
+    - Eliminación de nodos redundantes
+    
+    Returns:
+        Grafo compilado listo para ejecutar
+    """
+    logger.info("🏗️  Construyendo grafo OPTIMIZADO de WhatsApp Agent...")
+
+    # ✅ Inicializar memory store para memoria semántica
+    from src.memory import get_memory_store
+    memory_store = get_memory_store()
+    logger.info("    ✅ Memory store inicializado (memoria semántica)")
+
+    workflow = _construir_workflow()
+    
     # ==================== CONFIGURAR POSTGRESQL SAVER ====================
     
     database_url = os.getenv("DATABASE_URL")
@@ -395,11 +423,11 @@ def crear_grafo_whatsapp() -> StateGraph:
         try:
             logger.info("    🔗 Conectando PostgresSaver...")
             
-            # Crear conexión con psycopg (sync) usando autocommit
-            conn = psycopg.connect(database_url, autocommit=True)
+            # Pool compartido del checkpointer (autocommit + dict_row)
+            from src.medical.connection_pool import get_checkpointer_pool
             
             # Crear checkpointer
-            checkpointer = PostgresSaver(conn)
+            checkpointer = PostgresSaver(get_checkpointer_pool())
             
             # Setup: crear tablas de LangGraph (checkpoints, checkpoint_writes, checkpoint_blobs)
             checkpointer.setup()
@@ -436,9 +464,55 @@ def crear_grafo_whatsapp() -> StateGraph:
     return app
 
 
-# ==================== INSTANCIA GLOBAL ====================
-# Esta será la instancia que se use en app.py
-app = crear_grafo_whatsapp()
+async def crear_grafo_whatsapp_async():
+    """
+    Crea el grafo para ejecución async (grafo.ainvoke) desde FastAPI.
+    
+    Mismo workflow que crear_grafo_whatsapp(), pero con AsyncPostgresSaver
+    sobre el AsyncConnectionPool compartido, de modo que la carga/guardado
+    de checkpoints tampoco bloquea el event loop.
+    
+    Debe llamarse desde dentro del event loop (lifespan de FastAPI).
+    
+    Returns:
+        Grafo compilado listo para ainvoke
+    """
+    logger.info("🏗️  Construyendo grafo ASYNC de WhatsApp Agent...")
+    
+    from src.memory import get_memory_store
+    memory_store = get_memory_store()
+    
+    workflow = _construir_workflow()
+    
+    database_url = os.getenv("DATABASE_URL")
+    checkpointer = None
+    
+    if database_url:
+        try:
+            logger.info("    🔗 Conectando AsyncPostgresSaver...")
+            
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+            from src.medical.connection_pool import get_async_connection_pool
+            
+            pool = await get_async_connection_pool()
+            checkpointer = AsyncPostgresSaver(pool)
+            await checkpointer.setup()
+            
+            logger.info("    ✅ AsyncPostgresSaver configurado (checkpoints)")
+            
+        except Exception as e:
+            logger.warning(f"    ⚠️  AsyncPostgresSaver no disponible: {e}")
+            logger.warning("    ℹ️  El grafo funcionará sin persistencia de checkpoints")
+            checkpointer = None
+    
+    if checkpointer:
+        app = workflow.compile(checkpointer=checkpointer, store=memory_store)
+        logger.info("    ✅ Grafo async compilado con AsyncPostgresSaver + memory store")
+    else:
+        app = workflow.compile(store=memory_store)
+        logger.info("    ✅ Grafo async compilado con memory store (sin checkpointer)")
+    
+    return app
 
 
 if __name__ == "__main__":
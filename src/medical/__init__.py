@@ -23,6 +23,7 @@ from src.medical.disponibilidad import (
 from src.medical.slots import (
     generar_slots_con_turnos,
     generar_slots_doctor,
+    buscar_slots,
     formatear_slots_para_frontend,
     agrupar_slots_por_dia
 )
@@ -42,6 +43,7 @@ __all__ = [
     # Slots
     "generar_slots_con_turnos",
     "generar_slots_doctor",
+    "buscar_slots",
     "formatear_slots_para_frontend",
     "agrupar_slots_por_dia",
 ]
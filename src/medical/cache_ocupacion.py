@@ -0,0 +1,301 @@
+"""
+Cache de Ocupación de Doctores (bitmap por doctor y día)
+
+Cada día de un doctor se guarda como un entero de 96 bits: un bit por
+unidad de 15 minutos ocupada por alguna cita no cancelada. Verificar un
+horario es una máscara AND sobre ese entero, sin tocar PostgreSQL; solo
+si hay choque se recorren las citas del día para reportar cuál es.
+
+Reemplaza al dict `_cache_disponibilidad` de disponibilidad.py, que nunca
+se invalidaba (devolvía "disponible" después de agendar) ni respetaba su
+tamaño máximo.
+
+Invalidación:
+- invalidar_ocupacion(doctor_id, fecha) desde cada escritura a citas_medicas
+  (crud, tools de agendamiento y el sincronizador de Google Calendar)
+- TTL como red de seguridad para escrituras de otros procesos
+- Contador de generación: una carga que empezó antes de una invalidación
+  no guarda su resultado (evita volver a meter datos viejos)
+
+Configuración (variables de entorno):
+    OCUPACION_CACHE_TTL_SEG   Vigencia de cada día cargado (default: 60)
+    OCUPACION_CACHE_MAX_DIAS  Días doctor/fecha en memoria, LRU (default: 500)
+"""
+
+import logging
+import os
+import threading
+import time as _time
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+
+from src.medical.connection_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+TIMEZONE = pytz.timezone("America/Tijuana")
+
+UNIDAD_MINUTOS = 15
+UNIDADES_POR_DIA = 24 * 60 // UNIDAD_MINUTOS
+
+
+def _env_int(nombre: str, default: int) -> int:
+    try:
+        return int(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+CACHE_TTL_SEG = max(0.0, _env_float("OCUPACION_CACHE_TTL_SEG", 60.0))
+CACHE_MAX_DIAS = max(1, _env_int("OCUPACION_CACHE_MAX_DIAS", 500))
+
+# (inicio, fin, cita_id) en TIMEZONE
+CitaDia = Tuple[datetime, datetime, int]
+
+
+def _inicio_dia(fecha: date) -> datetime:
+    return TIMEZONE.localize(datetime.combine(fecha, time.min))
+
+
+def _rango_unidades(inicio: datetime, fin: datetime, fecha: date) -> Tuple[int, int]:
+    """Unidades [primera, ultima] del día que toca el intervalo (recortado al día)."""
+    base = _inicio_dia(fecha)
+    inicio_min = max(0.0, (inicio - base).total_seconds() / 60)
+    fin_min = min(float(UNIDADES_POR_DIA * UNIDAD_MINUTOS), (fin - base).total_seconds() / 60)
+
+    primera = int(inicio_min // UNIDAD_MINUTOS)
+    # -1e-9: un fin exacto en el borde de una unidad no ocupa la siguiente
+    ultima = max(primera, int((fin_min - 1e-9) // UNIDAD_MINUTOS))
+    return primera, min(ultima, UNIDADES_POR_DIA - 1)
+
+
+def _mascara(primera: int, ultima: int) -> int:
+    return ((1 << (ultima - primera + 1)) - 1) << primera
+
+
+class DiaOcupacion:
+    """Ocupación de un doctor en un día: bitmap + citas para reportar conflictos."""
+
+    __slots__ = ("bitmap", "citas", "cargado_en", "con_citas_instantaneas")
+
+    def __init__(self, fecha: date, citas: List[CitaDia]):
+        self.citas = citas
+        self.cargado_en = _time.monotonic()
+        # check_conflicto_horario cuenta una cita de duración cero justo en el
+        # borde de un horario (caso 3); el bitmap no, así que esos días se
+        # verifican siempre contra la lista de citas
+        self.con_citas_instantaneas = any(inicio >= fin for inicio, fin, _ in citas)
+        bitmap = 0
+        for inicio, fin, _ in citas:
+            bitmap |= _mascara(*_rango_unidades(inicio, fin, fecha))
+        self.bitmap = bitmap
+
+
+class CacheOcupacion:
+    """
+    Ocupación por (doctor_id, fecha) con LRU, TTL e invalidación explícita.
+
+    - doctores(): nombres de doctores (una consulta, con el mismo TTL)
+    - conflicto(): cita que choca con [inicio, fin) o None, en O(1) si el
+      día ya está en memoria
+    """
+
+    def __init__(self, ttl_seg: float = CACHE_TTL_SEG, max_dias: int = CACHE_MAX_DIAS):
+        self.ttl_seg = ttl_seg
+        self.max_dias = max_dias
+
+        self._dias: "OrderedDict[Tuple[int, date], DiaOcupacion]" = OrderedDict()
+        self._doctores: Optional[Dict[int, str]] = None
+        self._doctores_cargados_en = 0.0
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+    def _vigente(self, cargado_en: float) -> bool:
+        return _time.monotonic() - cargado_en < self.ttl_seg
+
+    # ---------- Doctores ----------
+
+    def doctores(self) -> Dict[int, str]:
+        """Doctores registrados {id: nombre_completo}."""
+        with self._lock:
+            if self._doctores is not None and self._vigente(self._doctores_cargados_en):
+                return self._doctores
+            generacion = self._generacion
+
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, nombre_completo FROM doctores")
+                doctores = {row[0]: row[1] for row in cur.fetchall()}
+
+        with self._lock:
+            if generacion == self._generacion:
+                self._doctores = doctores
+                self._doctores_cargados_en = _time.monotonic()
+        return doctores
+
+    # ---------- Ocupación por día ----------
+
+    def _dia(self, doctor_id: int, fecha: date) -> DiaOcupacion:
+        clave = (doctor_id, fecha)
+        with self._lock:
+            dia = self._dias.get(clave)
+            if dia is not None and self._vigente(dia.cargado_en):
+                self._dias.move_to_end(clave)
+                self.hits += 1
+                return dia
+            self.misses += 1
+            generacion = self._generacion
+
+        dia = DiaOcupacion(fecha, self._cargar_citas(doctor_id, fecha))
+
+        with self._lock:
+            # Si hubo una escritura mientras se consultaba, no guardar
+            if generacion == self._generacion:
+                self._dias[clave] = dia
+                self._dias.move_to_end(clave)
+                while len(self._dias) > self.max_dias:
+                    self._dias.popitem(last=False)
+        return dia
+
+    def _cargar_citas(self, doctor_id: int, fecha: date) -> List[CitaDia]:
+        """Citas no canceladas del doctor que tocan el día (bordes inclusivos)."""
+        inicio = _inicio_dia(fecha)
+        fin = _inicio_dia(fecha + timedelta(days=1))
+
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT
+                        fecha_hora_inicio::timestamptz,
+                        fecha_hora_fin::timestamptz,
+                        id
+                    FROM citas_medicas
+                    WHERE doctor_id = %s
+                      AND estado != 'cancelada'
+                      AND fecha_hora_inicio < %s
+                      AND fecha_hora_fin >= %s
+                    ORDER BY fecha_hora_inicio
+                """, (doctor_id, fin, inicio))
+                filas = cur.fetchall()
+
+        return [(ini.astimezone(TIMEZONE), f.astimezone(TIMEZONE), cita_id) for ini, f, cita_id in filas]
+
+    def conflicto(self, doctor_id: int, inicio: datetime, fin: datetime) -> Optional[CitaDia]:
+        """
+        Cita que choca con [inicio, fin) (mismos casos que check_conflicto_horario).
+
+        El horario debe caer en un solo día (los slots de la clínica lo hacen).
+        """
+        inicio = inicio.astimezone(TIMEZONE)
+        fin = fin.astimezone(TIMEZONE)
+        fecha = inicio.date()
+
+        dia = self._dia(doctor_id, fecha)
+        if not dia.con_citas_instantaneas and not dia.bitmap & _mascara(*_rango_unidades(inicio, fin, fecha)):
+            return None
+
+        # Alguna unidad está ocupada: buscar la cita exacta
+        from src.medical.motor_disponibilidad import _se_traslapan
+
+        for cita in dia.citas:
+            if _se_traslapan(inicio, fin, cita[0], cita[1]):
+                return cita
+        return None
+
+    # ---------- Invalidación ----------
+
+    def invalidar(self, doctor_id: Optional[int] = None, fecha: Optional[date] = None) -> None:
+        """
+        Descarta la ocupación cacheada.
+
+        Sin argumentos descarta todo; con doctor_id solo ese doctor; con
+        doctor_id y fecha solo ese día.
+        """
+        with self._lock:
+            self._generacion += 1
+            self.invalidaciones += 1
+            if doctor_id is None:
+                self._dias.clear()
+                self._doctores = None
+                return
+            for clave in [c for c in self._dias if c[0] == doctor_id and (fecha is None or c[1] == fecha)]:
+                del self._dias[clave]
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "dias_en_memoria": len(self._dias),
+                "max_dias": self.max_dias,
+                "ttl_seg": self.ttl_seg,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / consultas, 4) if consultas else 0.0,
+                "invalidaciones": self.invalidaciones,
+            }
+
+
+# ==================== SINGLETON ====================
+
+_cache_instance: Optional[CacheOcupacion] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_ocupacion() -> CacheOcupacion:
+    """Cache de ocupación del proceso (singleton)."""
+    global _cache_instance
+
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = CacheOcupacion()
+
+    return _cache_instance
+
+
+def invalidar_ocupacion(doctor_id: Optional[int] = None, fecha_hora: Optional[datetime] = None) -> None:
+    """
+    Invalida la ocupación tras escribir en citas_medicas.
+
+    Args:
+        doctor_id: Doctor afectado (None = todos, p. ej. sincronización masiva)
+        fecha_hora: Inicio de la cita afectada (None = todos los días del doctor)
+    """
+    cache = _cache_instance
+    if cache is None:
+        return
+
+    fecha = None
+    if fecha_hora is not None:
+        if fecha_hora.tzinfo is None:
+            fecha_hora = TIMEZONE.localize(fecha_hora)
+        fecha = fecha_hora.astimezone(TIMEZONE).date()
+
+    cache.invalidar(doctor_id, fecha)
+
+
+def reset_cache_ocupacion() -> None:
+    """Descarta el cache (tests o cambio de configuración)."""
+    global _cache_instance
+    with _cache_lock:
+        _cache_instance = None
+
+
+def obtener_metricas_ocupacion() -> Optional[Dict[str, Any]]:
+    """Contadores del cache sin crearlo (None si aún no se usó)."""
+    cache = _cache_instance
+    return cache.obtener_metricas() if cache is not None else None
@@ -13,6 +13,7 @@ from .models import (
     TipoConsulta, EstadoCita, Genero, MetodoPago, EstadoSincronizacion
 )
 from ..database.db_config import get_db_session
+from .cache_ocupacion import invalidar_ocupacion
 
 # ===== OPERACIONES DE DOCTORES =====
 
@@ -288,6 +289,7 @@ def schedule_appointment(appointment_data: dict) -> CitasMedicas:
         db.add(cita)
         db.commit()
         db.refresh(cita)
+        invalidar_ocupacion(cita.doctor_id, cita.fecha_hora_inicio)
         
         # Actualizar última cita del paciente
         paciente = db.query(Pacientes).filter(Pacientes.id == cita.paciente_id).first()
@@ -343,6 +345,12 @@ def agendar_cita_simple(
     """
     Función simplificada para agendar citas desde el recepcionista.
     
+    Las confirmaciones simultáneas del mismo doctor y día se serializan con
+    un advisory lock de transacción (pg_advisory_xact_lock) y los conflictos
+    se vuelven a verificar dentro de la transacción con
+    check_conflicto_horario: de varias confirmaciones al mismo slot solo
+    una inserta la cita.
+    
     Args:
         doctor_id: ID del doctor
         paciente_id: ID del paciente
@@ -351,10 +359,28 @@ def agendar_cita_simple(
         motivo: Motivo de la consulta
         
     Returns:
-        ID de la cita creada o None si falla
+        ID de la cita creada o None si falla o el horario ya está ocupado
     """
+    import logging
+    logger = logging.getLogger(__name__)
+    
     with get_db_session() as db:
         try:
+            # Serializar escrituras del doctor en ese día (se libera en commit/rollback)
+            db.execute(
+                text("SELECT pg_advisory_xact_lock(:doctor_id, :dia)"),
+                {"doctor_id": doctor_id, "dia": fecha_inicio.date().toordinal()}
+            )
+            
+            conflicto = db.execute(
+                text("SELECT tiene_conflicto, cita_id_conflictiva FROM check_conflicto_horario(:doctor_id, :inicio, :fin)"),
+                {"doctor_id": doctor_id, "inicio": fecha_inicio, "fin": fecha_fin}
+            ).first()
+            if conflicto and conflicto[0]:
+                db.rollback()
+                logger.warning(f"⚠️ Horario ocupado al confirmar (cita {conflicto[1]}), doctor {doctor_id} {fecha_inicio}")
+                return None
+            
             # Crear la cita
             cita = CitasMedicas(
                 doctor_id=doctor_id,
@@ -369,6 +395,7 @@ def agendar_cita_simple(
             db.add(cita)
             db.commit()
             db.refresh(cita)
+            invalidar_ocupacion(doctor_id, fecha_inicio)
             
             # Actualizar última cita del paciente
             paciente = db.query(Pacientes).filter(Pacientes.id == paciente_id).first()
@@ -380,8 +407,7 @@ def agendar_cita_simple(
             
         except Exception as e:
             db.rollback()
-            import logging
-            logging.getLogger(__name__).error(f"Error agendando cita: {e}")
+            logger.error(f"Error agendando cita: {e}")
             return None
 
 
@@ -489,6 +515,8 @@ def update_appointment(cita_id: int, updates: dict) -> Optional[CitasMedicas]:
             cita.updated_at = datetime.now()
             db.commit()
             db.refresh(cita)
+            # Puede moverse de día o cambiar de estado: todos los días del doctor
+            invalidar_ocupacion(cita.doctor_id)
         
         return cita
 
@@ -506,6 +534,7 @@ def cancel_appointment(cita_id: int, motivo: str = None) -> Optional[CitasMedica
             cita.updated_at = datetime.now()
             db.commit()
             db.refresh(cita)
+            invalidar_ocupacion(cita.doctor_id, cita.fecha_hora_inicio)
         
         return cita
 
@@ -11,6 +11,7 @@ from sqlalchemy import func, and_, or_, extract, text
 from sqlalchemy.orm import Session
 
 from src.database.db_config import get_db_session
+from src.medical.cache_ocupacion import invalidar_ocupacion
 from src.medical.models import (
     CitasMedicas, Doctores, Pacientes, HistorialesMedicos,
     DisponibilidadMedica, EstadoCita, TipoConsulta
@@ -844,6 +845,7 @@ def agendar_cita_tool(
             db.add(nueva_cita)
             db.commit()
             db.refresh(nueva_cita)
+            invalidar_ocupacion(doctor_id, fecha_hora_inicio)
             
             logger.info(f"✅ Cita agendada: {paciente.nombre_completo} con {doctor.nombre_completo} - {fecha} {hora}")
             
@@ -903,6 +905,7 @@ def cancelar_cita_tool(
             cita.updated_at = datetime.now()
             
             db.commit()
+            invalidar_ocupacion(cita.doctor_id, cita.fecha_hora_inicio)
             
             logger.info(f"✅ Cita {cita_id} cancelada: {motivo_cancelacion}")
             
@@ -0,0 +1,175 @@
+"""
+Motor de Disponibilidad en Bloque
+
+Carga en una sola consulta todos los doctores y las citas no canceladas
+de la ventana pedida, y resuelve la disponibilidad de cada slot
+en memoria con aritmética de intervalos.
+
+Antes generar_slots_con_turnos() llamaba a check_doctor_availability() por
+slot (2 consultas cada uno, más obtener_otro_doctor() y el turno): con 14
+días eran cientos de viajes a PostgreSQL por mensaje del recepcionista.
+
+Las reglas son las mismas que check_doctor_availability():
+- Día de atención y horario de clínica (validar_horario_cita)
+- Doctor existente en la tabla doctores
+- Traslape con citas no canceladas, con los mismos 3 casos que la función
+  SQL check_conflicto_horario
+"""
+
+import logging
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.medical.connection_pool import get_connection
+from src.medical.disponibilidad import (
+    TIMEZONE,
+    describir_conflicto,
+    resultado_disponible,
+    resultado_doctor_no_existe,
+    resultado_ocupado,
+    validar_horario_cita,
+)
+
+logger = logging.getLogger(__name__)
+
+# (inicio, fin, cita_id)
+Intervalo = Tuple[datetime, datetime, int]
+
+
+def _se_traslapan(inicio: datetime, fin: datetime, cita_inicio: datetime, cita_fin: datetime) -> bool:
+    """Mismo criterio que check_conflicto_horario (sql/init_database.sql)."""
+    return (
+        # Caso 1: Nueva cita empieza durante cita existente
+        (cita_inicio <= inicio < cita_fin)
+        # Caso 2: Nueva cita termina durante cita existente
+        or (cita_inicio < fin <= cita_fin)
+        # Caso 3: Nueva cita envuelve completamente a cita existente
+        or (inicio <= cita_inicio and fin >= cita_fin)
+    )
+
+
+class AgendaOcupacion:
+    """
+    Ocupación de los doctores en una ventana de tiempo (solo lectura).
+
+    Por doctor guarda las citas ordenadas por inicio y el máximo acumulado
+    de sus fines: un slot [inicio, fin) solo puede chocar con citas que
+    empiezan a más tardar en `fin` (bisect) y cuyo fin acumulado alcanza
+    `inicio`, así que cada consulta es O(log n + traslapes).
+    """
+
+    def __init__(self, doctores: Dict[int, str], citas: List[Tuple[int, datetime, datetime, int]]):
+        self.doctores = doctores
+        self._inicios: Dict[int, List[datetime]] = {}
+        self._intervalos: Dict[int, List[Intervalo]] = {}
+        self._fin_maximo: Dict[int, List[datetime]] = {}
+
+        por_doctor: Dict[int, List[Intervalo]] = {}
+        for doctor_id, inicio, fin, cita_id in citas:
+            por_doctor.setdefault(doctor_id, []).append((inicio, fin, cita_id))
+
+        for doctor_id, intervalos in por_doctor.items():
+            intervalos.sort()
+            fin_maximo = []
+            for _, fin, _ in intervalos:
+                fin_maximo.append(fin if not fin_maximo else max(fin, fin_maximo[-1]))
+            self._intervalos[doctor_id] = intervalos
+            self._inicios[doctor_id] = [inicio for inicio, _, _ in intervalos]
+            self._fin_maximo[doctor_id] = fin_maximo
+
+    def conflicto(self, doctor_id: int, inicio: datetime, fin: datetime) -> Optional[Intervalo]:
+        """Primera cita (por hora de inicio) que choca con [inicio, fin), o None."""
+        inicios = self._inicios.get(doctor_id)
+        if not inicios:
+            return None
+
+        intervalos = self._intervalos[doctor_id]
+        fin_maximo = self._fin_maximo[doctor_id]
+        primero = None
+
+        # Recorrer hacia atrás mientras alguna cita anterior pueda llegar a `inicio`
+        i = bisect_right(inicios, fin) - 1
+        while i >= 0 and fin_maximo[i] >= inicio:
+            cita_inicio, cita_fin, _ = intervalos[i]
+            if _se_traslapan(inicio, fin, cita_inicio, cita_fin):
+                primero = intervalos[i]
+            i -= 1
+
+        return primero
+
+    def verificar(self, doctor_id: int, fecha_hora_inicio: datetime, fecha_hora_fin: datetime) -> Dict[str, Any]:
+        """
+        Disponibilidad de un doctor en memoria.
+
+        Returns:
+            Mismo formato que check_doctor_availability():
+            {"disponible", "razon", "conflicto_con", "detalles"}
+        """
+        if fecha_hora_inicio.tzinfo is None:
+            fecha_hora_inicio = TIMEZONE.localize(fecha_hora_inicio)
+        if fecha_hora_fin.tzinfo is None:
+            fecha_hora_fin = TIMEZONE.localize(fecha_hora_fin)
+
+        invalido = validar_horario_cita(fecha_hora_inicio, fecha_hora_fin)
+        if invalido:
+            return invalido
+
+        if doctor_id not in self.doctores:
+            return resultado_doctor_no_existe(doctor_id)
+
+        conflicto = self.conflicto(doctor_id, fecha_hora_inicio, fecha_hora_fin)
+        if conflicto:
+            cita_inicio, cita_fin, cita_id = conflicto
+            return resultado_ocupado(cita_id, describir_conflicto(cita_id, cita_inicio, cita_fin))
+
+        return resultado_disponible(self.doctores[doctor_id])
+
+
+def cargar_agenda(desde: datetime, hasta: datetime) -> AgendaOcupacion:
+    """
+    Carga doctores y citas no canceladas que tocan [desde, hasta].
+
+    Una sola consulta (doctores LEFT JOIN citas de la ventana), sin importar
+    cuántos slots se evalúen después. Las columnas de citas_medicas son
+    TIMESTAMP: se leen como timestamptz para compararlas con los slots
+    timezone-aware igual que lo hace PostgreSQL al llamar
+    check_conflicto_horario.
+
+    Raises:
+        Exception: Si falla la conexión o la consulta
+    """
+    if desde.tzinfo is None:
+        desde = TIMEZONE.localize(desde)
+    if hasta.tzinfo is None:
+        hasta = TIMEZONE.localize(hasta)
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            # Bordes inclusivos: el caso 3 de check_conflicto_horario
+            # cuenta citas que terminan justo donde empieza el slot
+            cur.execute("""
+                SELECT
+                    d.id,
+                    d.nombre_completo,
+                    cm.fecha_hora_inicio::timestamptz,
+                    cm.fecha_hora_fin::timestamptz,
+                    cm.id
+                FROM doctores d
+                LEFT JOIN citas_medicas cm
+                    ON cm.doctor_id = d.id
+                   AND cm.estado != 'cancelada'
+                   AND cm.fecha_hora_inicio <= %s
+                   AND cm.fecha_hora_fin >= %s
+            """, (hasta, desde))
+            filas = cur.fetchall()
+
+    doctores = {}
+    citas = []
+    for doctor_id, nombre, inicio, fin, cita_id in filas:
+        doctores[doctor_id] = nombre
+        if cita_id is not None:
+            citas.append((doctor_id, inicio, fin, cita_id))
+
+    logger.info(f"📅 Agenda cargada: {len(doctores)} doctores, {len(citas)} citas en ventana")
+    return AgendaOcupacion(doctores, citas)
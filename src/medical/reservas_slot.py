@@ -0,0 +1,227 @@
+"""
+Reservas Temporales de Slots (holds con TTL)
+
+Cuando al paciente se le ofrece un horario y la conversación pasa a
+`confirmando_cita`, el slot queda apartado a su nombre durante unos minutos:
+mientras tanto no se le ofrece a otros pacientes. Al confirmar, la cita se
+inserta con agendar_cita_simple(), que serializa las escrituras del mismo
+doctor y día con un advisory lock de PostgreSQL y vuelve a verificar
+conflictos dentro de la transacción.
+
+La reserva evita ofrecer el mismo slot a dos personas (experiencia); el
+lock en el commit es lo que garantiza que nunca se agenden dos citas
+traslapadas, aunque la reserva haya expirado o la escritura venga de otro
+proceso.
+
+Configuración (variables de entorno):
+    RESERVA_SLOT_TTL_SEG  Duración de una reserva (default: 300)
+"""
+
+import logging
+import os
+import threading
+import time as _time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.medical.cache_ocupacion import TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+RESERVA_TTL_SEG = max(1.0, _env_float("RESERVA_SLOT_TTL_SEG", 300.0))
+
+
+def _aware(fecha_hora: datetime) -> datetime:
+    return TIMEZONE.localize(fecha_hora) if fecha_hora.tzinfo is None else fecha_hora
+
+
+class Reserva:
+    __slots__ = ("doctor_id", "inicio", "fin", "titular", "expira_en")
+
+    def __init__(self, doctor_id: int, inicio: datetime, fin: datetime, titular: str, expira_en: float):
+        self.doctor_id = doctor_id
+        self.inicio = inicio
+        self.fin = fin
+        self.titular = titular
+        self.expira_en = expira_en
+
+
+class ReservasSlot:
+    """
+    Reservas vigentes por doctor (thread-safe).
+
+    - reservar(): aparta [inicio, fin) para un titular (teléfono del paciente);
+      falla si otro titular tiene una reserva vigente que se traslapa
+    - retenido_por_otro(): para no ofrecer slots apartados por otro paciente
+    - liberar(): al confirmar, rechazar o cambiar de horario
+    """
+
+    def __init__(self, ttl_seg: float = RESERVA_TTL_SEG):
+        self.ttl_seg = ttl_seg
+        self._por_doctor: Dict[int, List[Reserva]] = {}
+        self._lock = threading.Lock()
+
+        self.reservas_creadas = 0
+        self.reservas_rechazadas = 0
+
+    def _vigentes(self, doctor_id: int, ahora: float) -> List[Reserva]:
+        # Se llama con self._lock tomado; purga las expiradas del doctor
+        reservas = [r for r in self._por_doctor.get(doctor_id, []) if r.expira_en > ahora]
+        if reservas:
+            self._por_doctor[doctor_id] = reservas
+        else:
+            self._por_doctor.pop(doctor_id, None)
+        return reservas
+
+    def _choque(self, doctor_id: int, inicio: datetime, fin: datetime, titular: Optional[str], ahora: float) -> Optional[Reserva]:
+        for reserva in self._vigentes(doctor_id, ahora):
+            if reserva.titular != titular and reserva.inicio < fin and reserva.fin > inicio:
+                return reserva
+        return None
+
+    def reservar(self, doctor_id: int, inicio: datetime, fin: datetime, titular: str) -> bool:
+        """
+        Aparta el slot para `titular` durante ttl_seg.
+
+        Un titular solo tiene una reserva a la vez: reservar otro horario
+        libera el anterior. Volver a reservar el mismo slot renueva el TTL.
+
+        Returns:
+            True si quedó reservado, False si otro paciente lo tiene apartado
+        """
+        inicio, fin = _aware(inicio), _aware(fin)
+        ahora = _time.monotonic()
+
+        with self._lock:
+            if self._choque(doctor_id, inicio, fin, titular, ahora):
+                self.reservas_rechazadas += 1
+                return False
+
+            self._liberar_titular(titular)
+            self._por_doctor.setdefault(doctor_id, []).append(
+                Reserva(doctor_id, inicio, fin, titular, ahora + self.ttl_seg)
+            )
+            self.reservas_creadas += 1
+
+        logger.debug(f"🔒 Slot reservado: doctor {doctor_id} {inicio.strftime('%Y-%m-%d %H:%M')} para {titular}")
+        return True
+
+    def retenido_por_otro(self, doctor_id: int, inicio: datetime, fin: datetime, titular: Optional[str] = None) -> bool:
+        """True si otro titular tiene apartado algo que se traslapa con [inicio, fin)."""
+        with self._lock:
+            return self._choque(doctor_id, _aware(inicio), _aware(fin), titular, _time.monotonic()) is not None
+
+    def _liberar_titular(self, titular: str) -> None:
+        # Se llama con self._lock tomado
+        for doctor_id in list(self._por_doctor):
+            restantes = [r for r in self._por_doctor[doctor_id] if r.titular != titular]
+            if restantes:
+                self._por_doctor[doctor_id] = restantes
+            else:
+                del self._por_doctor[doctor_id]
+
+    def liberar(self, titular: str) -> None:
+        """Libera la reserva del titular (confirmó, rechazó o abandonó)."""
+        with self._lock:
+            self._liberar_titular(titular)
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        ahora = _time.monotonic()
+        with self._lock:
+            vigentes = sum(len(self._vigentes(d, ahora)) for d in list(self._por_doctor))
+            return {
+                "reservas_vigentes": vigentes,
+                "reservas_creadas": self.reservas_creadas,
+                "reservas_rechazadas": self.reservas_rechazadas,
+                "ttl_seg": self.ttl_seg,
+            }
+
+
+# ==================== SINGLETON ====================
+
+_reservas_instance: Optional[ReservasSlot] = None
+_reservas_lock = threading.Lock()
+
+
+def get_reservas_slot() -> ReservasSlot:
+    """Registro de reservas del proceso (singleton)."""
+    global _reservas_instance
+
+    if _reservas_instance is None:
+        with _reservas_lock:
+            if _reservas_instance is None:
+                _reservas_instance = ReservasSlot()
+
+    return _reservas_instance
+
+
+def reset_reservas_slot() -> None:
+    """Descarta todas las reservas (tests)."""
+    global _reservas_instance
+    with _reservas_lock:
+        _reservas_instance = None
+
+
+def obtener_metricas_reservas() -> Optional[Dict[str, Any]]:
+    """Contadores de reservas sin crear el registro (None si aún no se usó)."""
+    reservas = _reservas_instance
+    return reservas.obtener_metricas() if reservas is not None else None
+
+
+def slot_a_intervalo(slot: Dict[str, Any]) -> Tuple[datetime, datetime]:
+    """(inicio, fin) timezone-aware de un slot de generar_slots_con_turnos()."""
+    inicio = datetime.strptime(f"{slot['fecha']} {slot['hora_inicio']}", "%Y-%m-%d %H:%M")
+    fin = datetime.strptime(f"{slot['fecha']} {slot['hora_fin']}", "%Y-%m-%d %H:%M")
+    return TIMEZONE.localize(inicio), TIMEZONE.localize(fin)
+
+
+def reservar_slot(slot: Dict[str, Any], titular: str) -> bool:
+    """Reserva un slot ofrecido al paciente (requiere doctor_asignado_id)."""
+    inicio, fin = slot_a_intervalo(slot)
+    return get_reservas_slot().reservar(slot["doctor_asignado_id"], inicio, fin, titular)
+
+
+def confirmar_slot(
+    slot: Dict[str, Any],
+    titular: str,
+    paciente_id: int,
+    motivo: str = "Consulta general"
+) -> Optional[int]:
+    """
+    Agenda el slot reservado por el titular.
+
+    Falla si otro paciente lo tiene apartado. Si la reserva propia expiró
+    igual se intenta: agendar_cita_simple() verifica conflictos bajo el
+    advisory lock, así que no puede duplicar la cita.
+
+    Returns:
+        ID de la cita creada o None si el horario ya no está disponible
+    """
+    from src.medical.crud import agendar_cita_simple
+
+    doctor_id = slot["doctor_asignado_id"]
+    inicio, fin = slot_a_intervalo(slot)
+    reservas = get_reservas_slot()
+
+    if reservas.retenido_por_otro(doctor_id, inicio, fin, titular):
+        logger.warning(f"⚠️ Slot {slot.get('slot_id')} apartado por otro paciente")
+        return None
+
+    # Hora local sin tzinfo, como la guardaba el recepcionista
+    cita_id = agendar_cita_simple(
+        doctor_id=doctor_id,
+        paciente_id=paciente_id,
+        fecha_inicio=inicio.replace(tzinfo=None),
+        fecha_fin=fin.replace(tzinfo=None),
+        motivo=motivo
+    )
+    reservas.liberar(titular)
+    return cita_id
@@ -7,14 +7,14 @@ NO revela el doctor asignado hasta la confirmación de la cita.
 
 import os
 import logging
-from typing import List, Dict, Any
-from datetime import datetime, timedelta, time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from datetime import date, datetime, timedelta, time
 
 import pytz
 from dotenv import load_dotenv
 
-from src.medical.turnos import obtener_siguiente_doctor_turno, obtener_otro_doctor
-from src.medical.disponibilidad import check_doctor_availability, validar_horario_clinica
+from src.medical.motor_disponibilidad import AgendaOcupacion, cargar_agenda
+from src.medical.reservas_slot import get_reservas_slot
 
 load_dotenv()
 
@@ -28,29 +28,159 @@ HORA_FIN_CLINICA = time(18, 30)  # 6:30 PM
 DIAS_ATENCION = [0, 3, 4, 5, 6]  # Lunes, Jueves, Viernes, Sábado, Domingo
 
 
+def _iterar_slots(
+    ahora: datetime,
+    dias_adelante: int,
+    dia_inicio: int = 0
+) -> Iterator[Tuple[datetime, datetime, time, time]]:
+    """
+    Recorre los slots futuros de 1 hora de los días de atención.
+    
+    Args:
+        ahora: Momento actual (timezone-aware)
+        dias_adelante: Último día a recorrer (offset desde hoy, inclusivo)
+        dia_inicio: Primer día a recorrer (offset desde hoy)
+    
+    Yields:
+        (fecha_slot, fecha_fin_slot, hora_inicio, hora_fin)
+    """
+    # Generar slots desde dia_inicio hasta dias_adelante (inclusivo)
+    for dia_offset in range(dia_inicio, dias_adelante + 1):
+        fecha = ahora + timedelta(days=dia_offset)
+        dia_semana = fecha.weekday()
+        
+        # Filtrar días no laborables
+        if dia_semana not in DIAS_ATENCION:
+            continue
+        
+        hora_actual = HORA_INICIO_CLINICA
+        
+        while hora_actual < HORA_FIN_CLINICA:
+            hora_fin_slot = (datetime.combine(datetime.today(), hora_actual) + 
+                           timedelta(hours=DURACION_SLOT_HORAS)).time()
+            
+            fecha_slot = fecha.replace(
+                hour=hora_actual.hour,
+                minute=hora_actual.minute,
+                second=0,
+                microsecond=0
+            )
+            
+            # Solo slots futuros
+            if fecha_slot > ahora:
+                fecha_fin_slot = fecha_slot.replace(
+                    hour=hora_fin_slot.hour,
+                    minute=hora_fin_slot.minute
+                )
+                yield fecha_slot, fecha_fin_slot, hora_actual, hora_fin_slot
+            
+            # Avanzar a siguiente hora
+            hora_actual = hora_fin_slot
+
+
+def _cargar_agenda_ventana(desde: datetime, hasta: datetime) -> Optional[AgendaOcupacion]:
+    """Agenda de toda la ventana de slots en una sola carga (None si falla la BD)."""
+    try:
+        return cargar_agenda(desde, hasta)
+    except Exception as e:
+        logger.error(f"❌ Error cargando agenda de disponibilidad: {e}")
+        return None
+
+
+def _asignar_doctor_turno(
+    agenda: AgendaOcupacion,
+    turno_contador: int,
+    fecha_slot: datetime,
+    fecha_fin_slot: datetime,
+    titular: Optional[str] = None
+) -> Optional[int]:
+    """
+    Doctor para el slot según alternancia de turnos (None si ambos ocupados).
+    
+    Turnos pares → Santiago (1), impares → Joana (2). Si el doctor del
+    turno está ocupado (o el slot está reservado por otro paciente) se
+    intenta con el otro.
+    """
+    reservas = get_reservas_slot()
+    
+    def libre(doctor: int) -> bool:
+        return (
+            agenda.verificar(doctor, fecha_slot, fecha_fin_slot)["disponible"]
+            and not reservas.retenido_por_otro(doctor, fecha_slot, fecha_fin_slot, titular)
+        )
+    
+    # Simular alternancia para este cálculo
+    if turno_contador % 2 == 0:
+        doctor_id = 1  # Santiago
+    else:
+        doctor_id = 2  # Joana
+    
+    # Verificar disponibilidad del doctor del turno
+    if libre(doctor_id):
+        return doctor_id
+    
+    # Si el doctor del turno está ocupado, intentar con el otro
+    otro_doctor_id = 2 if doctor_id == 1 else 1
+    if otro_doctor_id in agenda.doctores and libre(otro_doctor_id):
+        logger.debug(f"🔄 Reasignado: Doctor {doctor_id} → {otro_doctor_id}")
+        return otro_doctor_id
+    
+    return None
+
+
+def _crear_slot(
+    fecha_slot: datetime,
+    hora_inicio: time,
+    hora_fin: time,
+    doctor_asignado: int,
+    turno_numero: int,
+    incluir_doctor_interno: bool
+) -> Dict[str, Any]:
+    """Dict de slot disponible (formato de generar_slots_con_turnos)."""
+    slot = {
+        "fecha": fecha_slot.strftime("%Y-%m-%d"),
+        "hora_inicio": hora_inicio.strftime("%H:%M"),
+        "hora_fin": hora_fin.strftime("%H:%M"),
+        "slot_id": fecha_slot.strftime("%Y-%m-%dT%H:%M"),
+        "disponible": True
+    }
+    
+    # Solo incluir doctor_id si es para uso interno
+    if incluir_doctor_interno:
+        slot["doctor_asignado_id"] = doctor_asignado
+        slot["turno_numero"] = turno_numero
+    
+    return slot
+
+
 def generar_slots_con_turnos(
     dias_adelante: int = 7,
-    incluir_doctor_interno: bool = True
+    incluir_doctor_interno: bool = True,
+    titular: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     Genera slots de disponibilidad aplicando sistema de turnos rotativos.
     
     Algoritmo:
-    1. Para cada día (hoy + dias_adelante):
+    1. Cargar doctores y citas de toda la ventana (motor_disponibilidad,
+       2 consultas en total sin importar el número de slots)
+    
+    2. Para cada día (hoy + dias_adelante):
        - Verificar si es día de atención
        - Generar slots de 1 hora dentro del horario
     
-    2. Para cada slot:
+    3. Para cada slot (en memoria):
        - Determinar doctor por turno
        - Verificar disponibilidad del doctor del turno
        - Si ocupado → intentar con el otro doctor
        - Si ambos ocupados → skip slot
     
-    3. Agregar slot a resultado SIN revelar doctor (a menos que incluir_doctor_interno=True)
+    4. Agregar slot a resultado SIN revelar doctor (a menos que incluir_doctor_interno=True)
     
     Args:
         dias_adelante: Número de días hacia adelante a generar
         incluir_doctor_interno: Si True, incluye doctor_id (solo para backend)
+        titular: Teléfono del paciente; sus propias reservas no bloquean slots
     
     Returns:
         Lista de slots disponibles:
@@ -75,105 +205,23 @@ def generar_slots_con_turnos(
     
     logger.info(f"🔍 Generando slots para próximos {dias_adelante} días...")
     
+    agenda = _cargar_agenda_ventana(ahora, ahora + timedelta(days=dias_adelante + 1))
+    if agenda is None:
+        return slots_disponibles
+    
     # Contador de turnos para simular alternancia (sin modificar BD)
     turno_contador = 0
     
-    # Generar slots desde hoy hasta dias_adelante (inclusivo)
-    for dia_offset in range(dias_adelante + 1):
-        fecha = ahora + timedelta(days=dia_offset)
-        dia_semana = fecha.weekday()
-        
-        # Filtrar días no laborables
-        if dia_semana not in DIAS_ATENCION:
-            continue
-        
-        # Generar slots para ese día
-        hora_actual = HORA_INICIO_CLINICA
+    for fecha_slot, fecha_fin_slot, hora_actual, hora_fin_slot in _iterar_slots(ahora, dias_adelante):
+        doctor_asignado = _asignar_doctor_turno(agenda, turno_contador, fecha_slot, fecha_fin_slot, titular)
+        turno_contador += 1
         
-        while hora_actual < HORA_FIN_CLINICA:
-            # Crear datetime para el slot
-            fecha_slot = fecha.replace(
-                hour=hora_actual.hour,
-                minute=hora_actual.minute,
-                second=0,
-                microsecond=0
-            )
-            
-            # Solo slots futuros
-            if fecha_slot <= ahora:
-                hora_actual = (datetime.combine(datetime.today(), hora_actual) + 
-                              timedelta(hours=DURACION_SLOT_HORAS)).time()
-                continue
-            
-            hora_fin_slot = (datetime.combine(datetime.today(), hora_actual) + 
-                           timedelta(hours=DURACION_SLOT_HORAS)).time()
-            
-            fecha_fin_slot = fecha_slot.replace(
-                hour=hora_fin_slot.hour,
-                minute=hora_fin_slot.minute
-            )
-            
-            # Determinar doctor por turno (alternar sin consultar BD cada vez)
-            try:
-                # Obtener doctor del turno actual
-                doctor_turno = obtener_siguiente_doctor_turno()
-                doctor_id = doctor_turno["doctor_id"]
-                
-                # Simular alternancia para este cálculo
-                if turno_contador % 2 == 0:
-                    doctor_id = 1  # Santiago
-                else:
-                    doctor_id = 2  # Joana
-                
-                turno_contador += 1
-                
-                # Verificar disponibilidad del doctor del turno
-                disponibilidad = check_doctor_availability(
-                    doctor_id,
-                    fecha_slot,
-                    fecha_fin_slot
-                )
-                
-                doctor_asignado = doctor_id
-                
-                # Si el doctor del turno está ocupado, intentar con el otro
-                if not disponibilidad["disponible"]:
-                    otro_doctor = obtener_otro_doctor(doctor_id)
-                    
-                    if otro_doctor:
-                        disponibilidad_otro = check_doctor_availability(
-                            otro_doctor["doctor_id"],
-                            fecha_slot,
-                            fecha_fin_slot
-                        )
-                        
-                        if disponibilidad_otro["disponible"]:
-                            doctor_asignado = otro_doctor["doctor_id"]
-                            disponibilidad = disponibilidad_otro
-                            logger.debug(f"🔄 Reasignado: Doctor {doctor_id} → {doctor_asignado}")
-                
-                # Si hay disponibilidad, agregar slot
-                if disponibilidad["disponible"]:
-                    slot = {
-                        "fecha": fecha_slot.strftime("%Y-%m-%d"),
-                        "hora_inicio": hora_actual.strftime("%H:%M"),
-                        "hora_fin": hora_fin_slot.strftime("%H:%M"),
-                        "slot_id": fecha_slot.strftime("%Y-%m-%dT%H:%M"),
-                        "disponible": True
-                    }
-                    
-                    # Solo incluir doctor_id si es para uso interno
-                    if incluir_doctor_interno:
-                        slot["doctor_asignado_id"] = doctor_asignado
-                        slot["turno_numero"] = turno_contador
-                    
-                    slots_disponibles.append(slot)
-                
-            except Exception as e:
-                logger.error(f"❌ Error procesando slot {fecha_slot}: {e}")
-            
-            # Avanzar a siguiente hora
-            hora_actual = hora_fin_slot
+        # Si hay disponibilidad, agregar slot
+        if doctor_asignado is not None:
+            slots_disponibles.append(_crear_slot(
+                fecha_slot, hora_actual, hora_fin_slot,
+                doctor_asignado, turno_contador, incluir_doctor_interno
+            ))
     
     logger.info(f"✅ {len(slots_disponibles)} slots disponibles generados")
     return slots_disponibles
@@ -199,57 +247,96 @@ def generar_slots_doctor(
     slots = []
     ahora = datetime.now(TIMEZONE)
     
-    # Generar slots desde hoy hasta dias_adelante (inclusivo)
-    for dia_offset in range(dias_adelante + 1):
-        fecha = ahora + timedelta(days=dia_offset)
-        dia_semana = fecha.weekday()
+    agenda = _cargar_agenda_ventana(ahora, ahora + timedelta(days=dias_adelante + 1))
+    if agenda is None:
+        return slots
+    
+    for fecha_slot, fecha_fin_slot, hora_actual, hora_fin_slot in _iterar_slots(ahora, dias_adelante):
+        # Verificar disponibilidad
+        disponibilidad = agenda.verificar(doctor_id, fecha_slot, fecha_fin_slot)
         
-        if dia_semana not in DIAS_ATENCION:
+        if disponibilidad["disponible"]:
+            slots.append({
+                "fecha": fecha_slot.strftime("%Y-%m-%d"),
+                "hora_inicio": hora_actual.strftime("%H:%M"),
+                "hora_fin": hora_fin_slot.strftime("%H:%M"),
+                "slot_id": fecha_slot.strftime("%Y-%m-%dT%H:%M"),
+                "doctor_id": doctor_id,
+                "disponible": True
+            })
+    
+    return slots
+
+
+def buscar_slots(
+    fecha_desde: date,
+    fecha_hasta: Optional[date] = None,
+    hora_desde: Optional[time] = None,
+    hora_hasta: Optional[time] = None,
+    limite: int = 3,
+    incluir_doctor_interno: bool = True,
+    titular: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Busca slots disponibles solo en el rango de fechas y franja horaria pedidos.
+    
+    A diferencia de generar_slots_con_turnos(), carga la agenda únicamente
+    para [fecha_desde, fecha_hasta] (una consulta acotada) y deja de recorrer
+    en cuanto junta `limite` slots.
+    
+    Args:
+        fecha_desde: Primer día a buscar
+        fecha_hasta: Último día a buscar, inclusivo (default: fecha_desde)
+        hora_desde: Hora mínima de inicio del slot (inclusiva, opcional)
+        hora_hasta: Hora máxima de inicio del slot (exclusiva, opcional)
+        limite: Máximo de slots a devolver
+        incluir_doctor_interno: Si True, incluye doctor_id (solo para backend)
+        titular: Teléfono del paciente; sus propias reservas no bloquean slots
+    
+    Returns:
+        Lista de slots con el mismo formato que generar_slots_con_turnos(),
+        ordenados por fecha y hora
+    """
+    fecha_hasta = fecha_hasta or fecha_desde
+    ahora = datetime.now(TIMEZONE)
+    hoy = ahora.date()
+    
+    dia_inicio = max((fecha_desde - hoy).days, 0)
+    dia_fin = (fecha_hasta - hoy).days
+    if dia_fin < dia_inicio or limite <= 0:
+        return []
+    
+    logger.info(f"🔍 Buscando hasta {limite} slots entre {fecha_desde} y {fecha_hasta}...")
+    
+    # Ventana acotada a los días pedidos (a partir de ahora si incluye hoy)
+    inicio_ventana = max(ahora, TIMEZONE.localize(datetime.combine(hoy + timedelta(days=dia_inicio), time.min)))
+    fin_ventana = TIMEZONE.localize(datetime.combine(hoy + timedelta(days=dia_fin + 1), time.min))
+    agenda = _cargar_agenda_ventana(inicio_ventana, fin_ventana)
+    if agenda is None:
+        return []
+    
+    slots_encontrados = []
+    turno_contador = 0
+    
+    for fecha_slot, fecha_fin_slot, hora_actual, hora_fin_slot in _iterar_slots(ahora, dia_fin, dia_inicio):
+        if hora_desde is not None and hora_actual < hora_desde:
+            continue
+        if hora_hasta is not None and hora_actual >= hora_hasta:
             continue
         
-        hora_actual = HORA_INICIO_CLINICA
+        doctor_asignado = _asignar_doctor_turno(agenda, turno_contador, fecha_slot, fecha_fin_slot, titular)
+        turno_contador += 1
         
-        while hora_actual < HORA_FIN_CLINICA:
-            fecha_slot = fecha.replace(
-                hour=hora_actual.hour,
-                minute=hora_actual.minute,
-                second=0,
-                microsecond=0
-            )
-            
-            if fecha_slot <= ahora:
-                hora_actual = (datetime.combine(datetime.today(), hora_actual) + 
-                              timedelta(hours=DURACION_SLOT_HORAS)).time()
-                continue
-            
-            hora_fin_slot = (datetime.combine(datetime.today(), hora_actual) + 
-                           timedelta(hours=DURACION_SLOT_HORAS)).time()
-            
-            fecha_fin_slot = fecha_slot.replace(
-                hour=hora_fin_slot.hour,
-                minute=hora_fin_slot.minute
-            )
-            
-            # Verificar disponibilidad
-            disponibilidad = check_doctor_availability(
-                doctor_id,
-                fecha_slot,
-                fecha_fin_slot
-            )
-            
-            if disponibilidad["disponible"]:
-                slots.append({
-                    "fecha": fecha_slot.strftime("%Y-%m-%d"),
-                    "hora_inicio": hora_actual.strftime("%H:%M"),
-                    "hora_fin": hora_fin_slot.strftime("%H:%M"),
-                    "slot_id": fecha_slot.strftime("%Y-%m-%dT%H:%M"),
-                    "doctor_id": doctor_id,
-                    "disponible": True
-                })
-            
-            hora_actual = hora_fin_slot
+        if doctor_asignado is not None:
+            slots_encontrados.append(_crear_slot(
+                fecha_slot, hora_actual, hora_fin_slot,
+                doctor_asignado, turno_contador, incluir_doctor_interno
+            ))
+            if len(slots_encontrados) >= limite:
+                break
     
-    return slots
+    logger.info(f"✅ {len(slots_encontrados)} slots encontrados")
+    return slots_encontrados
 
 
 def formatear_slots_para_frontend(slots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
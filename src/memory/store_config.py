@@ -18,8 +18,8 @@ def get_memory_store(reset: bool = False) -> InMemoryStore:
     """
     Obtiene o crea una instancia del memory store con embeddings reales.
 
-    Usa el mismo modelo de embeddings que memoria episódica (paraphrase-MiniLM-L6-v2)
-    para consistencia en búsquedas semánticas.
+    Usa el servicio único de embeddings del proceso (src/embeddings/embedding_service.py),
+    el mismo modelo que memoria episódica, para consistencia en búsquedas semánticas.
 
     Args:
         reset: Si True, crea una nueva instancia del store
@@ -33,24 +33,20 @@ def get_memory_store(reset: bool = False) -> InMemoryStore:
         logger.info("🔧 Inicializando memory store con embeddings reales...")
 
         try:
-            # Usar el mismo modelo que en src/embeddings/local_embedder.py
-            # ✅ Actualizado: usar langchain-huggingface en lugar del deprecado langchain_community
-            from langchain_huggingface import HuggingFaceEmbeddings
-
-            embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/paraphrase-MiniLM-L6-v2",
-                model_kwargs={'device': 'cpu'},
-                encode_kwargs={'normalize_embeddings': True}
-            )
+            # ✅ Sin segundo modelo: el índice usa el mismo EmbeddingService que pgvector
+            from src.embeddings.embedding_service import get_embedding_service
+
+            service = get_embedding_service()
+            service.warmup()  # Falla aquí (y no en el primer put) si el modelo no carga
 
             _store_instance = InMemoryStore(
                 index={
-                    "embed": embeddings,  # ✅ Embeddings reales con Sentence Transformers
-                    "dims": 384,          # Dimensión del modelo MiniLM
+                    "embed": service.as_langchain_embeddings(),
+                    "dims": service.dimension,
                     "fields": ["content"] # Campo por defecto a embeddear
                 }
             )
-            logger.info("✅ Memory store inicializado con búsqueda semántica (384 dims)")
+            logger.info(f"✅ Memory store inicializado con búsqueda semántica ({service.dimension} dims)")
 
         except Exception as e:
             logger.error(f"❌ Error inicializando embeddings: {e}")
@@ -12,16 +12,17 @@ MEJORAS TÉCNICAS APLICADAS:
 ✅ Manejo robusto de errores
 
 TODO - OPTIMIZACIONES FUTURAS:
-- [ ] Connection pool PostgreSQL (psycopg_pool)
+- [x] Connection pool PostgreSQL (psycopg_pool)
 - [ ] Queries async con asyncpg
 - [ ] Cache de resumen_dia (Redis, TTL 5min)
 """
 
+import asyncio
 import logging
-from typing import Literal, Dict, Any, Optional
+from typing import Literal, Dict, Any, Optional, Tuple
 from pydantic import BaseModel, Field
 import pendulum
-import psycopg
+from src.medical.connection_pool import get_connection
 import os
 from dotenv import load_dotenv
 
@@ -283,14 +284,13 @@ def obtener_resumen_dia_doctor(doctor_id: int, ahora: Optional[pendulum.DateTime
         String formateado con resumen del día
     """
     try:
-        DATABASE_URL = os.getenv("DATABASE_URL")
         tz = pendulum.timezone('America/Tijuana')
         
         # ✅ MEJORA 3: Permitir inyectar tiempo para tests
         if ahora is None:
             ahora = pendulum.now(tz)
         
-        with psycopg.connect(DATABASE_URL) as conn:
+        with get_connection() as conn:
             with conn.cursor() as cur:
                 # Stats del día
                 query_stats = """
@@ -411,9 +411,7 @@ def obtener_info_doctor(doctor_id: int) -> Dict[str, str]:
         Dict con nombre_completo y especialidad
     """
     try:
-        DATABASE_URL = os.getenv("DATABASE_URL")
-        
-        with psycopg.connect(DATABASE_URL) as conn:
+        with get_connection() as conn:
             with conn.cursor() as cur:
                 query = """
                     SELECT nombre_completo, especialidad
@@ -470,17 +468,12 @@ def obtener_ultimo_mensaje(state: Dict[str, Any]) -> str:
 
 # ==================== NODO PRINCIPAL ====================
 
-def nodo_maya_detective_doctor(state: WhatsAppAgentState) -> Command:
+def _preparar_maya_doctor(state: WhatsAppAgentState) -> Tuple[Optional[Command], Optional[list]]:
     """
-    Nodo 2B: Maya Detective de Intención para Doctores.
-    
-    Similar a Maya Paciente pero con capacidades para responder
-    stats del día sin activar herramientas complejas.
+    Parte previa a la llamada LLM (compartida por la versión sync y async).
     
-    MEJORAS APLICADAS:
-    ✅ Validación pre-vuelo de doctor_id
-    ✅ Manejo robusto de errores
-    ✅ Logging detallado
+    Returns:
+        (command, prompt_messages): si command no es None, el nodo termina sin LLM.
     """
     logger.info("\n" + "=" * 70)
     logger.info("👨‍⚕️ NODO 2B: MAYA - DETECTIVE DOCTOR")
@@ -498,7 +491,7 @@ def nodo_maya_detective_doctor(state: WhatsAppAgentState) -> Command:
                 'error_maya': 'doctor_id_missing'
             },
             goto="filtrado_inteligente"
-        )
+        ), None
     
     # Validar que sea un ID válido (entero > 0)
     try:
@@ -510,7 +503,7 @@ def nodo_maya_detective_doctor(state: WhatsAppAgentState) -> Command:
         return Command(
             update={'requiere_clasificacion_llm': True},
             goto="filtrado_inteligente"
-        )
+        ), None
     
     # Extraer mensaje
     mensaje_usuario = obtener_ultimo_mensaje(state)
@@ -518,7 +511,7 @@ def nodo_maya_detective_doctor(state: WhatsAppAgentState) -> Command:
     
     if not mensaje_usuario:
         logger.warning("⚠️  Sin mensaje del usuario")
-        return Command(goto="generacion_resumen")
+        return Command(goto="generacion_resumen"), None
     
     logger.info(f"📝 Mensaje: {mensaje_usuario[:100]}...")
     logger.info(f"📊 Estado conversación: {estado_conversacion}")
@@ -544,68 +537,119 @@ def nodo_maya_detective_doctor(state: WhatsAppAgentState) -> Command:
         estado_conversacion=estado_conversacion
     )
     
+    return None, [
+        SystemMessage(content=prompt_completo),
+        HumanMessage(content=mensaje_usuario)
+    ]
+
+
+def _resolver_maya_doctor(resultado: MayaResponseDoctor) -> Command:
+    """Mapea la acción de Maya a update + goto (compartido sync/async)."""
+    logger.info(f"✅ Acción decidida: {resultado.accion}")
+    logger.info(f"📋 Razón: {resultado.razon}")
+    
+    # Mapear acciones a nodos destino
+    destinos = {
+        "responder_directo": "generacion_resumen",
+        "escalar_procedimental": "recuperacion_medica",
+        "dejar_pasar": "seleccion_herramientas"
+    }
+    
+    goto = destinos.get(resultado.accion, "generacion_resumen")
+    
+    # Preparar updates según acción
+    updates = {}
+    
+    if resultado.accion == "responder_directo":
+        logger.info(f"💬 Respuesta directa: {resultado.respuesta}")
+        updates = {
+            "messages": [AIMessage(content=resultado.respuesta)],
+            "clasificacion_mensaje": "chat",
+            "requiere_clasificacion_llm": False
+        }
+    
+    elif resultado.accion == "escalar_procedimental":
+        logger.info(f"⬆️  Escalando a recuperación médica")
+        updates = {
+            "clasificacion_mensaje": "medica",
+            "requiere_clasificacion_llm": False
+        }
+    
+    elif resultado.accion == "dejar_pasar":
+        logger.info(f"➡️  Dejando pasar mensaje (flujo activo)")
+        updates = {
+            "requiere_clasificacion_llm": False
+        }
+    
+    # Retornar Command con update y goto
+    return Command(
+        update=updates,
+        goto=goto
+    )
+
+
+def _command_error_maya_doctor(e: Exception) -> Command:
+    """Fallback si Maya Doctor falla: pedir que reformule."""
+    logger.error(f"❌ Error en Maya Detective Doctor: {e}")
+    logger.exception("Stack trace completo:")
+    return Command(
+        update={
+            "messages": [AIMessage(content="Disculpa, ¿puedes repetir eso de otra forma?")],
+            "clasificacion_mensaje": "chat",
+            "error_maya": str(e)
+        },
+        goto="generacion_resumen"
+    )
+
+
+def nodo_maya_detective_doctor(state: WhatsAppAgentState) -> Command:
+    """
+    Nodo 2B: Maya Detective de Intención para Doctores.
+    
+    Similar a Maya Paciente pero con capacidades para responder
+    stats del día sin activar herramientas complejas.
+    
+    MEJORAS APLICADAS:
+    ✅ Validación pre-vuelo de doctor_id
+    ✅ Manejo robusto de errores
+    ✅ Logging detallado
+    """
+    command, prompt_messages = _preparar_maya_doctor(state)
+    if command is not None:
+        return command
+    
     # Llamar LLM con structured output
     try:
         logger.info("🤖 Llamando a Maya Doctor (DeepSeek → Claude fallback)...")
         
-        resultado: MayaResponseDoctor = structured_llm_doctor.invoke([
-            SystemMessage(content=prompt_completo),
-            HumanMessage(content=mensaje_usuario)
-        ])
-        
-        logger.info(f"✅ Acción decidida: {resultado.accion}")
-        logger.info(f"📋 Razón: {resultado.razon}")
-        
-        # Mapear acciones a nodos destino
-        destinos = {
-            "responder_directo": "generacion_resumen",
-            "escalar_procedimental": "recuperacion_medica",
-            "dejar_pasar": "seleccion_herramientas"
-        }
-        
-        goto = destinos.get(resultado.accion, "generacion_resumen")
+        resultado: MayaResponseDoctor = structured_llm_doctor.invoke(prompt_messages)
         
-        # Preparar updates según acción
-        updates = {}
+        return _resolver_maya_doctor(resultado)
         
-        if resultado.accion == "responder_directo":
-            logger.info(f"💬 Respuesta directa: {resultado.respuesta}")
-            updates = {
-                "messages": [AIMessage(content=resultado.respuesta)],
-                "clasificacion_mensaje": "chat",
-                "requiere_clasificacion_llm": False
-            }
-        
-        elif resultado.accion == "escalar_procedimental":
-            logger.info(f"⬆️  Escalando a recuperación médica")
-            updates = {
-                "clasificacion_mensaje": "medica",
-                "requiere_clasificacion_llm": False
-            }
+    except Exception as e:
+        return _command_error_maya_doctor(e)
+
+
+async def anodo_maya_detective_doctor(state: WhatsAppAgentState) -> Command:
+    """
+    Versión async de Maya Detective para doctores.
+    
+    Las consultas de info/resumen del doctor (BD sync) corren en un thread
+    y el LLM se invoca con ainvoke, sin bloquear el event loop.
+    """
+    command, prompt_messages = await asyncio.to_thread(_preparar_maya_doctor, state)
+    if command is not None:
+        return command
+    
+    try:
+        logger.info("🤖 Llamando a Maya Doctor (DeepSeek → Claude fallback, async)...")
         
-        elif resultado.accion == "dejar_pasar":
-            logger.info(f"➡️  Dejando pasar mensaje (flujo activo)")
-            updates = {
-                "requiere_clasificacion_llm": False
-            }
+        resultado: MayaResponseDoctor = await structured_llm_doctor.ainvoke(prompt_messages)
         
-        # Retornar Command con update y goto
-        return Command(
-            update=updates,
-            goto=goto
-        )
+        return _resolver_maya_doctor(resultado)
         
     except Exception as e:
-        logger.error(f"❌ Error en Maya Detective Doctor: {e}")
-        logger.exception("Stack trace completo:")
-        return Command(
-            update={
-                "messages": [AIMessage(content="Disculpa, ¿puedes repetir eso de otra forma?")],
-                "clasificacion_mensaje": "chat",
-                "error_maya": str(e)
-            },
-            goto="generacion_resumen"
-        )
+        return _command_error_maya_doctor(e)
 
 
 # ==================== WRAPPER ====================
@@ -613,3 +657,8 @@ def nodo_maya_detective_doctor(state: WhatsAppAgentState) -> Command:
 def nodo_maya_detective_doctor_wrapper(state: WhatsAppAgentState) -> Command:
     """Wrapper para LangGraph - retorna Command directamente."""
     return nodo_maya_detective_doctor(state)
+
+
+async def anodo_maya_detective_doctor_wrapper(state: WhatsAppAgentState) -> Command:
+    """Wrapper async para LangGraph (usado por grafo.ainvoke)."""
+    return await anodo_maya_detective_doctor(state)
@@ -15,9 +15,10 @@ Información clínica hardcoded:
 - Horario: L-V 8:30-18:30, S-D 10:30-17:30, cerrado Ma-Mi
 """
 
+import asyncio
 import logging
 import os
-from typing import Dict, Any, Literal
+from typing import Dict, Any, Literal, Optional, Tuple
 from datetime import datetime
 from pydantic import BaseModel, Field
 from langchain_openai import ChatOpenAI
@@ -283,20 +284,13 @@ Analiza el mensaje y decide qué acción tomar. Responde con el JSON estructurad
 
 # ==================== NODO PRINCIPAL ====================
 
-def nodo_maya_detective_paciente(state: WhatsAppAgentState) -> Command:
+def _preparar_maya_paciente(state: WhatsAppAgentState) -> Tuple[Optional[Command], Optional[tuple]]:
     """
-    Nodo principal de Maya Detective de Intención.
-    
-    Analiza el mensaje del paciente y decide si:
-    1. Responder directamente (consultas básicas) → generacion_resumen
-    2. Escalar al flujo procedimental completo → recepcionista
-    3. Dejar pasar (flujo ya activo) → recepcionista
+    Parte previa a la llamada LLM (compartida por la versión sync y async).
     
-    Args:
-        state: Estado actual del agente
-        
     Returns:
-        Command con update y goto para routing en un solo paso
+        (command, args_prompt): si command no es None, el nodo termina sin LLM;
+        si no, args_prompt son los argumentos para construir_prompt_maya().
     """
     logger.info("🔍 === MAYA DETECTIVE DE INTENCIÓN ===")
     
@@ -314,7 +308,7 @@ def nodo_maya_detective_paciente(state: WhatsAppAgentState) -> Command:
                 "mensaje_final": "Error: No se recibió mensaje"
             },
             goto="generacion_resumen"
-        )
+        ), None
     
     ultimo_mensaje = messages[-1]
     mensaje_contenido = getattr(ultimo_mensaje, 'content', '')
@@ -333,11 +327,97 @@ def nodo_maya_detective_paciente(state: WhatsAppAgentState) -> Command:
         return Command(
             update={'requiere_clasificacion_llm': False},
             goto="recepcionista"
+        ), None
+    
+    return None, (mensaje_contenido, estado_conversacion, contexto_paciente)
+
+
+def _resolver_maya_paciente(maya_response: MayaResponse, tiempo_ms: int) -> Command:
+    """Decide el routing según la acción de Maya (compartido sync/async)."""
+    logger.info(f"⚡ Respuesta en {tiempo_ms}ms")
+    logger.info(f"📊 Acción: {maya_response.accion}")
+    logger.info(f"💭 Razón: {maya_response.razon}")
+    
+    # Decidir routing según acción
+    if maya_response.accion == "responder_directo":
+        # Maya responde directamente, NO activar flujo completo
+        logger.info(f"✅ Maya responde: {maya_response.respuesta[:80]}...")
+        
+        return Command(
+            update={
+                "clasificacion_mensaje": "maya_respuesta_directa",
+                "respuesta_maya": maya_response.respuesta,
+                "razon_maya": maya_response.razon,
+                "tiempo_maya_ms": tiempo_ms,
+                "mensaje_final": maya_response.respuesta
+            },
+            goto="generacion_resumen"  # Skip flujo completo
+        )
+        
+    elif maya_response.accion == "escalar_procedimental":
+        # Escalar al flujo completo de recepcionista
+        logger.info("🔄 Escalando a flujo procedimental (recepcionista)")
+        
+        return Command(
+            update={
+                "clasificacion_mensaje": "solicitud_cita_paciente",
+                "respuesta_maya": maya_response.respuesta,
+                "razon_maya": maya_response.razon,
+                "tiempo_maya_ms": tiempo_ms,
+                "ruta_siguiente": "recepcionista"
+            },
+            goto="recepcionista"
         )
+        
+    else:  # dejar_pasar
+        # Ya hay flujo activo, dejar que continúe
+        logger.info("⏭️ Dejando pasar (flujo ya activo)")
+        
+        return Command(
+            update={
+                "clasificacion_mensaje": "flujo_activo",
+                "razon_maya": maya_response.razon,
+                "tiempo_maya_ms": tiempo_ms
+            },
+            goto="recepcionista"
+        )
+
+
+def _command_error_maya(e: Exception) -> Command:
+    """Fallback: escalar al flujo completo si Maya falla."""
+    logger.error(f"❌ Error en Maya Detective: {e}")
+    
+    return Command(
+        update={
+            "clasificacion_mensaje": "error_maya",
+            "error_maya": str(e)
+        },
+        goto="recepcionista"
+    )
+
+
+def nodo_maya_detective_paciente(state: WhatsAppAgentState) -> Command:
+    """
+    Nodo principal de Maya Detective de Intención.
+    
+    Analiza el mensaje del paciente y decide si:
+    1. Responder directamente (consultas básicas) → generacion_resumen
+    2. Escalar al flujo procedimental completo → recepcionista
+    3. Dejar pasar (flujo ya activo) → recepcionista
+    
+    Args:
+        state: Estado actual del agente
+        
+    Returns:
+        Command con update y goto para routing en un solo paso
+    """
+    command, args_prompt = _preparar_maya_paciente(state)
+    if command is not None:
+        return command
     
     try:
         # Construir prompt para Maya
-        prompt = construir_prompt_maya(mensaje_contenido, estado_conversacion, contexto_paciente)
+        prompt = construir_prompt_maya(*args_prompt)
         
         # Invocar LLM con structured output
         logger.info("🤖 Invocando Maya (DeepSeek/Claude)...")
@@ -346,65 +426,36 @@ def nodo_maya_detective_paciente(state: WhatsAppAgentState) -> Command:
         maya_response: MayaResponse = llm_structured.invoke(prompt)
         
         tiempo_ms = int((datetime.now() - inicio).total_seconds() * 1000)
-        logger.info(f"⚡ Respuesta en {tiempo_ms}ms")
-        logger.info(f"📊 Acción: {maya_response.accion}")
-        logger.info(f"💭 Razón: {maya_response.razon}")
-        
-        # Decidir routing según acción
-        if maya_response.accion == "responder_directo":
-            # Maya responde directamente, NO activar flujo completo
-            logger.info(f"✅ Maya responde: {maya_response.respuesta[:80]}...")
-            
-            return Command(
-                update={
-                    "clasificacion_mensaje": "maya_respuesta_directa",
-                    "respuesta_maya": maya_response.respuesta,
-                    "razon_maya": maya_response.razon,
-                    "tiempo_maya_ms": tiempo_ms,
-                    "mensaje_final": maya_response.respuesta
-                },
-                goto="generacion_resumen"  # Skip flujo completo
-            )
-            
-        elif maya_response.accion == "escalar_procedimental":
-            # Escalar al flujo completo de recepcionista
-            logger.info("🔄 Escalando a flujo procedimental (recepcionista)")
-            
-            return Command(
-                update={
-                    "clasificacion_mensaje": "solicitud_cita_paciente",
-                    "respuesta_maya": maya_response.respuesta,
-                    "razon_maya": maya_response.razon,
-                    "tiempo_maya_ms": tiempo_ms,
-                    "ruta_siguiente": "recepcionista"
-                },
-                goto="recepcionista"
-            )
-            
-        else:  # dejar_pasar
-            # Ya hay flujo activo, dejar que continúe
-            logger.info("⏭️ Dejando pasar (flujo ya activo)")
-            
-            return Command(
-                update={
-                    "clasificacion_mensaje": "flujo_activo",
-                    "razon_maya": maya_response.razon,
-                    "tiempo_maya_ms": tiempo_ms
-                },
-                goto="recepcionista"
-            )
+        return _resolver_maya_paciente(maya_response, tiempo_ms)
     
     except Exception as e:
-        logger.error(f"❌ Error en Maya Detective: {e}")
+        return _command_error_maya(e)
+
+
+async def anodo_maya_detective_paciente(state: WhatsAppAgentState) -> Command:
+    """
+    Versión async de Maya Detective para pacientes.
+    
+    La consulta del contexto del paciente (BD sync) corre en un thread y el
+    LLM se invoca con ainvoke, sin bloquear el event loop.
+    """
+    command, args_prompt = await asyncio.to_thread(_preparar_maya_paciente, state)
+    if command is not None:
+        return command
+    
+    try:
+        prompt = construir_prompt_maya(*args_prompt)
         
-        # Fallback: escalar al flujo completo
-        return Command(
-            update={
-                "clasificacion_mensaje": "error_maya",
-                "error_maya": str(e)
-            },
-            goto="recepcionista"
-        )
+        logger.info("🤖 Invocando Maya (DeepSeek/Claude, async)...")
+        inicio = datetime.now()
+        
+        maya_response: MayaResponse = await llm_structured.ainvoke(prompt)
+        
+        tiempo_ms = int((datetime.now() - inicio).total_seconds() * 1000)
+        return _resolver_maya_paciente(maya_response, tiempo_ms)
+    
+    except Exception as e:
+        return _command_error_maya(e)
 
 
 # ==================== WRAPPER PARA GRAFO ====================
@@ -413,4 +464,9 @@ def nodo_maya_detective_paciente_wrapper(state: WhatsAppAgentState) -> Command:
     """
     Wrapper para integración con el grafo.
     """
-    return nodo_maya_detective_paciente(state)
\ No newline at end of file
+    return nodo_maya_detective_paciente(state)
+
+
+async def anodo_maya_detective_paciente_wrapper(state: WhatsAppAgentState) -> Command:
+    """Wrapper async para LangGraph (usado por grafo.ainvoke)."""
+    return await anodo_maya_detective_paciente(state)
@@ -32,6 +32,7 @@ from src.utils.logging_config import setup_colored_logging, log_separator, log_n
 from src.utils.time_utils import get_time_context
 from src.medical.crud import get_paciente_by_phone, registrar_paciente_externo
 from src.medical.slots import generar_slots_con_turnos
+from src.medical.reservas_slot import confirmar_slot, get_reservas_slot, reservar_slot
 
 load_dotenv()
 logger = setup_colored_logging()
@@ -365,7 +366,8 @@ def nodo_recepcionista(state: WhatsAppAgentState) -> Command:
         if fecha:
             # Generar slots disponibles
             try:
-                slots = generar_slots_con_turnos(dias_adelante=7)
+                # Sin los horarios que otro paciente tiene apartados
+                slots = generar_slots_con_turnos(dias_adelante=7, titular=user_id)
                 
                 # Filtrar slots para la fecha solicitada si es posible
                 # (simplificación: mostrar primeros 5 slots)
@@ -408,6 +410,15 @@ def nodo_recepcionista(state: WhatsAppAgentState) -> Command:
             
             if 0 <= opcion < len(datos_temp.get('slots_disponibles', [])):
                 slot_seleccionado = datos_temp['slots_disponibles'][opcion]
+                
+                # Apartar el horario mientras el paciente confirma
+                if not reservar_slot(slot_seleccionado, user_id):
+                    respuesta = "Ese horario lo acaba de apartar otro paciente. ¿Podrías elegir otra opción?"
+                    return Command(
+                        update={'messages': [AIMessage(content=respuesta)]},
+                        goto="END"
+                    )
+                
                 datos_temp['slot_final'] = slot_seleccionado
                 
                 # Obtener nombre del doctor desde el slot
@@ -445,10 +456,6 @@ def nodo_recepcionista(state: WhatsAppAgentState) -> Command:
         mensaje_lower = mensaje_usuario.lower()
         
         if any(word in mensaje_lower for word in ['sí', 'si', 'confirmo', 'ok', 'vale', 'correcto', 'yes']):
-            # Agendar la cita
-            from src.medical.crud import agendar_cita_simple
-            from datetime import datetime as dt
-            
             slot = datos_temp['slot_final']
             paciente = get_paciente_by_phone(user_id)
             
@@ -464,18 +471,12 @@ def nodo_recepcionista(state: WhatsAppAgentState) -> Command:
                 )
             
             try:
-                # Parsear fecha y hora del slot
-                fecha_inicio_str = f"{slot['fecha']} {slot['hora_inicio']}"
-                fecha_fin_str = f"{slot['fecha']} {slot['hora_fin']}"
-                fecha_inicio = dt.strptime(fecha_inicio_str, "%Y-%m-%d %H:%M")
-                fecha_fin = dt.strptime(fecha_fin_str, "%Y-%m-%d %H:%M")
-                
-                # Agendar la cita
-                cita_id = agendar_cita_simple(
-                    doctor_id=slot.get('doctor_asignado_id'),
+                # Agendar la cita (verifica conflictos bajo advisory lock y
+                # libera la reserva)
+                cita_id = confirmar_slot(
+                    slot,
+                    titular=user_id,
                     paciente_id=paciente['id'],
-                    fecha_inicio=fecha_inicio,
-                    fecha_fin=fecha_fin,
                     motivo="Cita agendada via WhatsApp"
                 )
                 
@@ -515,6 +516,7 @@ Te enviaré un recordatorio 24 horas antes. ¡Hasta pronto!"""
                     goto="END"
                 )
         else:
+            get_reservas_slot().liberar(user_id)
             respuesta = "Entendido, cancelé el proceso. ¿Quieres intentar con otra fecha?"
             
             return Command(
@@ -7,7 +7,7 @@ más natural en lugar de opciones rígidas A/B/C.
 
 from typing import Dict, Any, List, Optional
 from langchain_core.messages import AIMessage
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, time
 import re
 
 # Imports internos
@@ -19,7 +19,9 @@ from src.medical.crud import (
     get_doctor_by_id
 )
 from src.utils.nlp_extractors import extraer_nombre_con_llm
-from src.medical.slots import generar_slots_con_turnos
+from src.utils.matcher_palabras import MatcherPalabras
+from src.medical.slots import buscar_slots
+from src.medical.reservas_slot import get_reservas_slot, reservar_slot
 
 logger = setup_colored_logging()
 
@@ -29,6 +31,19 @@ MESES = [
     'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
     'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'
 ]
+MAX_SLOTS_SUGERIDOS = 3
+DIAS_BUSQUEDA_DEFAULT = 14  # Si la fecha pedida no trae día concreto
+
+# Fecha y franja horaria en una sola pasada por mensaje (sin acentos: "sabado", "manana")
+_MATCHER_FECHA_HORA = MatcherPalabras({
+    'pasado_manana': ['pasado mañana'],
+    'manana': ['mañana'],
+    **{dia: [dia] for dia in DIAS_SEMANA},
+    'franja_manana': ['mañana', 'temprano', 'matutino', '8', '9', '10', '11'],
+    'franja_tarde': ['tarde', 'después', 'vespertino', '12', '13', '14', '15', '16', '17', '2', '3', '4', '5'],
+    'franja_noche': ['noche', 'nocturno', '18', '19', '20', '6pm', '7pm', '8pm'],
+})
+_PATRON_HORA = re.compile(r'(\d{1,2})(?::\d{2})?\s*(?:am|pm|hrs?)?')
 
 def recepcionista_optimizado_node(state: WhatsAppAgentState) -> Dict[str, Any]:
     """
@@ -181,8 +196,7 @@ def _manejar_inicial_slot_filling(
     
     # 2. Extraer información de slot del mensaje actual
     logger.debug("🔍 Extrayendo información de slots del mensaje...")
-    fecha_extraida = _extraer_fecha_del_mensaje(mensaje)
-    hora_extraida = _extraer_hora_del_mensaje(mensaje)
+    fecha_extraida, hora_extraida = _extraer_fecha_y_hora(mensaje)
     
     logger.debug(f"📅 Fecha extraída: {fecha_extraida}")
     logger.debug(f"⏰ Hora extraída: {hora_extraida}")
@@ -215,16 +229,16 @@ def _manejar_inicial_slot_filling(
     else:
         # Tenemos ambos datos, buscar slots y confirmar
         logger.debug("✅ Tenemos fecha y hora - buscando slots")
-        slots = _buscar_slots_por_preferencias(fecha_deseada, hora_deseada)
+        slots = _buscar_slots_por_preferencias(fecha_deseada, hora_deseada, titular=paciente_phone)
+        mejor_slot = _apartar_primer_slot(slots, paciente_phone)
         
-        if not slots:
+        if not mejor_slot:
             logger.debug(f"❌ No hay slots disponibles para {fecha_deseada} {hora_deseada}")
             respuesta = f"Lo siento {nombre_paciente}. No tenemos disponibilidad para {fecha_deseada} {hora_deseada}. ¿Te funcionaría otro día u horario?"
             updates = {'fecha_deseada': None, 'hora_deseada': None}
             return respuesta, 'recolectando_slots', [], updates
         
         # Presentar confirmación natural (no menú A/B/C)
-        mejor_slot = slots[0]  # Tomar el mejor match
         logger.debug(f"✅ Slot encontrado: {mejor_slot}")
         respuesta = f"Perfecto {nombre_paciente}! Encontré disponibilidad para: {_formatear_slot_natural(mejor_slot)} ¿Te confirmo esta cita?"
         
@@ -248,8 +262,7 @@ def _manejar_recoleccion_slots(
     logger.info("📝 Recolectando información de slot")
     
     # Extraer nueva información del mensaje
-    fecha_extraida = _extraer_fecha_del_mensaje(mensaje)
-    hora_extraida = _extraer_hora_del_mensaje(mensaje)
+    fecha_extraida, hora_extraida = _extraer_fecha_y_hora(mensaje)
     
     # Actualizar con nueva información
     if fecha_extraida:
@@ -273,14 +286,14 @@ def _manejar_recoleccion_slots(
     
     else:
         # Ya tenemos todo, buscar y confirmar
-        slots = _buscar_slots_por_preferencias(fecha_deseada, hora_deseada)
+        slots = _buscar_slots_por_preferencias(fecha_deseada, hora_deseada, titular=paciente_phone)
+        mejor_slot = _apartar_primer_slot(slots, paciente_phone)
         
-        if not slots:
+        if not mejor_slot:
             respuesta = f"Lo siento {nombre_paciente}. No hay disponibilidad para {fecha_deseada} {hora_deseada}. ¿Podrías intentar con otro día u horario?"
             updates = {'fecha_deseada': None, 'hora_deseada': None}
             return respuesta, 'recolectando_slots', [], updates
         
-        mejor_slot = slots[0]
         respuesta = f"Excelente {nombre_paciente}! Tengo disponibilidad para: {_formatear_slot_natural(mejor_slot)} ¿Confirmo esta cita?"
         
         updates = {
@@ -322,6 +335,7 @@ def _manejar_confirmacion_final(
     
     if es_negacion:
         logger.debug("❌ Usuario rechazó la cita")
+        get_reservas_slot().liberar(paciente_phone)
         respuesta = "No hay problema. ¿Prefieres otro día u horario? Dime cuándo te funcionaría mejor."
         updates = {
             'fecha_deseada': None,
@@ -375,29 +389,32 @@ def _manejar_solicitar_nombre_optimizado(
 
 # ==================== FUNCIONES AUXILIARES ====================
 
-def _extraer_fecha_del_mensaje(mensaje: str) -> Optional[str]:
+def _extraer_fecha_del_mensaje(mensaje: str, categorias: Optional[frozenset] = None) -> Optional[str]:
     """
     Extrae información de fecha del mensaje usando patrones simples.
+    
+    categorias: resultado de _MATCHER_FECHA_HORA si ya se calculó para el mensaje.
     """
-    mensaje_lower = mensaje.lower()
-    logger.debug(f"🔍 Extrayendo fecha del mensaje: '{mensaje_lower}'")
+    logger.debug(f"🔍 Extrayendo fecha del mensaje: '{mensaje.lower()}'")
+    if categorias is None:
+        categorias = _MATCHER_FECHA_HORA.categorias(mensaje)
     
-    # Patrones básicos
-    if 'mañana' in mensaje_lower:
-        fecha = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-        resultado = f"mañana ({fecha})"
+    # Patrones básicos ("pasado mañana" también contiene "mañana")
+    if 'pasado_manana' in categorias:
+        fecha = (datetime.now() + timedelta(days=2)).strftime('%Y-%m-%d')
+        resultado = f"pasado mañana ({fecha})"
         logger.debug(f"📅 Fecha extraída: {resultado}")
         return resultado
     
-    elif 'pasado mañana' in mensaje_lower:
-        fecha = (datetime.now() + timedelta(days=2)).strftime('%Y-%m-%d')
-        resultado = f"pasado mañana ({fecha})"
+    elif 'manana' in categorias:
+        fecha = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        resultado = f"mañana ({fecha})"
         logger.debug(f"📅 Fecha extraída: {resultado}")
         return resultado
     
     # Días de la semana
     for i, dia in enumerate(DIAS_SEMANA):
-        if dia in mensaje_lower:
+        if dia in categorias:
             # Calcular próximo día de la semana
             hoy = datetime.now().weekday()
             dias_hasta = (i - hoy) % 7
@@ -412,32 +429,35 @@ def _extraer_fecha_del_mensaje(mensaje: str) -> Optional[str]:
     return None
 
 
-def _extraer_hora_del_mensaje(mensaje: str) -> Optional[str]:
+def _extraer_hora_del_mensaje(mensaje: str, categorias: Optional[frozenset] = None) -> Optional[str]:
     """
     Extrae información de hora del mensaje.
+    
+    categorias: resultado de _MATCHER_FECHA_HORA si ya se calculó para el mensaje.
     """
     mensaje_lower = mensaje.lower()
     logger.debug(f"🕐 Extrayendo hora del mensaje: '{mensaje_lower}'")
+    if categorias is None:
+        categorias = _MATCHER_FECHA_HORA.categorias(mensaje)
     
     # Patrones de hora - MEJORADOS para mejor detección
-    if any(palabra in mensaje_lower for palabra in ['mañana', 'temprano', 'matutino', '8', '9', '10', '11']):
+    if 'franja_manana' in categorias:
         resultado = "en la mañana"
         logger.debug(f"⏰ Hora extraída: {resultado}")
         return resultado
         
-    elif any(palabra in mensaje_lower for palabra in ['tarde', 'después', 'vespertino', '12', '13', '14', '15', '16', '17', '2', '3', '4', '5']):
+    elif 'franja_tarde' in categorias:
         resultado = "por la tarde"
         logger.debug(f"⏰ Hora extraída: {resultado}")
         return resultado
         
-    elif any(palabra in mensaje_lower for palabra in ['noche', 'nocturno', '18', '19', '20', '6pm', '7pm', '8pm']):
+    elif 'franja_noche' in categorias:
         resultado = "en la noche"
         logger.debug(f"⏰ Hora extraída: {resultado}")
         return resultado
     
     # Horas específicas (básico)
-    import re
-    patron_hora = re.search(r'(\d{1,2})(?::\d{2})?\s*(?:am|pm|hrs?)?', mensaje_lower)
+    patron_hora = _PATRON_HORA.search(mensaje_lower)
     if patron_hora:
         resultado = f"a las {patron_hora.group(0)}"
         logger.debug(f"⏰ Hora extraída: {resultado}")
@@ -447,35 +467,97 @@ def _extraer_hora_del_mensaje(mensaje: str) -> Optional[str]:
     return None
 
 
-def _buscar_slots_por_preferencias(fecha_deseada: str, hora_deseada: str) -> List[Dict]:
+def _extraer_fecha_y_hora(mensaje: str) -> tuple[Optional[str], Optional[str]]:
+    """(fecha, hora) del mensaje con una sola pasada del matcher."""
+    categorias = _MATCHER_FECHA_HORA.categorias(mensaje)
+    return _extraer_fecha_del_mensaje(mensaje, categorias), _extraer_hora_del_mensaje(mensaje, categorias)
+
+
+def _rango_fechas_deseado(fecha_deseada: str) -> tuple[date, date]:
+    """
+    Rango de días a buscar según la fecha pedida.
+    
+    Los extractores guardan la fecha como "viernes (2026-02-06)": si trae
+    fecha ISO se busca solo ese día; si no, los próximos DIAS_BUSQUEDA_DEFAULT.
+    """
+    match = re.search(r'\d{4}-\d{2}-\d{2}', fecha_deseada or '')
+    if match:
+        try:
+            dia = date.fromisoformat(match.group(0))
+            return dia, dia
+        except ValueError:
+            pass
+    
+    hoy = date.today()
+    return hoy, hoy + timedelta(days=DIAS_BUSQUEDA_DEFAULT)
+
+
+def _franja_horaria_deseada(hora_deseada: str) -> tuple[Optional[time], Optional[time]]:
+    """
+    Franja (hora_desde, hora_hasta) de inicio del slot según la hora pedida.
+    
+    "a las 10" → slots que empiezan entre 10:00 y 11:00 ("a las 4" sin
+    am/pm se toma como 16:00, la clínica abre 8:30); sin franja
+    reconocible → todo el día.
+    """
+    hora_lower = (hora_deseada or '').lower()
+    
+    if 'mañana' in hora_lower:
+        return None, time(12, 0)
+    elif 'tarde' in hora_lower:
+        return time(12, 0), time(18, 0)
+    elif 'noche' in hora_lower:
+        return time(18, 0), None
+    
+    match = re.search(r'(\d{1,2})(?::\d{2})?\s*(am|pm)?', hora_lower)
+    if match:
+        hora = int(match.group(1))
+        if hora < 12 and (match.group(2) == 'pm' or (match.group(2) is None and hora < 8)):
+            hora += 12
+        if 0 <= hora < 23:
+            return time(hora, 0), time(hora + 1, 0)
+    
+    return None, None
+
+
+def _buscar_slots_por_preferencias(
+    fecha_deseada: str,
+    hora_deseada: str,
+    titular: Optional[str] = None
+) -> List[Dict]:
     """
     Busca slots disponibles según las preferencias del usuario.
+    
+    Solo consulta los días pedidos y la franja horaria, y se detiene al
+    juntar MAX_SLOTS_SUGERIDOS (una consulta acotada en lugar de 14 días).
+    Omite los horarios que otro paciente tiene apartados.
     """
     logger.info(f"🔍 Buscando slots para: {fecha_deseada} {hora_deseada}")
     
-    # Por ahora, usar generador existente y filtrar
-    slots = generar_slots_con_turnos(dias_adelante=14)
-    
-    if not slots:
-        return []
+    fecha_desde, fecha_hasta = _rango_fechas_deseado(fecha_deseada)
+    hora_desde, hora_hasta = _franja_horaria_deseada(hora_deseada)
+    
+    return buscar_slots(
+        fecha_desde,
+        fecha_hasta,
+        hora_desde=hora_desde,
+        hora_hasta=hora_hasta,
+        limite=MAX_SLOTS_SUGERIDOS,
+        titular=titular
+    )
+
+
+def _apartar_primer_slot(slots: List[Dict], paciente_phone: str) -> Optional[Dict]:
+    """
+    Aparta para el paciente el primer slot que siga libre.
     
-    # Filtrado básico por hora preferida
-    slots_filtrados = []
+    Otro paciente pudo apartarlo entre la búsqueda y este momento; en ese
+    caso se ofrece el siguiente.
+    """
     for slot in slots:
-        hora_slot = slot.get('hora_inicio', '')
-        
-        if 'mañana' in hora_deseada.lower() and hora_slot < '12:00':
-            slots_filtrados.append(slot)
-        elif 'tarde' in hora_deseada.lower() and '12:00' <= hora_slot < '18:00':
-            slots_filtrados.append(slot)
-        elif 'noche' in hora_deseada.lower() and hora_slot >= '18:00':
-            slots_filtrados.append(slot)
-        else:
-            # Si no hay filtro específico, incluir todos
-            slots_filtrados.append(slot)
-    
-    # Retornar máximo 3 mejores opciones
-    return slots_filtrados[:3] if slots_filtrados else slots[:3]
+        if reservar_slot(slot, paciente_phone):
+            return slot
+    return None
 
 
 def _formatear_slot_natural(slot: Dict) -> str:
@@ -17,7 +17,7 @@ from typing import Dict, Any, List
 from datetime import datetime, timedelta
 import psycopg
 from psycopg.rows import dict_row
-import os
+from src.medical.connection_pool import get_connection
 from dotenv import load_dotenv
 from langgraph.types import Command
 from src.utils.logging_config import (
@@ -29,7 +29,6 @@ from src.utils import get_current_time
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
 # ==================== CONSTANTES ====================
 
@@ -101,7 +100,7 @@ def nodo_recordatorios(state: Dict[str, Any]) -> Command:
         citas_24h = []
         citas_2h = []
         
-        with psycopg.connect(DATABASE_URL) as conn:
+        with get_connection() as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 # Citas para recordatorio 24h
                 cur.execute("""
@@ -195,7 +194,7 @@ def nodo_recordatorios(state: Dict[str, Any]) -> Command:
         
         # 3. Actualizar flags en batch (una sola conexión)
         if ids_exitosos_24h or ids_exitosos_2h:
-            with psycopg.connect(DATABASE_URL) as conn:
+            with get_connection() as conn:
                 with conn.cursor() as cur:
                     # Actualizar recordatorios 24h en batch
                     if ids_exitosos_24h:
@@ -18,11 +18,12 @@ Casos de uso:
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import AIMessage
 from src.utils.time_utils import get_current_time
+from src.utils.matcher_palabras import MatcherPalabras
 import os
 from dotenv import load_dotenv
 
@@ -167,25 +168,27 @@ Tu respuesta:"""
 
 # ==================== HELPER FUNCTIONS ====================
 
+_MATCHER_CORTESIA = MatcherPalabras({
+    'saludo': [
+        'hola', 'buenos días', 'buenas tardes', 'buenas noches',
+        'buen día', 'hey', 'hi', 'hello', 'qué tal',
+        'cómo estás', 'saludos'
+    ],
+    'despedida': [
+        'adiós', 'bye', 'chao', 'hasta luego',
+        'nos vemos', 'gracias', 'muchas gracias', 'hasta pronto'
+    ],
+})
+
+
 def es_saludo(mensaje: str) -> bool:
     """Detecta si el mensaje es un saludo."""
-    saludos = [
-        'hola', 'buenos días', 'buenas tardes', 'buenas noches',
-        'buen día', 'hey', 'hi', 'hello', 'qué tal', 'que tal',
-        'cómo estás', 'como estas', 'saludos'
-    ]
-    mensaje_lower = mensaje.lower().strip()
-    return any(saludo in mensaje_lower for saludo in saludos)
+    return 'saludo' in _MATCHER_CORTESIA.categorias(mensaje)
 
 
 def es_despedida(mensaje: str) -> bool:
     """Detecta si el mensaje es una despedida."""
-    despedidas = [
-        'adiós', 'adios', 'bye', 'chao', 'hasta luego',
-        'nos vemos', 'gracias', 'muchas gracias', 'hasta pronto'
-    ]
-    mensaje_lower = mensaje.lower().strip()
-    return any(despedida in mensaje_lower for despedida in despedidas)
+    return 'despedida' in _MATCHER_CORTESIA.categorias(mensaje)
 
 
 def obtener_mensaje_usuario(state: Dict[str, Any]) -> str:
@@ -205,6 +208,45 @@ def obtener_mensaje_usuario(state: Dict[str, Any]) -> str:
 
 # ==================== MAIN NODE ====================
 
+def _preparar_respuesta(state: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Parte previa a la llamada LLM (compartida por la versión sync y async).
+    
+    Returns:
+        (respuesta, prompt): si respuesta no es None, no hace falta LLM;
+        en caso contrario, prompt es el texto a enviar al LLM.
+    """
+    logger.info("💬 [RESPUESTA_CONVERSACIONAL] Procesando mensaje casual")
+    
+    clasificacion = state.get('clasificacion_mensaje', 'chat')
+    mensaje = obtener_mensaje_usuario(state)
+    tipo_usuario = state.get('tipo_usuario', 'paciente')
+    nombre_usuario = state.get('nombre_usuario', 'Usuario')
+    
+    if not mensaje:
+        logger.warning("    ⚠️  No se encontró mensaje del usuario")
+        return "¡Hola! Soy el asistente de la clínica. ¿En qué puedo ayudarte hoy? 🏥", None
+    
+    logger.info(f"    📨 Mensaje: '{mensaje[:50]}...'")
+    logger.info(f"    🏷️  Clasificación: {clasificacion}")
+    logger.info(f"    👤 Tipo usuario: {tipo_usuario}")
+    
+    # Obtener hora actual
+    hora_actual = get_current_time().format('dddd, DD [de] MMMM [de] YYYY [a las] HH:mm', locale='es')
+    
+    # Seleccionar prompt según tipo de mensaje Y tipo de usuario
+    cortesia = _MATCHER_CORTESIA.categorias(mensaje)
+    if 'saludo' in cortesia:
+        logger.info("    👋 Tipo: SALUDO")
+        return None, _seleccionar_prompt_bienvenida(tipo_usuario, hora_actual, mensaje, nombre_usuario)
+    elif 'despedida' in cortesia:
+        logger.info("    🚪 Tipo: DESPEDIDA")
+        return _generar_despedida(tipo_usuario), None
+    else:
+        logger.info("    💭 Tipo: MENSAJE GENERAL")
+        return None, _seleccionar_prompt_general(tipo_usuario, hora_actual, mensaje, nombre_usuario)
+
+
 def nodo_respuesta_conversacional(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Nodo para generar respuestas conversacionales (chat casual).
@@ -218,48 +260,48 @@ def nodo_respuesta_conversacional(state: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         State actualizado con respuesta en messages y respuesta_generada
     """
-    logger.info("💬 [RESPUESTA_CONVERSACIONAL] Procesando mensaje casual")
-    
-    clasificacion = state.get('clasificacion_mensaje', 'chat')
-    mensaje = obtener_mensaje_usuario(state)
     tipo_usuario = state.get('tipo_usuario', 'paciente')
-    nombre_usuario = state.get('nombre_usuario', 'Usuario')
     
-    if not mensaje:
-        logger.warning("    ⚠️  No se encontró mensaje del usuario")
-        respuesta = "¡Hola! Soy el asistente de la clínica. ¿En qué puedo ayudarte hoy? 🏥"
-    else:
-        logger.info(f"    📨 Mensaje: '{mensaje[:50]}...'")
-        logger.info(f"    🏷️  Clasificación: {clasificacion}")
-        logger.info(f"    👤 Tipo usuario: {tipo_usuario}")
+    try:
+        respuesta, prompt = _preparar_respuesta(state)
         
-        try:
-            # Obtener hora actual
-            hora_actual = get_current_time().format('dddd, DD [de] MMMM [de] YYYY [a las] HH:mm', locale='es')
-            
-            # Seleccionar prompt según tipo de mensaje Y tipo de usuario
-            if es_saludo(mensaje):
-                logger.info("    👋 Tipo: SALUDO")
-                prompt = _seleccionar_prompt_bienvenida(tipo_usuario, hora_actual, mensaje, nombre_usuario)
-            elif es_despedida(mensaje):
-                logger.info("    🚪 Tipo: DESPEDIDA")
-                respuesta = _generar_despedida(tipo_usuario)
-                return _crear_respuesta_state(state, respuesta)
-            else:
-                logger.info("    💭 Tipo: MENSAJE GENERAL")
-                prompt = _seleccionar_prompt_general(tipo_usuario, hora_actual, mensaje, nombre_usuario)
-            
+        if respuesta is None:
             # Invocar LLM
             logger.info("    🤖 Generando respuesta con LLM...")
             response = llm_conversacional.invoke(prompt)
             respuesta = response.content.strip()
             
             logger.info(f"    ✅ Respuesta generada: '{respuesta[:60]}...'")
+        
+    except Exception as e:
+        logger.error(f"    ❌ Error generando respuesta: {e}")
+        # Fallback sin LLM diferenciado por tipo
+        respuesta = _generar_fallback(tipo_usuario)
+    
+    return _crear_respuesta_state(state, respuesta)
+
+
+async def anodo_respuesta_conversacional(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Versión async del nodo de respuesta conversacional.
+    
+    Usa ainvoke para no bloquear el event loop mientras el LLM responde.
+    """
+    tipo_usuario = state.get('tipo_usuario', 'paciente')
+    
+    try:
+        respuesta, prompt = _preparar_respuesta(state)
+        
+        if respuesta is None:
+            logger.info("    🤖 Generando respuesta con LLM (async)...")
+            response = await llm_conversacional.ainvoke(prompt)
+            respuesta = response.content.strip()
             
-        except Exception as e:
-            logger.error(f"    ❌ Error generando respuesta: {e}")
-            # Fallback sin LLM diferenciado por tipo
-            respuesta = _generar_fallback(tipo_usuario)
+            logger.info(f"    ✅ Respuesta generada: '{respuesta[:60]}...'")
+        
+    except Exception as e:
+        logger.error(f"    ❌ Error generando respuesta: {e}")
+        respuesta = _generar_fallback(tipo_usuario)
     
     return _crear_respuesta_state(state, respuesta)
 
@@ -348,6 +390,11 @@ def nodo_respuesta_conversacional_wrapper(state: Dict[str, Any]) -> Dict[str, An
     return nodo_respuesta_conversacional(state)
 
 
+async def anodo_respuesta_conversacional_wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrapper async para LangGraph (usado por grafo.ainvoke)."""
+    return await anodo_respuesta_conversacional(state)
+
+
 # ==================== STANDALONE TEST ====================
 
 if __name__ == "__main__":
@@ -11,10 +11,42 @@ Lógica:
 import logging
 from typing import Dict, Any, cast
 from src.state.agent_state import WhatsAppAgentState
+from src.utils.matcher_palabras import MatcherPalabras
 
 logger = logging.getLogger(__name__)
 
 
+# Palabras clave del routing: una sola pasada por mensaje devuelve todas las categorías
+_MATCHER_ROUTING = MatcherPalabras({
+    'saludo': [
+        'hola', 'buenos días', 'buenas tardes', 'buenas noches',
+        'buen día', 'qué tal', 'hey', 'saludos', 'holi'
+    ],
+    'accion': ['cita', 'necesito', 'quiero', 'agendar', 'solicitar', 'pedir'],
+    # Palabras clave INEQUÍVOCAS de contexto médico
+    'medico': [
+        'paciente', 'pacientes', 'consulta', 'cita médica',
+        'historial', 'diagnóstico', 'tratamiento',
+        'mi consultorio', 'citas del día', 'agenda médica',
+        'consultorio', 'expediente', 'receta'
+    ],
+    # Palabras clave INEQUÍVOCAS de contexto personal
+    'personal': [
+        'mi cumpleaños', 'mi aniversario', 'evento personal',
+        'recordarme', 'mi agenda personal', 'trámite',
+        'cita personal', 'reunión familiar', 'vacaciones',
+        'banco', 'comprar', 'pagar', 'mi esposa', 'mi hijo'
+    ],
+    # Puede ser médico o personal: se desambigua con el contexto
+    'agenda': ['cita', 'agendar', 'programar'],
+    'admin': [
+        'reporte', 'estadísticas', 'dashboard', 'métricas', 'balance de carga',
+        'listar doctores', 'crear doctor', 'desactivar doctor',
+        'cancelaciones', 'actividad', 'resumen administrativo'
+    ],
+})
+
+
 def nodo_router_identidad(state: WhatsAppAgentState) -> Dict[str, Any]:
     """
     Routing CERO-LATENCIA basado en tipo de usuario identificado.
@@ -162,26 +194,17 @@ def _es_saludo_inicial(mensaje: str) -> bool:
     - "Hola, necesito una cita"
     - "Buenos días doctor, tengo una pregunta"
     """
-    SALUDOS = {
-        'hola', 'buenos días', 'buenas tardes', 'buenas noches',
-        'buen día', 'qué tal', 'hey', 'saludos', 'holi'
-    }
-    
-    mensaje_lower = mensaje.lower().strip()
-    palabras = mensaje_lower.split()
-    
     # Es saludo si:
     # 1. Tiene 3 palabras o menos
     # 2. Contiene una palabra de saludo
     # 3. NO contiene palabras de acción (cita, necesito, quiero)
     
-    if len(palabras) > 3:
+    if len(mensaje.split()) > 3:
         return False
     
-    tiene_saludo = any(saludo in mensaje_lower for saludo in SALUDOS)
-    
-    PALABRAS_ACCION = {'cita', 'necesito', 'quiero', 'agendar', 'solicitar', 'pedir'}
-    tiene_accion = any(accion in mensaje_lower for accion in PALABRAS_ACCION)
+    categorias = _MATCHER_ROUTING.categorias(mensaje)
+    tiene_saludo = 'saludo' in categorias
+    tiene_accion = 'accion' in categorias
     
     return tiene_saludo and not tiene_accion
 
@@ -197,35 +220,19 @@ def _clasificar_doctor_rapido(mensaje: str, state: WhatsAppAgentState) -> str:
         'medica', 'personal', o 'requiere_llm'
     """
     
-    # Palabras clave INEQUÍVOCAS de contexto médico
-    MEDICO_KEYWORDS = {
-        'paciente', 'pacientes', 'consulta', 'cita médica', 
-        'historial', 'diagnóstico', 'tratamiento',
-        'mi consultorio', 'citas del día', 'agenda médica',
-        'consultorio', 'expediente', 'receta'
-    }
-    
-    # Palabras clave INEQUÍVOCAS de contexto personal
-    PERSONAL_KEYWORDS = {
-        'mi cumpleaños', 'mi aniversario', 'evento personal',
-        'recordarme', 'mi agenda personal', 'trámite',
-        'cita personal', 'reunión familiar', 'vacaciones',
-        'banco', 'comprar', 'pagar', 'mi esposa', 'mi hijo'
-    }
-    
-    mensaje_lower = mensaje.lower()
+    categorias = _MATCHER_ROUTING.categorias(mensaje)
     
     # ========================================
     # Fase 1: Detección inequívoca (90% casos)
     # ========================================
     
     # Contexto médico claro
-    if any(kw in mensaje_lower for kw in MEDICO_KEYWORDS):
+    if 'medico' in categorias:
         logger.info(f"      ✓ Clasificación rápida: MEDICA (keyword match)")
         return 'medica'
     
     # Contexto personal claro
-    if any(kw in mensaje_lower for kw in PERSONAL_KEYWORDS):
+    if 'personal' in categorias:
         logger.info(f"      ✓ Clasificación rápida: PERSONAL (keyword match)")
         return 'personal'
     
@@ -235,7 +242,7 @@ def _clasificar_doctor_rapido(mensaje: str, state: WhatsAppAgentState) -> str:
     
     # "agendar cita" o "mi cita" → puede ser médico o personal
     # Usar contexto de conversación previa si está disponible
-    if any(palabra in mensaje_lower for palabra in ['cita', 'agendar', 'programar']):
+    if 'agenda' in categorias:
         # Revisar contexto episódico para desambiguar
         contexto_previo = state.get('contexto_episodico', {})
         if isinstance(contexto_previo, dict):
@@ -265,15 +272,7 @@ def _es_comando_admin(mensaje: str) -> bool:
     - "Dashboard de doctores"
     - "Listar todos los pacientes"
     """
-    ADMIN_KEYWORDS = {
-        'reporte', 'estadísticas', 'estadisticas', 'dashboard',
-        'métricas', 'metricas', 'balance de carga',
-        'listar doctores', 'crear doctor', 'desactivar doctor',
-        'cancelaciones', 'actividad', 'resumen administrativo'
-    }
-    
-    mensaje_lower = mensaje.lower()
-    return any(kw in mensaje_lower for kw in ADMIN_KEYWORDS)
+    return 'admin' in _MATCHER_ROUTING.categorias(mensaje)
 
 
 # ==================== WRAPPER PARA LANGGRAPH ====================
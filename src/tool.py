@@ -1,4 +1,5 @@
 import logging
+import re
 from langchain.tools import tool
 from .utilities import (
     ListGoogleCalendarEvents,
@@ -20,6 +21,7 @@ load_dotenv()  # this will load variables from .env into environment
 
 from src.config.secure_config import get_config
 from src.middleware.rate_limiter import rate_limit
+from src.utils.matcher_palabras import compilar_alternativas
 
 config = get_config()
 DEEPSEEK_API_KEY = config.DEEPSEEK_API_KEY
@@ -405,43 +407,37 @@ def _normalize_accents(text: str) -> str:
     return "".join(c for c in normalized if unicodedata.category(c) != "Mn")
 
 
+_ACCENT_MAP = {
+    "garcia": "García",
+    "lopez": "López",
+    "martinez": "Martínez",
+    "rodriguez": "Rodríguez",
+    "gonzalez": "González",
+    "hernandez": "Hernández",
+    "perez": "Pérez",
+    "sanchez": "Sánchez",
+    "ramirez": "Ramírez",
+    "fernandez": "Fernández",
+    "diaz": "Díaz",
+    "jimenez": "Jiménez",
+    "gutierrez": "Gutiérrez",
+    "ruiz": "Ruíz",
+    "alvarez": "Álvarez",
+    "maria": "María",
+    "jose": "José",
+    "jesus": "Jesús",
+    "angel": "Ángel",
+}
+# Una sola regex para todo el mapa (compilada al importar)
+_ACCENT_PATTERN = compilar_alternativas(_ACCENT_MAP, re.IGNORECASE)
+
+
 def _add_common_accents(text: str) -> str:
     """
     Agrega variantes con acentos comunes en español.
     Garcia -> García, Lopez -> López, etc.
     """
-    accent_map = {
-        "Garcia": "García",
-        "Lopez": "López",
-        "Martinez": "Martínez",
-        "Rodriguez": "Rodríguez",
-        "Gonzalez": "González",
-        "Hernandez": "Hernández",
-        "Perez": "Pérez",
-        "Sanchez": "Sánchez",
-        "Ramirez": "Ramírez",
-        "Fernandez": "Fernández",
-        "Diaz": "Díaz",
-        "Jimenez": "Jiménez",
-        "Gutierrez": "Gutiérrez",
-        "Ruiz": "Ruíz",
-        "Alvarez": "Álvarez",
-        "Maria": "María",
-        "Jose": "José",
-        "Jesus": "Jesús",
-        "Angel": "Ángel",
-    }
-
-    result = text
-    for sin_acento, con_acento in accent_map.items():
-        # Case insensitive replacement
-        import re
-
-        pattern = re.compile(re.escape(sin_acento), re.IGNORECASE)
-        if pattern.search(result):
-            # Preserve original case
-            result = pattern.sub(con_acento, result)
-    return result
+    return _ACCENT_PATTERN.sub(lambda m: _ACCENT_MAP[m.group(0).lower()], text)
 
 
 @tool
@@ -8,6 +8,8 @@ El LLM debe pasar datos en formato correcto o recibirá error descriptivo.
 from langchain_core.tools import tool
 from .models import FechaCita, HoraCita, DatosPaciente
 import psycopg
+from src.medical.connection_pool import get_connection
+from src.medical.cache_ocupacion import invalidar_ocupacion
 import os
 from datetime import datetime
 import logging
@@ -55,9 +57,7 @@ def agendar_cita_paciente(
     # No necesitamos try/except para validación de formato
     
     try:
-        DATABASE_URL = os.getenv("DATABASE_URL")
-        
-        with psycopg.connect(DATABASE_URL) as conn:
+        with get_connection() as conn:
             with conn.cursor() as cur:
                 # Verificar que el paciente existe
                 cur.execute("SELECT id FROM pacientes WHERE id = %s", (paciente_id,))
@@ -86,6 +86,7 @@ def agendar_cita_paciente(
                 cur.execute(query, (paciente_id, fecha_hora, motivo))
                 cita_id = cur.fetchone()[0]
                 conn.commit()
+                invalidar_ocupacion()  # Sin doctor_id: invalidar todo
                 
                 logger.info(f"Cita {cita_id} agendada para paciente {paciente_id} el {fecha_hora}")
                 
@@ -121,9 +122,7 @@ def reagendar_cita(
     """
     
     try:
-        DATABASE_URL = os.getenv("DATABASE_URL")
-        
-        with psycopg.connect(DATABASE_URL) as conn:
+        with get_connection() as conn:
             with conn.cursor() as cur:
                 # Verificar que la cita existe
                 cur.execute("""
@@ -160,6 +159,7 @@ def reagendar_cita(
                 """, (nueva_fecha_hora, cita_id))
                 
                 conn.commit()
+                invalidar_ocupacion()
                 
                 logger.info(f"Cita {cita_id} reagendada a {nueva_fecha_hora}")
                 
@@ -184,9 +184,7 @@ def cancelar_cita(cita_id: int, motivo_cancelacion: str = "") -> str:
     """
     
     try:
-        DATABASE_URL = os.getenv("DATABASE_URL")
-        
-        with psycopg.connect(DATABASE_URL) as conn:
+        with get_connection() as conn:
             with conn.cursor() as cur:
                 # Verificar que existe
                 cur.execute("""
@@ -215,6 +213,7 @@ def cancelar_cita(cita_id: int, motivo_cancelacion: str = "") -> str:
                 """, (motivo_cancelacion, cita_id))
                 
                 conn.commit()
+                invalidar_ocupacion()
                 
                 logger.info(f"Cita {cita_id} cancelada. Motivo: {motivo_cancelacion}")
                 
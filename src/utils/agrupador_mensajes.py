@@ -0,0 +1,200 @@
+"""
+Agrupador de Mensajes en Ráfaga (debounce por chat)
+
+Los pacientes suelen escribir "hola", "quiero", "una cita", "para mañana"
+como cuatro mensajes en pocos segundos; cada uno corría el grafo completo
+(clasificación LLM + respuesta LLM por fragmento).
+
+Con AGRUPAR_MENSAJES=true, el endpoint retiene los mensajes de un chat
+hasta que pasa una ventana de silencio (AGRUPAR_VENTANA_MS sin mensajes
+nuevos) y los envía al grafo como un solo turno:
+
+- El último mensaje de la ráfaga lleva el texto combinado (uno por línea)
+  y recibe la respuesta; cada fragmento anterior responde sin texto
+  (response=None, agrupado=True) en cuanto llega el siguiente, y el
+  servicio de WhatsApp no envía nada
+- La espera total de una ráfaga no pasa de AGRUPAR_MAX_ESPERA_MS, y con
+  AGRUPAR_MAX_MENSAJES fragmentos se envía de inmediato
+- Ventana adaptativa: si el último turno del chat dejó al recepcionista
+  esperando una respuesta corta (nombre, fecha, opción, confirmación)
+  el mensaje pasa sin esperar
+
+El estado del último turno se toma del resultado del grafo
+(registrar_estado), sin leer el checkpoint.
+
+Configuración (variables de entorno):
+    AGRUPAR_MENSAJES           "true" para activar (default: false)
+    AGRUPAR_VENTANA_MS         Silencio que cierra una ráfaga (default: 1500)
+    AGRUPAR_MAX_ESPERA_MS      Espera máxima desde el primer fragmento (default: 5000)
+    AGRUPAR_MAX_MENSAJES       Fragmentos que cierran la ráfaga de inmediato (default: 8)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(nombre: str, default: int) -> int:
+    try:
+        return int(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+AGRUPAR_HABILITADO = os.getenv("AGRUPAR_MENSAJES", "false").lower() == "true"
+VENTANA_MS = max(0.0, _env_float("AGRUPAR_VENTANA_MS", 1500.0))
+MAX_ESPERA_MS = max(0.0, _env_float("AGRUPAR_MAX_ESPERA_MS", 5000.0))
+MAX_MENSAJES = max(1, _env_int("AGRUPAR_MAX_MENSAJES", 8))
+
+# Estados del recepcionista (clásico y optimizado) que esperan una respuesta corta
+ESTADOS_RESPUESTA_CORTA = frozenset({
+    'solicitando_nombre',
+    'solicitando_fecha',
+    'recolectando_slots',
+    'mostrando_slots',
+    'confirmando_cita',
+    'esperando_seleccion',
+    'confirmando',
+})
+
+# Chats cuyo último estado se recuerda (LRU)
+_MAX_ESTADOS = 10000
+
+
+class _Rafaga:
+    __slots__ = ("textos", "inicio", "siguiente")
+
+    def __init__(self):
+        self.textos: List[str] = []
+        self.inicio = time.monotonic()
+        # Se activa cuando llega otro fragmento (absorbe al que espera)
+        self.siguiente: Optional[asyncio.Event] = None
+
+
+class AgrupadorMensajes:
+    """
+    Ráfagas pendientes por chat_id. Se usa solo desde el event loop.
+
+    Uso:
+        texto = await agrupador.agrupar(chat_id, mensaje)
+        if texto is None:
+            ...  # Absorbido: otro mensaje del chat enviará la ráfaga
+    """
+
+    def __init__(
+        self,
+        ventana_ms: float = VENTANA_MS,
+        max_espera_ms: float = MAX_ESPERA_MS,
+        max_mensajes: int = MAX_MENSAJES
+    ):
+        self.ventana_s = ventana_ms / 1000.0
+        self.max_espera_s = max_espera_ms / 1000.0
+        self.max_mensajes = max_mensajes
+
+        self._rafagas: Dict[str, _Rafaga] = {}
+        self._estados: "OrderedDict[str, str]" = OrderedDict()
+
+        self.mensajes = 0
+        self.turnos = 0
+        self.absorbidos = 0
+        self.sin_espera = 0
+
+    async def agrupar(self, chat_id: str, texto: str) -> Optional[str]:
+        """
+        Texto a enviar al grafo, o None si el mensaje se sumó a la ráfaga
+        que enviará un mensaje posterior del mismo chat.
+        """
+        self.mensajes += 1
+        rafaga = self._rafagas.get(chat_id)
+
+        if rafaga is None and self._estados.get(chat_id) in ESTADOS_RESPUESTA_CORTA:
+            # El recepcionista espera "Juan", "2" o "sí": no retrasar
+            self.sin_espera += 1
+            return self._turno([texto])
+
+        if rafaga is None:
+            rafaga = self._rafagas[chat_id] = _Rafaga()
+        else:
+            rafaga.siguiente.set()
+        rafaga.textos.append(texto)
+        siguiente = rafaga.siguiente = asyncio.Event()
+
+        if len(rafaga.textos) < self.max_mensajes:
+            restante = rafaga.inicio + self.max_espera_s - time.monotonic()
+            try:
+                await asyncio.wait_for(siguiente.wait(), max(0.0, min(self.ventana_s, restante)))
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # Petición cancelada siendo el último fragmento: no dejar la ráfaga huérfana
+                if not siguiente.is_set() and self._rafagas.get(chat_id) is rafaga:
+                    del self._rafagas[chat_id]
+                raise
+            if siguiente.is_set():
+                # Llegó otro fragmento: ese (o uno posterior) cierra la ráfaga
+                self.absorbidos += 1
+                return None
+
+        del self._rafagas[chat_id]
+        if len(rafaga.textos) > 1:
+            logger.info(f"🧩 Ráfaga de {len(rafaga.textos)} mensajes agrupada para {chat_id}")
+        return self._turno(rafaga.textos)
+
+    def _turno(self, textos: List[str]) -> str:
+        self.turnos += 1
+        return "\n".join(textos)
+
+    def registrar_estado(self, chat_id: str, estado_conversacion: Optional[str]) -> None:
+        """Recuerda el estado_conversacion con el que terminó el último turno del chat."""
+        if not estado_conversacion:
+            return
+        self._estados[chat_id] = estado_conversacion
+        self._estados.move_to_end(chat_id)
+        while len(self._estados) > _MAX_ESTADOS:
+            self._estados.popitem(last=False)
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        return {
+            "ventana_ms": self.ventana_s * 1000.0,
+            "max_espera_ms": self.max_espera_s * 1000.0,
+            "rafagas_abiertas": len(self._rafagas),
+            "mensajes": self.mensajes,
+            "turnos": self.turnos,
+            "absorbidos": self.absorbidos,
+            "sin_espera": self.sin_espera,
+        }
+
+
+# ==================== SINGLETON ====================
+
+_agrupador_instance: Optional[AgrupadorMensajes] = None
+
+
+def get_agrupador_mensajes() -> Optional[AgrupadorMensajes]:
+    """Agrupador del proceso, o None si AGRUPAR_MENSAJES no está activo."""
+    global _agrupador_instance
+
+    if not AGRUPAR_HABILITADO:
+        return None
+    if _agrupador_instance is None:
+        _agrupador_instance = AgrupadorMensajes()
+
+    return _agrupador_instance
+
+
+def obtener_metricas_agrupador() -> Optional[Dict[str, Any]]:
+    """Contadores del agrupador sin crearlo (None si aún no se usó)."""
+    agrupador = _agrupador_instance
+    return agrupador.obtener_metricas() if agrupador is not None else None
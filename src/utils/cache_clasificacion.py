@@ -0,0 +1,333 @@
+"""
+Cache de Clasificaciones de Intención (N2 - filtrado inteligente)
+
+Buena parte de los mensajes que clasifica el LLM son casi idénticos:
+saludos, "gracias", "quiero agendar". Este cache devuelve la
+ClasificacionResponse guardada sin llamar a DeepSeek/Claude.
+
+Clave: texto normalizado (minúsculas, sin acentos ni puntuación) +
+tipo_usuario + hash corto del contexto previo que ve el prompt.
+
+- Tier exacto: misma clave
+- Tier semántico: vecino más cercano por embedding dentro del mismo
+  tipo_usuario y contexto, con similitud coseno >= CLASIFICACION_CACHE_SIMILITUD.
+  Solo sirve resultados sin pregunta de aclaración (la pregunta puede
+  citar datos del mensaje original, p. ej. el nombre)
+- Entradas precargadas desde clasificaciones_llm: mensajes frecuentes con
+  una clasificación consistente se guardan sin contexto ("*") y aplican
+  con cualquier contexto previo
+- TTL, LRU acotado por número de entradas y métricas de hit rate
+
+Configuración (variables de entorno):
+    CLASIFICACION_CACHE               "false" para desactivarlo (default: true)
+    CLASIFICACION_CACHE_TTL_SEG       Vigencia de una entrada (default: 86400)
+    CLASIFICACION_CACHE_MAX           Entradas en memoria, LRU (default: 5000)
+    CLASIFICACION_CACHE_SIMILITUD     Umbral del tier semántico (default: 0.92;
+                                      >1 lo desactiva)
+    CLASIFICACION_PRECARGA_DIAS       Antigüedad de clasificaciones_llm a leer (default: 30)
+    CLASIFICACION_PRECARGA_MIN        Ocurrencias mínimas de un mensaje (default: 3)
+    CLASIFICACION_PRECARGA_ACUERDO    Fracción mínima con la misma clasificación (default: 0.9)
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time as _time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(nombre: str, default: int) -> int:
+    try:
+        return int(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+CACHE_HABILITADO = os.getenv("CLASIFICACION_CACHE", "true").lower() != "false"
+CACHE_TTL_SEG = max(0.0, _env_float("CLASIFICACION_CACHE_TTL_SEG", 86400.0))
+CACHE_MAX = max(1, _env_int("CLASIFICACION_CACHE_MAX", 5000))
+UMBRAL_SIMILITUD = _env_float("CLASIFICACION_CACHE_SIMILITUD", 0.92)
+PRECARGA_DIAS = max(0, _env_int("CLASIFICACION_PRECARGA_DIAS", 30))
+PRECARGA_MIN = max(1, _env_int("CLASIFICACION_PRECARGA_MIN", 3))
+PRECARGA_ACUERDO = _env_float("CLASIFICACION_PRECARGA_ACUERDO", 0.9)
+
+# Contexto de las entradas precargadas (aplican con cualquier contexto)
+SIN_CONTEXTO = "*"
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9ñ ]+")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas, sin acentos ni puntuación, espacios colapsados ("¡Hola!" → "hola")."""
+    texto = texto.lower().replace("ñ", "\0")
+    texto = "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+    texto = _NO_ALFANUMERICO.sub(" ", texto.replace("\0", "ñ"))
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+class ClaveClasificacion(NamedTuple):
+    texto: str
+    tipo_usuario: str
+    contexto: str
+
+
+def clave_clasificacion(mensaje: str, tipo_usuario: str, contexto_previo: Sequence[str]) -> ClaveClasificacion:
+    """Clave del cache para un mensaje y el contexto previo que ve el prompt."""
+    contexto = hashlib.sha1(
+        "\n".join(normalizar_texto(linea) for linea in contexto_previo).encode()
+    ).hexdigest()[:12] if contexto_previo else ""
+    return ClaveClasificacion(normalizar_texto(mensaje), tipo_usuario, contexto)
+
+
+class MensajeFrecuente(NamedTuple):
+    texto: str
+    tipo_usuario: str
+    clasificacion: str
+    ocurrencias: int
+    acuerdo: float
+
+
+def seleccionar_precarga(
+    filas: Iterable[Tuple[str, str, str]],
+    min_ocurrencias: int = PRECARGA_MIN,
+    acuerdo_min: float = PRECARGA_ACUERDO
+) -> List[MensajeFrecuente]:
+    """
+    Mensajes de (mensaje, tipo_usuario, clasificacion) que vale la pena precargar.
+
+    Agrupa por texto normalizado y tipo_usuario; un grupo entra si se repite
+    min_ocurrencias veces y su clasificación más común alcanza acuerdo_min
+    (un mensaje que el LLM clasificó distinto según el contexto no se precarga).
+    """
+    grupos: Dict[Tuple[str, str], Counter] = {}
+    for mensaje, tipo_usuario, clasificacion in filas:
+        texto = normalizar_texto(mensaje or "")
+        if texto and clasificacion:
+            grupos.setdefault((texto, tipo_usuario), Counter())[clasificacion] += 1
+
+    seleccionados = []
+    for (texto, tipo_usuario), conteo in grupos.items():
+        total = sum(conteo.values())
+        clasificacion, votos = conteo.most_common(1)[0]
+        if total >= min_ocurrencias and votos / total >= acuerdo_min:
+            seleccionados.append(MensajeFrecuente(texto, tipo_usuario, clasificacion, total, votos / total))
+
+    seleccionados.sort(key=lambda m: m.ocurrencias, reverse=True)
+    return seleccionados
+
+
+class _Entrada:
+    __slots__ = ("resultado", "vector", "vence_en")
+
+    def __init__(self, resultado: BaseModel, vector: Optional[np.ndarray], vence_en: float):
+        self.resultado = resultado
+        self.vector = vector
+        self.vence_en = vence_en
+
+
+class CacheClasificacion:
+    """
+    Clasificaciones por clave con LRU, TTL y búsqueda por vecino más cercano.
+
+    - obtener(): tier exacto (contexto propio y luego precargado)
+    - obtener_similar(): tier semántico con el vector del mensaje (o None
+      si no hay embedding); un miss en ambos tiers cuenta aquí
+    - guardar(): resultado del LLM (con su vector si se calculó)
+    """
+
+    def __init__(
+        self,
+        ttl_seg: float = CACHE_TTL_SEG,
+        max_entradas: int = CACHE_MAX,
+        umbral_similitud: float = UMBRAL_SIMILITUD
+    ):
+        self.ttl_seg = ttl_seg
+        self.max_entradas = max_entradas
+        self.umbral_similitud = umbral_similitud
+
+        self._entradas: "OrderedDict[ClaveClasificacion, _Entrada]" = OrderedDict()
+        # (tipo_usuario, contexto) -> claves con vector, para el tier semántico
+        self._grupos: Dict[Tuple[str, str], set] = {}
+        self._lock = threading.Lock()
+
+        self.hits_exactos = 0
+        self.hits_semanticos = 0
+        self.misses = 0
+        self.precargadas = 0
+
+    @property
+    def semantico_activo(self) -> bool:
+        return self.umbral_similitud <= 1.0
+
+    def obtener(self, clave: ClaveClasificacion) -> Optional[BaseModel]:
+        """Resultado guardado para la clave exacta (o precargado para el texto)."""
+        ahora = _time.monotonic()
+        with self._lock:
+            for candidata in (clave, clave._replace(contexto=SIN_CONTEXTO)):
+                entrada = self._vigente(candidata, ahora)
+                if entrada is not None:
+                    self._entradas.move_to_end(candidata)
+                    self.hits_exactos += 1
+                    return entrada.resultado.model_copy(deep=True)
+        return None
+
+    def obtener_similar(
+        self,
+        clave: ClaveClasificacion,
+        vector: Optional[Sequence[float]]
+    ) -> Optional[Tuple[BaseModel, float]]:
+        """
+        (resultado, similitud) del vecino más cercano sobre el umbral, o None.
+
+        Es el último tier: aquí se cuenta el miss (también sin vector).
+        """
+        if vector is None or not self.semantico_activo:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        consulta = _unitario(vector)
+        ahora = _time.monotonic()
+        with self._lock:
+            candidatas: List[ClaveClasificacion] = []
+            for contexto in (clave.contexto, SIN_CONTEXTO):
+                for candidata in self._grupos.get((clave.tipo_usuario, contexto), ()):
+                    if self._vigente(candidata, ahora) is not None:
+                        candidatas.append(candidata)
+
+            if candidatas:
+                matriz = np.stack([self._entradas[c].vector for c in candidatas])
+                similitudes = matriz @ consulta
+                mejor = int(np.argmax(similitudes))
+                if similitudes[mejor] >= self.umbral_similitud:
+                    elegida = candidatas[mejor]
+                    self._entradas.move_to_end(elegida)
+                    self.hits_semanticos += 1
+                    return self._entradas[elegida].resultado.model_copy(deep=True), float(similitudes[mejor])
+
+            self.misses += 1
+        return None
+
+    def guardar(self, clave: ClaveClasificacion, resultado: BaseModel, vector: Optional[Sequence[float]] = None) -> None:
+        if not clave.texto or self.ttl_seg <= 0:
+            return
+        # El tier semántico solo sirve clasificaciones sin texto propio del mensaje
+        if getattr(resultado, "pregunta_aclaracion", None) or getattr(resultado, "clasificacion", None) == "necesita_aclaracion":
+            vector = None
+        unitario = _unitario(vector) if vector is not None else None
+
+        with self._lock:
+            self._quitar(clave)
+            self._entradas[clave] = _Entrada(resultado.model_copy(deep=True), unitario, _time.monotonic() + self.ttl_seg)
+            if unitario is not None:
+                self._grupos.setdefault((clave.tipo_usuario, clave.contexto), set()).add(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._quitar(next(iter(self._entradas)))
+
+    def precargar(self, entradas: Iterable[Tuple[str, str, BaseModel, Optional[Sequence[float]]]]) -> int:
+        """Guarda (texto, tipo_usuario, resultado, vector) válidos con cualquier contexto."""
+        total = 0
+        for texto, tipo_usuario, resultado, vector in entradas:
+            self.guardar(ClaveClasificacion(normalizar_texto(texto), tipo_usuario, SIN_CONTEXTO), resultado, vector)
+            total += 1
+        with self._lock:
+            self.precargadas += total
+        return total
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._grupos.clear()
+
+    def _vigente(self, clave: ClaveClasificacion, ahora: float) -> Optional[_Entrada]:
+        # Se llama con self._lock tomado
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        if entrada.vence_en <= ahora:
+            self._quitar(clave)
+            return None
+        return entrada
+
+    def _quitar(self, clave: ClaveClasificacion) -> None:
+        # Se llama con self._lock tomado
+        entrada = self._entradas.pop(clave, None)
+        if entrada is not None and entrada.vector is not None:
+            grupo = self._grupos.get((clave.tipo_usuario, clave.contexto))
+            if grupo is not None:
+                grupo.discard(clave)
+                if not grupo:
+                    del self._grupos[(clave.tipo_usuario, clave.contexto)]
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.hits_exactos + self.hits_semanticos
+            consultas = hits + self.misses
+            return {
+                "entradas": len(self._entradas),
+                "con_vector": sum(len(grupo) for grupo in self._grupos.values()),
+                "max_entradas": self.max_entradas,
+                "ttl_seg": self.ttl_seg,
+                "umbral_similitud": self.umbral_similitud,
+                "hits_exactos": self.hits_exactos,
+                "hits_semanticos": self.hits_semanticos,
+                "misses": self.misses,
+                "hit_rate": round(hits / consultas, 4) if consultas else 0.0,
+                "precargadas": self.precargadas,
+            }
+
+
+def _unitario(vector: Sequence[float]) -> np.ndarray:
+    arreglo = np.asarray(vector, dtype=np.float32)
+    norma = float(np.linalg.norm(arreglo))
+    return arreglo / norma if norma > 0 else arreglo
+
+
+# ==================== SINGLETON ====================
+
+_cache_instance: Optional[CacheClasificacion] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_clasificacion() -> Optional[CacheClasificacion]:
+    """Cache del proceso (singleton), o None si CLASIFICACION_CACHE=false."""
+    global _cache_instance
+
+    if not CACHE_HABILITADO:
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = CacheClasificacion()
+
+    return _cache_instance
+
+
+def reset_cache_clasificacion() -> None:
+    """Descarta el cache (tests o cambio de prompt)."""
+    global _cache_instance
+    with _cache_lock:
+        _cache_instance = None
+
+
+def obtener_metricas_clasificacion() -> Optional[Dict[str, Any]]:
+    """Contadores del cache sin crearlo (None si aún no se usó)."""
+    cache = _cache_instance
+    return cache.obtener_metricas() if cache is not None else None
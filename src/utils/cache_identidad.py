@@ -0,0 +1,182 @@
+"""
+Cache de Identidad de Usuarios (por número de teléfono)
+
+Cada mensaje entrante pasa por nodo_identificacion_usuario, que consultaba
+números temporales y usuarios/doctores: dos conexiones por mensaje, aunque
+el mismo paciente mande varios mensajes seguidos. Con este cache un hit no
+toca PostgreSQL (last_seen lo escribe en lote registro_actividad).
+
+- Positivo: perfil de consultar_usuario_bd() por número (TTL corto)
+- Negativo: "no existe" con un TTL menor (el nodo registra al usuario
+  justo después, lo que invalida la entrada)
+- Un número temporal no se cachea más allá de su expira_en
+- Contador de generación: una consulta que empezó antes de una
+  invalidación no guarda su resultado
+
+Invalidación explícita desde crear_usuario_nuevo() y activar_numero_temporal().
+
+Configuración (variables de entorno):
+    IDENTIDAD_CACHE_TTL_SEG            Vigencia de un perfil (default: 60)
+    IDENTIDAD_CACHE_TTL_NEGATIVO_SEG   Vigencia de "no existe" (default: 10)
+    IDENTIDAD_CACHE_MAX                Números en memoria, LRU (default: 5000)
+"""
+
+import copy
+import logging
+import os
+import threading
+import time as _time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(nombre: str, default: int) -> int:
+    try:
+        return int(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+CACHE_TTL_SEG = max(0.0, _env_float("IDENTIDAD_CACHE_TTL_SEG", 60.0))
+CACHE_TTL_NEGATIVO_SEG = max(0.0, _env_float("IDENTIDAD_CACHE_TTL_NEGATIVO_SEG", 10.0))
+CACHE_MAX = max(1, _env_int("IDENTIDAD_CACHE_MAX", 5000))
+
+
+class CacheIdentidad:
+    """
+    Perfiles de usuario por número con LRU, TTL e invalidación explícita.
+
+    - obtener(): (hit, usuario) — usuario None en un hit negativo
+    - guardar(): con la generación leída antes de consultar la BD
+    """
+
+    def __init__(
+        self,
+        ttl_seg: float = CACHE_TTL_SEG,
+        ttl_negativo_seg: float = CACHE_TTL_NEGATIVO_SEG,
+        max_entradas: int = CACHE_MAX
+    ):
+        self.ttl_seg = ttl_seg
+        self.ttl_negativo_seg = ttl_negativo_seg
+        self.max_entradas = max_entradas
+
+        # phone -> (usuario o None, vence_en monotonic)
+        self._entradas: "OrderedDict[str, Tuple[Optional[Dict[str, Any]], float]]" = OrderedDict()
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+    @property
+    def generacion(self) -> int:
+        with self._lock:
+            return self._generacion
+
+    def obtener(self, phone_number: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(True, usuario) si hay entrada vigente; (False, None) si hay que consultar."""
+        ahora = _time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(phone_number)
+            if entrada is not None and entrada[1] > ahora:
+                self._entradas.move_to_end(phone_number)
+                self.hits += 1
+                usuario = entrada[0]
+            else:
+                self.misses += 1
+                return False, None
+
+        # Copia: los nodos modifican usuario_info en el estado
+        return True, copy.deepcopy(usuario)
+
+    def guardar(self, phone_number: str, usuario: Optional[Dict[str, Any]], generacion: int) -> None:
+        """Guarda el resultado de la consulta (None = no existe)."""
+        ttl = self.ttl_seg if usuario is not None else self.ttl_negativo_seg
+        if usuario is not None and usuario.get("es_numero_temporal") and usuario.get("expira_en"):
+            # No servir un número temporal después de que expire
+            expira_en = usuario["expira_en"]
+            restante = (expira_en - datetime.now(expira_en.tzinfo)).total_seconds()
+            ttl = min(ttl, max(0.0, restante))
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if generacion != self._generacion:
+                return
+            self._entradas[phone_number] = (copy.deepcopy(usuario), _time.monotonic() + ttl)
+            self._entradas.move_to_end(phone_number)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, phone_number: Optional[str] = None) -> None:
+        """Descarta un número (o todo si phone_number es None)."""
+        with self._lock:
+            self._generacion += 1
+            self.invalidaciones += 1
+            if phone_number is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(phone_number, None)
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_seg": self.ttl_seg,
+                "ttl_negativo_seg": self.ttl_negativo_seg,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / consultas, 4) if consultas else 0.0,
+                "invalidaciones": self.invalidaciones,
+            }
+
+
+# ==================== SINGLETON ====================
+
+_cache_instance: Optional[CacheIdentidad] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_identidad() -> CacheIdentidad:
+    """Cache de identidad del proceso (singleton)."""
+    global _cache_instance
+
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = CacheIdentidad()
+
+    return _cache_instance
+
+
+def invalidar_identidad(phone_number: Optional[str] = None) -> None:
+    """Invalida la identidad tras escribir en usuarios o numeros_temporales_doctores."""
+    cache = _cache_instance
+    if cache is not None:
+        cache.invalidar(phone_number)
+
+
+def reset_cache_identidad() -> None:
+    """Descarta el cache (tests o cambio de configuración)."""
+    global _cache_instance
+    with _cache_lock:
+        _cache_instance = None
+
+
+def obtener_metricas_identidad() -> Optional[Dict[str, Any]]:
+    """Contadores del cache sin crearlo (None si aún no se usó)."""
+    cache = _cache_instance
+    return cache.obtener_metricas() if cache is not None else None
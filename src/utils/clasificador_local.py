@@ -0,0 +1,325 @@
+"""
+Clasificador Local de Intención (primer tier antes del LLM en N2)
+
+Regresión logística multinomial sobre los embeddings MiniLM que el
+servidor ya tiene en memoria, entrenada con el historial de
+clasificaciones_llm (las etiquetas que dio DeepSeek/Claude).
+
+- Entrada: vector del mensaje (normalizado) + one-hot de tipo_usuario
+- Salida: (clasificacion, confianza); la confianza está calibrada con
+  temperature scaling sobre un conjunto de validación
+- Solo responde si la confianza llega a CLASIFICADOR_LOCAL_UMBRAL; si no,
+  el mensaje escala al LLM
+- Sin dependencias nuevas (numpy); el modelo se guarda en un .npz junto
+  con la versión del modelo de embeddings con que se entrenó
+
+Entrenamiento y evaluación offline:
+    python scripts/entrenar_clasificador_local.py
+
+Configuración (variables de entorno):
+    CLASIFICADOR_LOCAL           "false" para desactivarlo (default: true)
+    CLASIFICADOR_LOCAL_RUTA      Archivo del modelo (default: modelos/clasificador_intencion.npz)
+    CLASIFICADOR_LOCAL_UMBRAL    Confianza mínima para no llamar al LLM (default: 0.9)
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+CLASIFICADOR_HABILITADO = os.getenv("CLASIFICADOR_LOCAL", "true").lower() != "false"
+RUTA_MODELO = os.getenv(
+    "CLASIFICADOR_LOCAL_RUTA",
+    str(Path(__file__).parent.parent.parent / "modelos" / "clasificador_intencion.npz")
+)
+UMBRAL_CONFIANZA = _env_float("CLASIFICADOR_LOCAL_UMBRAL", 0.9)
+
+# Temperaturas candidatas para la calibración
+_TEMPERATURAS = np.geomspace(0.2, 5.0, 41)
+# Con menos ejemplos de validación la temperatura queda en 1
+_MIN_VALIDACION = 20
+
+
+class Prediccion(NamedTuple):
+    clasificacion: str
+    confianza: float
+
+
+def _unitarios(vectores: Any) -> np.ndarray:
+    matriz = np.atleast_2d(np.asarray(vectores, dtype=np.float32))
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    return matriz / np.where(normas > 0, normas, 1.0)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class ClasificadorLocal:
+    """
+    Softmax sobre [embedding, one-hot tipo_usuario].
+
+    Uso:
+        modelo, reporte = ClasificadorLocal.entrenar(vectores, tipos, etiquetas)
+        prediccion = modelo.predecir(vector, "doctor")
+    """
+
+    def __init__(
+        self,
+        pesos: np.ndarray,
+        sesgo: np.ndarray,
+        clases: Sequence[str],
+        tipos_usuario: Sequence[str],
+        temperatura: float = 1.0,
+        modelo_embeddings: str = ""
+    ):
+        self.pesos = np.asarray(pesos, dtype=np.float32)
+        self.sesgo = np.asarray(sesgo, dtype=np.float32)
+        self.clases = list(clases)
+        self.tipos_usuario = list(tipos_usuario)
+        self.temperatura = float(temperatura)
+        self.modelo_embeddings = modelo_embeddings
+
+    @property
+    def dimension(self) -> int:
+        return self.pesos.shape[0] - len(self.tipos_usuario)
+
+    def _caracteristicas(self, vectores: Any, tipos_usuario: Sequence[str]) -> np.ndarray:
+        unitarios = _unitarios(vectores)
+        one_hot = np.zeros((len(unitarios), len(self.tipos_usuario)), dtype=np.float32)
+        for i, tipo in enumerate(tipos_usuario):
+            if tipo in self.tipos_usuario:
+                one_hot[i, self.tipos_usuario.index(tipo)] = 1.0
+        return np.hstack([unitarios, one_hot])
+
+    def _logits(self, vectores: Any, tipos_usuario: Sequence[str]) -> np.ndarray:
+        return self._caracteristicas(vectores, tipos_usuario) @ self.pesos + self.sesgo
+
+    def probabilidades(self, vectores: Any, tipos_usuario: Sequence[str]) -> np.ndarray:
+        """Probabilidades calibradas (n x clases)."""
+        return _softmax(self._logits(vectores, tipos_usuario) / self.temperatura)
+
+    def predecir(self, vector: Sequence[float], tipo_usuario: str) -> Prediccion:
+        probabilidades = self.probabilidades([vector], [tipo_usuario])[0]
+        mejor = int(np.argmax(probabilidades))
+        return Prediccion(self.clases[mejor], float(probabilidades[mejor]))
+
+    # ==================== ENTRENAMIENTO ====================
+
+    @classmethod
+    def entrenar(
+        cls,
+        vectores: Any,
+        tipos_usuario: Sequence[str],
+        etiquetas: Sequence[str],
+        epocas: int = 500,
+        tasa: float = 1.0,
+        l2: float = 1e-3,
+        validacion: float = 0.2,
+        semilla: int = 0,
+        umbral: float = UMBRAL_CONFIANZA,
+        modelo_embeddings: str = ""
+    ) -> Tuple["ClasificadorLocal", Dict[str, Any]]:
+        """
+        Entrena con descenso de gradiente y calibra la temperatura.
+
+        Returns:
+            (modelo, reporte): el reporte trae la evaluación sobre el
+            conjunto de validación con el umbral dado (ver evaluar())
+        """
+        clases = sorted(set(etiquetas))
+        tipos = sorted(set(tipos_usuario))
+        if len(clases) < 2:
+            raise ValueError("Se necesitan al menos 2 clasificaciones distintas para entrenar")
+
+        modelo = cls(
+            np.zeros((_unitarios(vectores).shape[1] + len(tipos), len(clases)), dtype=np.float32),
+            np.zeros(len(clases), dtype=np.float32),
+            clases, tipos, 1.0, modelo_embeddings
+        )
+        x = modelo._caracteristicas(vectores, tipos_usuario)
+        y = np.array([clases.index(e) for e in etiquetas])
+
+        orden = np.random.default_rng(semilla).permutation(len(y))
+        n_validacion = int(len(y) * validacion) if len(y) * validacion >= _MIN_VALIDACION else 0
+        val, ent = orden[:n_validacion], orden[n_validacion:]
+
+        pesos, sesgo = modelo.pesos, modelo.sesgo
+        for _ in range(epocas):
+            gradiente = _softmax(x[ent] @ pesos + sesgo)
+            gradiente[np.arange(len(ent)), y[ent]] -= 1.0
+            gradiente /= len(ent)
+            pesos -= tasa * (x[ent].T @ gradiente + l2 * pesos)
+            sesgo -= tasa * gradiente.sum(axis=0)
+
+        reporte: Dict[str, Any] = {"entrenamiento": len(ent), "validacion": len(val), "clases": clases}
+        if len(val):
+            logits = x[val] @ pesos + sesgo
+            modelo.temperatura = float(min(_TEMPERATURAS, key=lambda t: _nll(logits / t, y[val])))
+            reporte.update(modelo.evaluar(
+                [vectores[i] for i in val], [tipos_usuario[i] for i in val], [etiquetas[i] for i in val], umbral
+            ))
+        reporte["temperatura"] = modelo.temperatura
+        return modelo, reporte
+
+    def evaluar(
+        self,
+        vectores: Any,
+        tipos_usuario: Sequence[str],
+        etiquetas: Sequence[str],
+        umbral: float = UMBRAL_CONFIANZA
+    ) -> Dict[str, Any]:
+        """
+        Compara contra las etiquetas del LLM.
+
+        Returns:
+            exactitud (todas las predicciones), cobertura local (fracción con
+            confianza >= umbral, que no irían al LLM) y exactitud en esa fracción
+        """
+        probabilidades = self.probabilidades(vectores, tipos_usuario)
+        predichas = [self.clases[i] for i in probabilidades.argmax(axis=1)]
+        aciertos = np.array([p == e for p, e in zip(predichas, etiquetas)])
+        locales = probabilidades.max(axis=1) >= umbral
+        return {
+            "muestras": len(etiquetas),
+            "umbral": umbral,
+            "exactitud": round(float(aciertos.mean()), 4) if len(aciertos) else 0.0,
+            "cobertura_local": round(float(locales.mean()), 4) if len(locales) else 0.0,
+            "exactitud_local": round(float(aciertos[locales].mean()), 4) if locales.any() else 0.0,
+        }
+
+    # ==================== PERSISTENCIA ====================
+
+    def guardar(self, ruta: str) -> None:
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        with open(ruta, "wb") as archivo:
+            np.savez(
+                archivo,
+                pesos=self.pesos,
+                sesgo=self.sesgo,
+                clases=np.array(self.clases),
+                tipos_usuario=np.array(self.tipos_usuario),
+                temperatura=np.float32(self.temperatura),
+                modelo_embeddings=np.array(self.modelo_embeddings),
+            )
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "ClasificadorLocal":
+        with np.load(ruta, allow_pickle=False) as datos:
+            return cls(
+                datos["pesos"],
+                datos["sesgo"],
+                [str(c) for c in datos["clases"]],
+                [str(t) for t in datos["tipos_usuario"]],
+                float(datos["temperatura"]),
+                str(datos["modelo_embeddings"]),
+            )
+
+
+def _nll(logits: np.ndarray, y: np.ndarray) -> float:
+    probabilidades = _softmax(logits)[np.arange(len(y)), y]
+    return float(-np.log(np.clip(probabilidades, 1e-12, None)).mean())
+
+
+# ==================== SINGLETON ====================
+
+_clasificador_instance: Optional[ClasificadorLocal] = None
+_clasificador_cargado = False
+_contadores = {"predicciones": 0, "locales": 0, "escaladas": 0}
+_lock = threading.Lock()
+
+
+def get_clasificador_local() -> Optional[ClasificadorLocal]:
+    """
+    Modelo entrenado (se carga una vez), o None si está desactivado, no
+    existe el archivo o se entrenó con otro modelo de embeddings.
+    """
+    global _clasificador_instance, _clasificador_cargado
+
+    if not CLASIFICADOR_HABILITADO:
+        return None
+    if not _clasificador_cargado:
+        with _lock:
+            if not _clasificador_cargado:
+                _clasificador_instance = _cargar_modelo(RUTA_MODELO)
+                _clasificador_cargado = True
+
+    return _clasificador_instance
+
+
+def _cargar_modelo(ruta: str) -> Optional[ClasificadorLocal]:
+    if not os.path.exists(ruta):
+        logger.info(f"ℹ️  Clasificador local sin entrenar ({ruta}): todo va al LLM")
+        return None
+    try:
+        modelo = ClasificadorLocal.cargar(ruta)
+    except Exception as e:
+        logger.error(f"❌ Error cargando clasificador local: {e}")
+        return None
+
+    from src.embeddings.local_embedder import get_model_version
+    version = get_model_version()
+    if modelo.modelo_embeddings and modelo.modelo_embeddings != version:
+        logger.warning(
+            f"⚠️  Clasificador local entrenado con {modelo.modelo_embeddings}, "
+            f"embeddings actuales: {version}. Reentrenar; se usa solo el LLM"
+        )
+        return None
+
+    logger.info(f"✅ Clasificador local cargado: {len(modelo.clases)} clases, T={modelo.temperatura:.2f}")
+    return modelo
+
+
+def clasificar_local(
+    modelo: ClasificadorLocal,
+    vector: Sequence[float],
+    tipo_usuario: str,
+    umbral: float = UMBRAL_CONFIANZA
+) -> Optional[Prediccion]:
+    """Predicción si la confianza llega al umbral; None = escalar al LLM."""
+    prediccion = modelo.predecir(vector, tipo_usuario)
+    local = prediccion.confianza >= umbral
+    with _lock:
+        _contadores["predicciones"] += 1
+        _contadores["locales" if local else "escaladas"] += 1
+    return prediccion if local else None
+
+
+def reset_clasificador_local() -> None:
+    """Vuelve a leer el archivo en la siguiente consulta (tras reentrenar)."""
+    global _clasificador_instance, _clasificador_cargado
+    with _lock:
+        _clasificador_instance = None
+        _clasificador_cargado = False
+
+
+def obtener_metricas_clasificador_local() -> Optional[Dict[str, Any]]:
+    """Contadores del tier local (None si no hay modelo cargado)."""
+    modelo = _clasificador_instance
+    if modelo is None:
+        return None
+    with _lock:
+        contadores = dict(_contadores)
+    return {
+        "clases": modelo.clases,
+        "umbral": UMBRAL_CONFIANZA,
+        "temperatura": modelo.temperatura,
+        **contadores,
+        "fraccion_local": round(contadores["locales"] / contadores["predicciones"], 4)
+        if contadores["predicciones"] else 0.0,
+    }
@@ -0,0 +1,224 @@
+"""
+Despachador de Mensajes por Chat (carriles FIFO + pool de ejecución)
+
+El endpoint de WhatsApp ejecutaba cada mensaje en cuanto llegaba: dos
+mensajes seguidos del mismo chat podían correr el grafo a la vez sobre el
+mismo checkpoint (thread_id) de LangGraph.
+
+Ahora cada chat_id tiene un carril FIFO:
+
+- Dentro de un carril los mensajes se procesan estrictamente en orden,
+  uno a la vez
+- Un pool global de DESPACHO_CONCURRENCIA lugares de ejecución atiende
+  carriles distintos en paralelo; un carril con varios mensajes vuelve
+  al final de la fila tras cada uno, así un chat ruidoso no acapara el pool
+- Límites de profundidad por chat y global: si se exceden, despachar()
+  lanza ColaLlenaError y el endpoint responde 503
+- Métricas de espera en carril (encolado → inicio) para /health
+
+Cada mensaje corre en la tarea de su propia petición: al terminar, cede su
+lugar del pool al siguiente carril en la fila. Un mensaje de un chat sin
+trabajo pendiente y con lugar libre arranca sin ningún salto por el event
+loop (entregarlo a tareas worker aparte sumaba una vuelta del loop a cada
+mensaje, visible en el p99 con carga).
+
+Configuración (variables de entorno):
+    DESPACHO_CONCURRENCIA      Chats procesándose a la vez (default: 64)
+    DESPACHO_MAX_COLA_CHAT     Mensajes en espera por chat (default: 20)
+    DESPACHO_MAX_COLA_TOTAL    Mensajes en espera en total (default: 2000)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(nombre: str, default: int) -> int:
+    try:
+        return int(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+CONCURRENCIA = max(1, _env_int("DESPACHO_CONCURRENCIA", 64))
+MAX_COLA_CHAT = max(1, _env_int("DESPACHO_MAX_COLA_CHAT", 20))
+MAX_COLA_TOTAL = max(1, _env_int("DESPACHO_MAX_COLA_TOTAL", 2000))
+
+# Esperas recientes para percentiles en /health
+_MUESTRAS_ESPERA = 1000
+
+Trabajo = Callable[[], Awaitable[Any]]
+
+
+class ColaLlenaError(Exception):
+    """El carril del chat o la cola global alcanzó su límite."""
+
+
+class DespachadorChats:
+    """
+    Carriles FIFO por chat_id con un pool acotado de lugares de ejecución.
+
+    Se usa solo desde el event loop (sin locks).
+
+    Uso:
+        resultado = await despachador.despachar(chat_id, lambda: procesar(mensaje))
+    """
+
+    def __init__(
+        self,
+        concurrencia: int = CONCURRENCIA,
+        max_cola_chat: int = MAX_COLA_CHAT,
+        max_cola_total: int = MAX_COLA_TOTAL
+    ):
+        self.concurrencia = concurrencia
+        self.max_cola_chat = max_cola_chat
+        self.max_cola_total = max_cola_total
+
+        # chat_id -> [(turno, encolado_en)] en espera; el carril existe
+        # mientras el chat tenga un mensaje corriendo o en espera
+        self._carriles: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {}
+        # Carriles esperando un lugar del pool (cada chat_id a lo más una
+        # vez, y nunca mientras uno de sus mensajes corre)
+        self._fila: Deque[str] = deque()
+
+        self._en_cola = 0
+        self._en_ejecucion = 0
+        self.encolados = 0
+        self.completados = 0
+        self.errores = 0
+        self.rechazados = 0
+        self._esperas_ms: Deque[float] = deque(maxlen=_MUESTRAS_ESPERA)
+        self._espera_max_ms = 0.0
+
+    async def despachar(self, chat_id: str, trabajo: Trabajo) -> Any:
+        """Ejecuta trabajo en el turno de chat_id y retorna su resultado."""
+        carril = self._carriles.get(chat_id)
+        if self._en_cola >= self.max_cola_total or (carril is not None and len(carril) >= self.max_cola_chat):
+            self.rechazados += 1
+            raise ColaLlenaError(f"Cola llena para {chat_id} ({self._en_cola} mensajes en espera)")
+        self.encolados += 1
+
+        if carril is None and self._en_ejecucion < self.concurrencia:
+            # Chat sin trabajo y lugar libre: corre ya
+            self._carriles[chat_id] = deque()
+            self._en_ejecucion += 1
+            self._registrar_espera(0.0)
+        else:
+            await self._esperar_turno(chat_id, carril)
+
+        try:
+            resultado = await trabajo()
+        except Exception:
+            self.errores += 1
+            raise
+        else:
+            self.completados += 1
+            return resultado
+        finally:
+            self._liberar(chat_id)
+
+    async def _esperar_turno(self, chat_id: str, carril: Optional[Deque]) -> None:
+        encolado_en = time.monotonic()
+        turno = asyncio.get_running_loop().create_future()
+        if carril is None:
+            carril = self._carriles[chat_id] = deque()
+            self._fila.append(chat_id)
+        carril.append((turno, encolado_en))
+        self._en_cola += 1
+
+        try:
+            await turno
+        except asyncio.CancelledError:
+            if turno.done() and not turno.cancelled():
+                # El turno llegó junto con la cancelación: ceder el lugar
+                self._liberar(chat_id)
+            # Si no, _liberar() descarta el turno cancelado al llegar a él
+            raise
+
+        self._registrar_espera((time.monotonic() - encolado_en) * 1000.0)
+
+    def _liberar(self, chat_id: str) -> None:
+        """Termina el mensaje en curso de chat_id y cede su lugar del pool."""
+        if self._carriles[chat_id]:
+            # El siguiente mensaje del chat va al final de la fila
+            self._fila.append(chat_id)
+        else:
+            del self._carriles[chat_id]
+
+        while self._fila:
+            siguiente = self._fila.popleft()
+            carril = self._carriles[siguiente]
+            while carril:
+                turno, _ = carril.popleft()
+                self._en_cola -= 1
+                if not turno.done():
+                    turno.set_result(None)  # El lugar pasa a este mensaje
+                    return
+            # Todos los mensajes del carril se cancelaron mientras esperaban
+            del self._carriles[siguiente]
+
+        self._en_ejecucion -= 1
+
+    def _registrar_espera(self, espera_ms: float) -> None:
+        self._esperas_ms.append(espera_ms)
+        self._espera_max_ms = max(self._espera_max_ms, espera_ms)
+
+    async def detener(self, timeout: float = 30.0) -> None:
+        """Espera a que terminen los mensajes en curso y en espera."""
+        limite = time.monotonic() + timeout
+        while (self._en_cola or self._en_ejecucion) and time.monotonic() < limite:
+            await asyncio.sleep(0.05)
+        if self._en_cola or self._en_ejecucion:
+            logger.warning(f"⚠️  Despachador detenido con {self._en_cola + self._en_ejecucion} mensajes sin terminar")
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        esperas = sorted(self._esperas_ms)
+        return {
+            "concurrencia": self.concurrencia,
+            "carriles_activos": len(self._carriles),
+            "en_cola": self._en_cola,
+            "en_ejecucion": self._en_ejecucion,
+            "max_cola_chat": self.max_cola_chat,
+            "max_cola_total": self.max_cola_total,
+            "encolados": self.encolados,
+            "completados": self.completados,
+            "errores": self.errores,
+            "rechazados": self.rechazados,
+            "espera_promedio_ms": round(sum(esperas) / len(esperas), 2) if esperas else 0.0,
+            "espera_p95_ms": round(esperas[min(len(esperas) - 1, int(len(esperas) * 0.95))], 2) if esperas else 0.0,
+            "espera_max_ms": round(self._espera_max_ms, 2),
+        }
+
+
+# ==================== SINGLETON ====================
+
+_despachador_instance: Optional[DespachadorChats] = None
+
+
+def get_despachador_chats() -> DespachadorChats:
+    """Despachador del proceso (singleton; solo desde el event loop)."""
+    global _despachador_instance
+
+    if _despachador_instance is None:
+        _despachador_instance = DespachadorChats()
+
+    return _despachador_instance
+
+
+async def detener_despachador() -> None:
+    """Espera a que se vacíen los carriles y descarta el despachador (shutdown)."""
+    global _despachador_instance
+    despachador, _despachador_instance = _despachador_instance, None
+    if despachador is not None:
+        await despachador.detener()
+
+
+def obtener_metricas_despacho() -> Optional[Dict[str, Any]]:
+    """Contadores del despachador sin crearlo (None si aún no se usó)."""
+    despachador = _despachador_instance
+    return despachador.obtener_metricas() if despachador is not None else None
@@ -0,0 +1,74 @@
+"""
+Matcher de Palabras Clave Precompilado (routing y extracción)
+
+El routing y la extracción revisaban cada mensaje con varios
+any(kw in mensaje_lower for kw in ...) seguidos, uno por lista de
+palabras. MatcherPalabras compila todas las palabras de todas las
+categorías en una sola expresión regular al importar el módulo y
+devuelve en una pasada todas las categorías presentes en el mensaje.
+
+- Sin acentos ni mayúsculas: "Qué tal", "que tal" y "QUE TAL" coinciden
+  igual, en patrones y en mensajes ("mañana" ↔ "manana")
+- Misma semántica que `kw in mensaje`: coincidencia por subcadena,
+  también solapadas ("pasado mañana" reporta "pasado mañana" y "mañana")
+
+Uso:
+    MATCHER = MatcherPalabras({"saludo": ["hola", "buenos días"], "accion": ["cita"]})
+    MATCHER.categorias("Hola, quiero una cita")  # {"saludo", "accion"}
+"""
+
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Pattern
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin acentos/diacríticos ("Mañana Sábado" → "manana sabado")."""
+    descompuesto = unicodedata.normalize("NFD", texto.lower())
+    return "".join(c for c in descompuesto if unicodedata.category(c) != "Mn")
+
+
+def compilar_alternativas(palabras: Iterable[str], flags: int = 0) -> Pattern[str]:
+    """Una alternancia (la más larga primero) con las palabras escapadas."""
+    unicas = sorted(set(palabras), key=lambda p: (-len(p), p))
+    return re.compile("|".join(re.escape(p) for p in unicas), flags)
+
+
+class MatcherPalabras:
+    """
+    Categorías → palabras clave, compiladas una vez.
+
+    La regex es un lookahead sobre la alternancia, así que se prueba en cada
+    posición del mensaje: en cada una gana el patrón más largo, y como todo
+    patrón que coincide en esa posición es prefijo del más largo, cada
+    patrón lleva precalculadas las categorías de sus prefijos.
+    """
+
+    def __init__(self, categorias: Mapping[str, Iterable[str]]):
+        por_patron: Dict[str, set] = {}
+        for categoria, palabras in categorias.items():
+            for palabra in palabras:
+                patron = normalizar(palabra)
+                if patron:
+                    por_patron.setdefault(patron, set()).add(categoria)
+        if not por_patron:
+            raise ValueError("MatcherPalabras necesita al menos una palabra clave")
+
+        self._categorias_de: Dict[str, FrozenSet[str]] = {
+            patron: frozenset().union(*(
+                cats for otro, cats in por_patron.items() if patron.startswith(otro)
+            ))
+            for patron in por_patron
+        }
+        self._regex = re.compile(f"(?=({compilar_alternativas(por_patron).pattern}))")
+
+    def patrones(self, texto: str) -> List[str]:
+        """Patrones (normalizados) más largos que coinciden, en orden de aparición."""
+        return [m.group(1) for m in self._regex.finditer(normalizar(texto))]
+
+    def categorias(self, texto: str) -> FrozenSet[str]:
+        """Todas las categorías con alguna palabra presente en el texto."""
+        encontradas: FrozenSet[str] = frozenset()
+        for patron in self.patrones(texto):
+            encontradas |= self._categorias_de[patron]
+        return encontradas
@@ -0,0 +1,255 @@
+"""
+Registro de Actividad con Escritura Diferida (write-behind)
+
+Cada mensaje hacía UPDATE síncronos de usuarios.last_seen
+(identificacion_usuario_node) y user_sessions.last_activity
+(session_manager y cache_sesion_node): locks de fila y un commit por
+mensaje en el camino crítico.
+
+Ahora cada mensaje solo anota la actividad en memoria. Un hilo vacía lo
+acumulado cada ACTIVIDAD_FLUSH_SEG con un único
+`UPDATE ... FROM (VALUES ...)` por tabla:
+
+- Varios mensajes del mismo usuario/sesión se colapsan en una fila
+  (el timestamp más reciente y la suma de mensajes)
+- GREATEST() evita retroceder last_activity si otro worker ya escribió
+  un valor más nuevo
+- Si el flush falla, lo pendiente se reintegra para el siguiente ciclo
+- La decisión de la ventana de 24h usa ultima_actividad_sesion(), que ve
+  lo pendiente aunque aún no llegue a PostgreSQL
+- flush final al apagar (detener_registro_actividad() en el lifespan)
+
+Configuración (variables de entorno):
+    ACTIVIDAD_FLUSH_SEG  Intervalo entre escrituras en lote (default: 5)
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from src.medical.connection_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+FLUSH_SEG = max(0.1, _env_float("ACTIVIDAD_FLUSH_SEG", 5.0))
+
+# (user_id, thread_id) -> [última actividad, mensajes acumulados]
+ClaveSesion = Tuple[str, str]
+
+
+class RegistroActividad:
+    """
+    Actividad pendiente de escribir (thread-safe).
+
+    - tocar_usuario(): last_seen de usuarios
+    - tocar_sesion(): last_activity (+ messages_count) de user_sessions
+    - flush(): escribe todo lo pendiente en un lote por tabla
+    """
+
+    def __init__(self, flush_seg: float = FLUSH_SEG):
+        self.flush_seg = flush_seg
+
+        self._usuarios: Dict[str, datetime] = {}
+        self._sesiones: Dict[ClaveSesion, list] = {}
+        # Lote que se está escribiendo: sigue visible para la ventana de 24h
+        self._sesiones_en_vuelo: Dict[ClaveSesion, list] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+        self.toques = 0
+        self.flushes = 0
+        self.filas_escritas = 0
+        self.errores = 0
+
+    # ---------- Registro en memoria ----------
+
+    def tocar_usuario(self, phone_number: str, cuando: Optional[datetime] = None) -> None:
+        cuando = cuando or datetime.now()
+        with self._lock:
+            previo = self._usuarios.get(phone_number)
+            if previo is None or cuando > previo:
+                self._usuarios[phone_number] = cuando
+            self.toques += 1
+        self._asegurar_hilo()
+
+    def tocar_sesion(
+        self,
+        user_id: str,
+        thread_id: str,
+        mensajes: int = 0,
+        cuando: Optional[datetime] = None
+    ) -> None:
+        cuando = cuando or datetime.now()
+        with self._lock:
+            pendiente = self._sesiones.get((user_id, thread_id))
+            if pendiente is None:
+                self._sesiones[(user_id, thread_id)] = [cuando, mensajes]
+            else:
+                pendiente[0] = max(pendiente[0], cuando)
+                pendiente[1] += mensajes
+            self.toques += 1
+        self._asegurar_hilo()
+
+    def ultima_actividad_sesion(self, user_id: str, thread_id: Optional[str] = None) -> Optional[Tuple[str, datetime]]:
+        """
+        (thread_id, última actividad) aún no escrita en BD para el usuario.
+
+        Con thread_id solo considera ese thread; sin él, el más reciente.
+        """
+        mejor: Optional[Tuple[str, datetime]] = None
+        with self._lock:
+            for pendientes in (self._sesiones, self._sesiones_en_vuelo):
+                for (uid, tid), (cuando, _) in pendientes.items():
+                    if uid != user_id or (thread_id is not None and tid != thread_id):
+                        continue
+                    if mejor is None or cuando > mejor[1]:
+                        mejor = (tid, cuando)
+        return mejor
+
+    # ---------- Escritura en lote ----------
+
+    def flush(self) -> int:
+        """Escribe lo pendiente (un UPDATE por tabla). Retorna filas enviadas."""
+        with self._flush_lock:
+            with self._lock:
+                usuarios, self._usuarios = self._usuarios, {}
+                sesiones, self._sesiones = self._sesiones, {}
+                self._sesiones_en_vuelo = sesiones
+
+            if not usuarios and not sesiones:
+                return 0
+
+            try:
+                with get_connection() as conn:
+                    with conn.cursor() as cur:
+                        if usuarios:
+                            valores = ", ".join(["(%s::text, %s::timestamp)"] * len(usuarios))
+                            cur.execute(f"""
+                                UPDATE usuarios AS u
+                                SET last_seen = GREATEST(u.last_seen, v.cuando)
+                                FROM (VALUES {valores}) AS v(phone_number, cuando)
+                                WHERE u.phone_number = v.phone_number
+                            """, [x for par in usuarios.items() for x in par])
+
+                        if sesiones:
+                            valores = ", ".join(["(%s::text, %s::text, %s::timestamp, %s::int)"] * len(sesiones))
+                            params = []
+                            for (user_id, thread_id), (cuando, mensajes) in sesiones.items():
+                                params += [user_id, thread_id, cuando, mensajes]
+                            cur.execute(f"""
+                                UPDATE user_sessions AS s
+                                SET last_activity = GREATEST(s.last_activity, v.cuando),
+                                    messages_count = COALESCE(s.messages_count, 0) + v.mensajes
+                                FROM (VALUES {valores}) AS v(user_id, thread_id, cuando, mensajes)
+                                WHERE s.user_id = v.user_id AND s.thread_id = v.thread_id
+                            """, params)
+
+            except Exception as e:
+                logger.error(f"❌ Error escribiendo actividad ({len(usuarios)} usuarios, {len(sesiones)} sesiones): {e}")
+                with self._lock:
+                    self.errores += 1
+                    self._reintegrar(usuarios, sesiones)
+                    self._sesiones_en_vuelo = {}
+                return 0
+
+            filas = len(usuarios) + len(sesiones)
+            with self._lock:
+                self._sesiones_en_vuelo = {}
+                self.flushes += 1
+                self.filas_escritas += filas
+            logger.debug(f"💾 Actividad escrita: {len(usuarios)} usuarios, {len(sesiones)} sesiones")
+            return filas
+
+    def _reintegrar(self, usuarios: Dict[str, datetime], sesiones: Dict[ClaveSesion, list]) -> None:
+        # Se llama con self._lock tomado; mezcla con lo que llegó mientras tanto
+        for phone_number, cuando in usuarios.items():
+            previo = self._usuarios.get(phone_number)
+            if previo is None or cuando > previo:
+                self._usuarios[phone_number] = cuando
+        for clave, (cuando, mensajes) in sesiones.items():
+            pendiente = self._sesiones.get(clave)
+            if pendiente is None:
+                self._sesiones[clave] = [cuando, mensajes]
+            else:
+                pendiente[0] = max(pendiente[0], cuando)
+                pendiente[1] += mensajes
+
+    # ---------- Hilo de fondo ----------
+
+    def _asegurar_hilo(self) -> None:
+        if self._hilo is not None or self._detener.is_set():
+            return
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name="registro_actividad", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        while not self._detener.wait(self.flush_seg):
+            self.flush()
+
+    def detener(self) -> None:
+        """Detiene el hilo y escribe lo pendiente."""
+        self._detener.set()
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout=self.flush_seg + 5)
+        self.flush()
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "usuarios_pendientes": len(self._usuarios),
+                "sesiones_pendientes": len(self._sesiones),
+                "flush_seg": self.flush_seg,
+                "toques": self.toques,
+                "flushes": self.flushes,
+                "filas_escritas": self.filas_escritas,
+                "errores": self.errores,
+            }
+
+
+# ==================== SINGLETON ====================
+
+_registro_instance: Optional[RegistroActividad] = None
+_registro_lock = threading.Lock()
+
+
+def get_registro_actividad() -> RegistroActividad:
+    """Registro de actividad del proceso (singleton)."""
+    global _registro_instance
+
+    if _registro_instance is None:
+        with _registro_lock:
+            if _registro_instance is None:
+                _registro_instance = RegistroActividad()
+
+    return _registro_instance
+
+
+def detener_registro_actividad() -> None:
+    """Flush final y descarta el registro (shutdown del servidor o tests)."""
+    global _registro_instance
+    with _registro_lock:
+        registro, _registro_instance = _registro_instance, None
+    if registro is not None:
+        registro.detener()
+
+
+def obtener_metricas_actividad() -> Optional[Dict[str, Any]]:
+    """Contadores del registro sin crearlo (None si aún no se usó)."""
+    registro = _registro_instance
+    return registro.obtener_metricas() if registro is not None else None
@@ -0,0 +1,161 @@
+"""
+Registro de Sesiones Activas (thread_id por user_id)
+
+get_or_create_session hacía rollback + SELECT ORDER BY last_activity en
+cada mensaje para decidir la ventana de 24h. Este registro guarda en
+memoria el thread activo y la última actividad de cada usuario:
+
+- Hit: el thread sigue en la ventana de 24h → se reusa sin tocar
+  PostgreSQL (la actividad va a registro_actividad, escritura en lote)
+- Miss, sesión vencida en memoria o entrada sin revalidar por más de
+  SESIONES_REVALIDAR_SEG → se consulta la BD como antes
+- LRU con SESIONES_CACHE_MAX usuarios
+
+Varios workers de uvicorn: cada uno tiene su registro, pero la BD sigue
+siendo la fuente de verdad. Una sesión vencida en memoria siempre se
+confirma en la BD (otro worker pudo haber tenido actividad) y las
+entradas se revalidan periódicamente, así un thread creado por otro
+worker se adopta en a lo más SESIONES_REVALIDAR_SEG.
+
+Configuración (variables de entorno):
+    SESIONES_CACHE_MAX            Usuarios en memoria, LRU (default: 10000)
+    SESIONES_REVALIDAR_SEG        Antigüedad máxima de una entrada antes de
+                                  volver a consultar la BD (default: 300)
+"""
+
+import logging
+import os
+import threading
+import time as _time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(nombre: str, default: int) -> int:
+    try:
+        return int(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+def _env_float(nombre: str, default: float) -> float:
+    try:
+        return float(os.getenv(nombre, default))
+    except ValueError:
+        return default
+
+
+CACHE_MAX = max(1, _env_int("SESIONES_CACHE_MAX", 10000))
+REVALIDAR_SEG = max(0.0, _env_float("SESIONES_REVALIDAR_SEG", 300.0))
+VENTANA_SESION = timedelta(hours=24)
+
+
+class RegistroSesiones:
+    """
+    Thread activo por usuario con LRU y revalidación periódica (thread-safe).
+
+    - resolver(): thread_id si la sesión en memoria sigue vigente
+    - guardar(): resultado de la consulta (o creación) en la BD
+    """
+
+    def __init__(
+        self,
+        max_entradas: int = CACHE_MAX,
+        revalidar_seg: float = REVALIDAR_SEG,
+        ventana: timedelta = VENTANA_SESION
+    ):
+        self.max_entradas = max_entradas
+        self.revalidar_seg = revalidar_seg
+        self.ventana = ventana
+
+        # user_id -> (thread_id, última actividad, verificado_en monotonic)
+        self._entradas: "OrderedDict[str, Tuple[str, datetime, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.vencidas = 0
+
+    def resolver(self, user_id: str, ahora: Optional[datetime] = None) -> Optional[str]:
+        """thread_id vigente (y registra la actividad en memoria) o None si hay que ir a la BD."""
+        ahora = ahora or datetime.now()
+        with self._lock:
+            entrada = self._entradas.get(user_id)
+            if entrada is None:
+                self.misses += 1
+                return None
+
+            thread_id, ultima_actividad, verificado_en = entrada
+            if ahora - ultima_actividad >= self.ventana or _time.monotonic() - verificado_en > self.revalidar_seg:
+                # Vencida o vieja: la BD decide (otro worker pudo escribir)
+                del self._entradas[user_id]
+                self.vencidas += 1
+                return None
+
+            self._entradas[user_id] = (thread_id, max(ultima_actividad, ahora), verificado_en)
+            self._entradas.move_to_end(user_id)
+            self.hits += 1
+            return thread_id
+
+    def guardar(self, user_id: str, thread_id: str, ultima_actividad: Optional[datetime] = None) -> None:
+        """Guarda el thread resuelto contra la BD."""
+        with self._lock:
+            self._entradas[user_id] = (thread_id, ultima_actividad or datetime.now(), _time.monotonic())
+            self._entradas.move_to_end(user_id)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def olvidar(self, user_id: Optional[str] = None) -> None:
+        """Descarta un usuario (o todo si user_id es None)."""
+        with self._lock:
+            if user_id is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(user_id, None)
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.hits + self.misses + self.vencidas
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "revalidar_seg": self.revalidar_seg,
+                "hits": self.hits,
+                "misses": self.misses,
+                "vencidas": self.vencidas,
+                "hit_rate": round(self.hits / consultas, 4) if consultas else 0.0,
+            }
+
+
+# ==================== SINGLETON ====================
+
+_registro_instance: Optional[RegistroSesiones] = None
+_registro_lock = threading.Lock()
+
+
+def get_registro_sesiones() -> RegistroSesiones:
+    """Registro de sesiones del proceso (singleton)."""
+    global _registro_instance
+
+    if _registro_instance is None:
+        with _registro_lock:
+            if _registro_instance is None:
+                _registro_instance = RegistroSesiones()
+
+    return _registro_instance
+
+
+def reset_registro_sesiones() -> None:
+    """Descarta el registro (tests o cambio de configuración)."""
+    global _registro_instance
+    with _registro_lock:
+        _registro_instance = None
+
+
+def obtener_metricas_sesiones() -> Optional[Dict[str, Any]]:
+    """Contadores del registro sin crearlo (None si aún no se usó)."""
+    registro = _registro_instance
+    return registro.obtener_metricas() if registro is not None else None
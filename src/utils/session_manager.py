@@ -8,6 +8,10 @@ IMPORTANTE:
 - NO usa fecha del día (evita pérdida de contexto a medianoche)
 - USA timestamp del último mensaje para calcular inactividad
 - Thread se mantiene mientras haya actividad < 24h
+- last_activity se escribe en lote (registro_actividad); la ventana de 24h
+  usa el valor en memoria si es más reciente que el de la BD
+- El thread activo de cada usuario se recuerda en memoria
+  (registro_sesiones): solo se consulta la BD en un miss o al vencer
 """
 
 import hashlib
@@ -15,9 +19,13 @@ import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Tuple, Optional
 import psycopg
+from psycopg_pool import ConnectionPool
 import os
 from dotenv import load_dotenv
 
+from src.utils.registro_actividad import get_registro_actividad
+from src.utils.registro_sesiones import get_registro_sesiones
+
 load_dotenv()
 
 
@@ -95,11 +103,34 @@ def create_session_config(phone_number: str) -> Dict:
     }
 
 
+def _ultima_actividad(user_id: str, thread_id: str, last_activity_bd: datetime) -> datetime:
+    """last_activity más reciente entre la BD y lo pendiente de escribir."""
+    pendiente = get_registro_actividad().ultima_actividad_sesion(user_id, thread_id)
+    if pendiente and pendiente[1] > last_activity_bd:
+        return pendiente[1]
+    return last_activity_bd
+
+
+def _sesion_en_memoria(user_id: str) -> Optional[Tuple[str, str, Dict]]:
+    """Sesión vigente según registro_sesiones (None = consultar la BD)."""
+    thread_id = get_registro_sesiones().resolver(user_id)
+    if thread_id is None:
+        return None
+
+    get_registro_actividad().tocar_sesion(user_id, thread_id)
+    return (
+        user_id,
+        thread_id,
+        {'configurable': {'thread_id': thread_id}}
+    )
+
+
 def get_or_create_session(phone_number: str, db_connection=None) -> Tuple[str, str, Dict]:
     """
     ✅ ROLLING WINDOW CORRECTO: Obtiene sesión activa o crea nueva basándose en INACTIVIDAD.
     
     Lógica:
+    0. Si el thread del usuario está en memoria y vigente → REUSAR sin BD
     1. Busca última sesión del usuario en BD
     2. Si last_activity < 24h → REUSAR thread (conversación continúa)
     3. Si last_activity >= 24h → NUEVO thread (sesión expiró)
@@ -107,7 +138,10 @@ def get_or_create_session(phone_number: str, db_connection=None) -> Tuple[str, s
     
     Args:
         phone_number: Número de WhatsApp
-        db_connection: Conexión a PostgreSQL (opcional, para testing puede ser None)
+        db_connection: Conexión a PostgreSQL o ConnectionPool compartido
+            (src.medical.connection_pool.get_connection_pool()); si es un pool se
+            toma una conexión solo durante la consulta. Opcional, para testing
+            puede ser None.
         
     Returns:
         Tuple de (user_id, session_id, config)
@@ -134,6 +168,29 @@ def get_or_create_session(phone_number: str, db_connection=None) -> Tuple[str, s
             {'configurable': {'thread_id': session_id}}
         )
     
+    sesion = _sesion_en_memoria(user_id)
+    if sesion is not None:
+        return sesion
+    
+    # Pool compartido: tomar una conexión solo durante la consulta
+    if isinstance(db_connection, ConnectionPool):
+        try:
+            with db_connection.connection() as conn:
+                return _get_or_create_session_bd(user_id, conn)
+        except Exception as e:
+            print(f"⚠️  Pool de BD no disponible, usando fallback: {e}")
+            session_id = generate_new_thread_id(user_id)
+            return (
+                user_id,
+                session_id,
+                {'configurable': {'thread_id': session_id}}
+            )
+    
+    return _get_or_create_session_bd(user_id, db_connection)
+
+
+def _get_or_create_session_bd(user_id: str, db_connection) -> Tuple[str, str, Dict]:
+    """Rolling window contra user_sessions (miss de registro_sesiones)."""
     try:
         # Limpiar cualquier transacción abortada previa
         try:
@@ -156,17 +213,14 @@ def get_or_create_session(phone_number: str, db_connection=None) -> Tuple[str, s
         
         if result:
             existing_thread_id, last_activity = result
+            last_activity = _ultima_actividad(user_id, existing_thread_id, last_activity)
             time_since_activity = datetime.now() - last_activity
             
             # ✅ ROLLING WINDOW: Si < 24h, reusar thread
             if time_since_activity < timedelta(hours=24):
-                # Actualizar timestamp de actividad
-                cursor.execute("""
-                    UPDATE user_sessions
-                    SET last_activity = NOW()
-                    WHERE user_id = %s AND thread_id = %s
-                """, (user_id, existing_thread_id))
-                db_connection.commit()
+                # Actualizar timestamp de actividad (escritura en lote)
+                get_registro_actividad().tocar_sesion(user_id, existing_thread_id)
+                get_registro_sesiones().guardar(user_id, existing_thread_id)
                 
                 print(f"♻️  Reusando thread (inactividad: {time_since_activity.total_seconds()/3600:.1f}h)")
                 
@@ -189,6 +243,7 @@ def get_or_create_session(phone_number: str, db_connection=None) -> Tuple[str, s
             DO UPDATE SET last_activity = NOW()
         """, (user_id, new_thread_id))
         db_connection.commit()
+        get_registro_sesiones().guardar(user_id, new_thread_id)
         
         print(f"🆕 Nuevo thread creado: {new_thread_id}")
         
@@ -209,6 +264,105 @@ def get_or_create_session(phone_number: str, db_connection=None) -> Tuple[str, s
         )
 
 
+async def aget_or_create_session(phone_number: str, pool=None) -> Tuple[str, str, Dict]:
+    """
+    Versión async de get_or_create_session() para el endpoint de FastAPI.
+    
+    Misma lógica de rolling window (24h de inactividad), pero usando una
+    conexión del AsyncConnectionPool para no bloquear el event loop
+    mientras se consulta PostgreSQL.
+    
+    Args:
+        phone_number: Número de WhatsApp
+        pool: AsyncConnectionPool (opcional; si es None se crea sesión nueva sin BD)
+        
+    Returns:
+        Tuple de (user_id, session_id, config)
+    """
+    user_id = generate_user_id(phone_number)
+    
+    # Sin pool, crear sesión nueva (fallback para testing)
+    if pool is None:
+        session_id = generate_new_thread_id(user_id)
+        return (
+            user_id,
+            session_id,
+            {'configurable': {'thread_id': session_id}}
+        )
+    
+    sesion = _sesion_en_memoria(user_id)
+    if sesion is not None:
+        return sesion
+    
+    try:
+        async with pool.connection() as conn:
+            async with conn.cursor() as cursor:
+                # Buscar última sesión activa del usuario
+                await cursor.execute("""
+                    SELECT thread_id, last_activity
+                    FROM user_sessions
+                    WHERE user_id = %s
+                    ORDER BY last_activity DESC
+                    LIMIT 1
+                """, (user_id,))
+                
+                result = await cursor.fetchone()
+                
+                if result:
+                    if isinstance(result, dict):
+                        existing_thread_id = result['thread_id']
+                        last_activity = result['last_activity']
+                    else:
+                        existing_thread_id, last_activity = result
+                    last_activity = _ultima_actividad(user_id, existing_thread_id, last_activity)
+                    time_since_activity = datetime.now() - last_activity
+                    
+                    # ✅ ROLLING WINDOW: Si < 24h, reusar thread
+                    if time_since_activity < timedelta(hours=24):
+                        # Actualizar timestamp de actividad (escritura en lote)
+                        get_registro_actividad().tocar_sesion(user_id, existing_thread_id)
+                        get_registro_sesiones().guardar(user_id, existing_thread_id)
+                        
+                        print(f"♻️  Reusando thread (inactividad: {time_since_activity.total_seconds()/3600:.1f}h)")
+                        
+                        return (
+                            user_id,
+                            existing_thread_id,
+                            {'configurable': {'thread_id': existing_thread_id}}
+                        )
+                    else:
+                        print(f"⏰ Sesión expirada (inactividad: {time_since_activity.total_seconds()/3600:.1f}h)")
+                
+                # Crear nuevo thread (usuario nuevo O sesión expirada)
+                new_thread_id = generate_new_thread_id(user_id)
+                
+                await cursor.execute("""
+                    INSERT INTO user_sessions (user_id, thread_id, last_activity)
+                    VALUES (%s, %s, NOW())
+                    ON CONFLICT (user_id, thread_id) 
+                    DO UPDATE SET last_activity = NOW()
+                """, (user_id, new_thread_id))
+        
+        # Ya con commit (al salir de pool.connection())
+        get_registro_sesiones().guardar(user_id, new_thread_id)
+        print(f"🆕 Nuevo thread creado: {new_thread_id}")
+        
+        return (
+            user_id,
+            new_thread_id,
+            {'configurable': {'thread_id': new_thread_id}}
+        )
+    
+    except Exception as e:
+        print(f"⚠️  Error en BD, usando fallback: {e}")
+        session_id = generate_new_thread_id(user_id)
+        return (
+            user_id,
+            session_id,
+            {'configurable': {'thread_id': session_id}}
+        )
+
+
 # ============================================================================
 # EJEMPLO DE USO EN PRODUCCIÓN CON ROLLING WINDOW
 # ============================================================================
@@ -300,10 +454,10 @@ $$ LANGUAGE plpgsql;
 
 from src.utils.session_manager import get_or_create_session
 from src.graph_whatsapp import crear_grafo
-import psycopg
+from src.medical.connection_pool import get_connection_pool
 
-# Conectar a BD
-conn = psycopg.connect(os.getenv('DATABASE_URL'))
+# Pool compartido (una conexión por petición, segura con concurrencia)
+pool = get_connection_pool()
 
 # Handler de mensajes entrantes
 @app.post("/webhook/whatsapp")
@@ -313,7 +467,7 @@ async def handle_whatsapp_message(request):
     message_text = request.json['message']   # "¿Tengo citas hoy?"
     
     # ✅ ROLLING WINDOW: Obtener o crear sesión
-    user_id, thread_id, config = get_or_create_session(phone_number, conn)
+    user_id, thread_id, config = get_or_create_session(phone_number, pool)
     
     # Logs para debugging
     print(f"📱 Mensaje de {phone_number}")
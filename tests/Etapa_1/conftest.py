@@ -0,0 +1,15 @@
+"""
+Los fixtures de esta etapa escriben en usuarios/doctores directo con psycopg,
+sin pasar por las funciones que invalidan el cache de identidad.
+"""
+
+import pytest
+
+from src.utils.cache_identidad import reset_cache_identidad
+
+
+@pytest.fixture(autouse=True)
+def cache_identidad_limpio():
+    reset_cache_identidad()
+    yield
+    reset_cache_identidad()
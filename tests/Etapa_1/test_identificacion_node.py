@@ -197,7 +197,7 @@ def test_nodo_identifica_usuario_existente(estado_inicial, phone_admin):
 def test_nodo_identifica_doctor(estado_inicial):
     """Test 1.12: Doctor obtiene su doctor_id en el estado"""
     # Crear un doctor de prueba primero
-    from src.nodes.identificacion_usuario_node import DATABASE_URL
+    from src.medical.connection_pool import DATABASE_URL
     import psycopg
     
     phone_doctor = f"+52664DOC{datetime.now().microsecond % 1000}"
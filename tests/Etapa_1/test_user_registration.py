@@ -18,9 +18,9 @@ from src.nodes.identificacion_usuario_node import (
     crear_usuario_nuevo,
     consultar_usuario_bd,
     actualizar_ultima_actividad,
-    nodo_identificacion_usuario,
-    DATABASE_URL
+    nodo_identificacion_usuario
 )
+from src.medical.connection_pool import DATABASE_URL
 import psycopg
 
 
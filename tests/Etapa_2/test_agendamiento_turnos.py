@@ -15,11 +15,11 @@ import pytz
 
 from src.medical.turnos import (
     obtener_siguiente_doctor_turno,
-    actualizar_control_turnos,
-    DATABASE_URL
+    actualizar_control_turnos
 )
 from src.medical.disponibilidad import check_doctor_availability
 from src.medical.slots import generar_slots_con_turnos
+from src.medical.connection_pool import DATABASE_URL
 import psycopg
 
 
@@ -21,7 +21,7 @@ from src.medical.slots import (
     TIMEZONE,
     DIAS_ATENCION
 )
-from src.medical.turnos import DATABASE_URL
+from src.medical.connection_pool import DATABASE_URL
 import psycopg
 
 
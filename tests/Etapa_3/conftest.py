@@ -93,6 +93,11 @@ def mock_db_connection(mocker):
     
     mocker.patch('psycopg.connect', return_value=mock_conn)
     
+    # Los nodos toman conexiones del pool compartido
+    mock_pool = MagicMock()
+    mock_pool.connection.return_value = mock_conn
+    mocker.patch('src.medical.connection_pool.get_connection_pool', return_value=mock_pool)
+    
     return mock_conn
 
 
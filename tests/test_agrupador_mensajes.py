@@ -0,0 +1,112 @@
+"""
+Tests del agrupador de ráfagas (src/utils/agrupador_mensajes.py)
+
+✅ "hola" / "quiero" / "una cita" / "para mañana" → un solo turno
+✅ Estado activo del recepcionista → sin ventana
+✅ Espera máxima y número máximo de fragmentos
+✅ Un fragmento absorbido responde en cuanto llega el siguiente
+✅ Endpoint: una sola ejecución del grafo por ráfaga
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import app as servidor
+from src.utils.agrupador_mensajes import AgrupadorMensajes
+
+FRAGMENTOS = ["hola", "quiero", "una cita", "para mañana"]
+
+
+async def _rafaga(agrupador, chat_id, textos, separacion_s):
+    tareas = []
+    for texto in textos:
+        tareas.append(asyncio.ensure_future(agrupador.agrupar(chat_id, texto)))
+        await asyncio.sleep(separacion_s)
+    return await asyncio.gather(*tareas)
+
+
+def test_rafaga_un_solo_turno():
+    agrupador = AgrupadorMensajes(ventana_ms=100, max_espera_ms=2000)
+
+    resultados = asyncio.run(_rafaga(agrupador, "chat_1", FRAGMENTOS, 0.02))
+
+    assert resultados == [None, None, None, "hola\nquiero\nuna cita\npara mañana"]
+    metricas = agrupador.obtener_metricas()
+    assert metricas["turnos"] == 1 and metricas["absorbidos"] == 3 and metricas["rafagas_abiertas"] == 0
+
+
+def test_estado_activo_sin_ventana():
+    agrupador = AgrupadorMensajes(ventana_ms=500)
+    agrupador.registrar_estado("chat_1", "confirmando_cita")
+
+    inicio = time.perf_counter()
+    resultados = asyncio.run(_rafaga(agrupador, "chat_1", ["sí", "gracias"], 0))
+
+    assert resultados == ["sí", "gracias"]
+    assert time.perf_counter() - inicio < 0.25
+    assert agrupador.obtener_metricas()["sin_espera"] == 2
+
+    agrupador.registrar_estado("chat_1", "completado")
+    assert asyncio.run(_rafaga(agrupador, "chat_1", ["hola", "otra cosa"], 0)) == [None, "hola\notra cosa"]
+
+
+def test_espera_maxima_y_max_mensajes():
+    agrupador = AgrupadorMensajes(ventana_ms=100, max_espera_ms=150)
+    # Fragmentos cada 60ms: la ventana nunca se cumple, la espera máxima sí
+    resultados = asyncio.run(_rafaga(agrupador, "chat_1", [f"m{i}" for i in range(6)], 0.06))
+
+    turnos = [r for r in resultados if r is not None]
+    assert len(turnos) >= 2
+    assert "\n".join(turnos).split("\n") == [f"m{i}" for i in range(6)]  # Nada se pierde ni se reordena
+
+    agrupador = AgrupadorMensajes(ventana_ms=1000, max_mensajes=3)
+    inicio = time.perf_counter()
+    resultados = asyncio.run(_rafaga(agrupador, "chat_2", ["a", "b", "c"], 0))
+
+    assert resultados == [None, None, "a\nb\nc"]
+    assert time.perf_counter() - inicio < 0.5  # Nadie espera la ventana completa
+
+
+class GrafoFake:
+    def __init__(self):
+        self.turnos = []
+
+    async def ainvoke(self, estado, config):
+        self.turnos.append(estado["messages"][0].content)
+        return {"messages": [{"content": "¿Para qué hora?"}], "estado_conversacion": "inicial"}
+
+
+async def _sesion_fake(phone_number, pool=None):
+    return phone_number, "thread_1", {"configurable": {"thread_id": "thread_1"}}
+
+
+def test_endpoint_una_ejecucion_por_rafaga():
+    grafo = GrafoFake()
+    agrupador = AgrupadorMensajes(ventana_ms=100)
+
+    async def run():
+        transport = httpx.ASGITransport(app=servidor.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            tareas = []
+            for texto in FRAGMENTOS:
+                tareas.append(asyncio.ensure_future(client.post(
+                    "/api/whatsapp-agent/message", json={"chat_id": "5215550003@c.us", "message": texto}
+                )))
+                await asyncio.sleep(0.02)
+            return [r.json() for r in await asyncio.gather(*tareas)]
+
+    with patch.object(servidor, "grafo", grafo), \
+         patch.object(servidor, "aget_or_create_session", _sesion_fake), \
+         patch.object(servidor, "get_agrupador_mensajes", return_value=agrupador):
+        respuestas = asyncio.run(run())
+
+    assert grafo.turnos == ["hola\nquiero\nuna cita\npara mañana"]
+    assert [r["response"] for r in respuestas] == [None, None, None, "¿Para qué hora?"]
+    assert all(r.get("agrupado") for r in respuestas[:3])
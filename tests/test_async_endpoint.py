@@ -0,0 +1,286 @@
+"""
+Tests del camino async de /api/whatsapp-agent/message
+
+✅ grafo.ainvoke en lugar de grafo.invoke (no bloquea el event loop)
+✅ aget_or_create_session con pool async
+✅ Prueba de carga: p99 con 50 chats concurrentes ≈ latencia de 1 chat
+✅ Prueba de carga sobre el grafo real (nodos sync en el executor + pool de 10)
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+from psycopg_pool import PoolTimeout
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import app as servidor
+
+
+# Latencia simulada de un LLM (DeepSeek/Claude)
+LATENCIA_LLM_S = 0.2
+CHATS_CONCURRENTES = 50
+
+
+class GrafoLentoFake:
+    """Grafo fake cuyo ainvoke espera como si llamara a un LLM remoto."""
+
+    def __init__(self, latencia: float):
+        self.latencia = latencia
+        self.llamadas = 0
+
+    async def ainvoke(self, estado, config):
+        self.llamadas += 1
+        await asyncio.sleep(self.latencia)
+        return {"messages": estado["messages"] + [AIMessage(content="respuesta")]}
+
+    def invoke(self, estado, config):
+        raise AssertionError("El endpoint no debe usar grafo.invoke (bloquea el event loop)")
+
+
+async def _sesion_fake(phone_number, pool=None):
+    return ("user_test", f"thread_{phone_number}", {"configurable": {"thread_id": f"thread_{phone_number}"}})
+
+
+async def _enviar(client: httpx.AsyncClient, chat: int) -> float:
+    inicio = time.perf_counter()
+    resp = await client.post(
+        "/api/whatsapp-agent/message",
+        json={"chat_id": f"52664{chat:07d}@c.us", "message": "Hola"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["response"] == "respuesta"
+    return time.perf_counter() - inicio
+
+
+def _p99(latencias):
+    ordenadas = sorted(latencias)
+    idx = max(0, int(round(0.99 * len(ordenadas))) - 1)
+    return ordenadas[idx]
+
+
+@pytest.fixture
+def grafo_fake():
+    grafo = GrafoLentoFake(LATENCIA_LLM_S)
+    with patch.object(servidor, "grafo", grafo), \
+         patch.object(servidor, "aget_or_create_session", _sesion_fake):
+        yield grafo
+
+
+def test_endpoint_usa_ainvoke(grafo_fake):
+    """El endpoint responde usando ainvoke del grafo."""
+    async def run():
+        transport = httpx.ASGITransport(app=servidor.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await _enviar(client, 1)
+
+    latencia = asyncio.run(run())
+
+    assert grafo_fake.llamadas == 1
+    assert latencia >= LATENCIA_LLM_S
+
+
+def test_carga_50_chats_p99_cercano_a_un_chat(grafo_fake):
+    """
+    Prueba de carga: 50 chats concurrentes mientras cada uno espera al LLM.
+
+    Con el camino bloqueante (grafo.invoke en el event loop) las peticiones
+    se serializarían y el p99 sería ~50x la latencia de un chat.
+    """
+    async def run():
+        transport = httpx.ASGITransport(app=servidor.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            base = await _enviar(client, 0)
+            latencias = await asyncio.gather(
+                *[_enviar(client, chat) for chat in range(1, CHATS_CONCURRENTES + 1)]
+            )
+            return base, latencias
+
+    base, latencias = asyncio.run(run())
+    p99 = _p99(latencias)
+
+    print(f"\n📊 1 chat: {base * 1000:.0f}ms | p99 ({CHATS_CONCURRENTES} chats): {p99 * 1000:.0f}ms")
+
+    assert grafo_fake.llamadas == CHATS_CONCURRENTES + 1
+    # p99 cercano a un solo chat (margen para overhead de ASGI/logging)
+    assert p99 < base * 2
+    # Muy lejos de la serialización (50 x latencia)
+    assert p99 < LATENCIA_LLM_S * CHATS_CONCURRENTES / 10
+
+
+# ==================== GRAFO REAL ====================
+
+# Latencia simulada de una consulta a PostgreSQL (nodos sync)
+LATENCIA_BD_S = 0.02
+
+
+class PoolLimitadoFake:
+    """
+    Pool fake con el mismo límite que el pool sync real (POOL_MAX_SIZE).
+
+    Cada connection() ocupa un lugar mientras dura el bloque `with`; si no
+    hay lugar en POOL_TIMEOUT segundos lanza PoolTimeout como psycopg_pool.
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._lugares = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.en_uso = 0
+        self.max_en_uso = 0
+
+    @contextmanager
+    def connection(self):
+        if not self._lugares.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"sin conexiones libres tras {self.timeout}s")
+        with self._lock:
+            self.en_uso += 1
+            self.max_en_uso = max(self.max_en_uso, self.en_uso)
+        try:
+            yield object()
+        finally:
+            with self._lock:
+                self.en_uso -= 1
+            self._lugares.release()
+
+
+def _consulta_bd_lenta():
+    """Simula una consulta sync: toma conexión del pool y bloquea el thread."""
+    from src.medical.connection_pool import get_connection
+
+    with get_connection():
+        time.sleep(LATENCIA_BD_S)
+
+
+def _consultar_usuario_fake(phone_number):
+    _consulta_bd_lenta()
+    return {
+        "phone_number": phone_number,
+        "display_name": "Paciente Carga",
+        "es_admin": False,
+        "tipo_usuario": "paciente_externo",
+        "doctor_id": None,
+    }
+
+
+def _actualizar_actividad_fake(phone_number):
+    _consulta_bd_lenta()
+    return True
+
+
+def _registrar_clasificacion_fake(**kwargs):
+    _consulta_bd_lenta()
+
+
+class LLMClasificadorFake:
+    """Reemplaza llm_primary (structured output) del nodo de filtrado."""
+
+    async def ainvoke(self, prompt_messages):
+        await asyncio.sleep(LATENCIA_LLM_S)
+        from src.nodes.filtrado_inteligente_node import ClasificacionResponse
+        return ClasificacionResponse(clasificacion="chat", confianza=0.95, razonamiento="charla")
+
+    def invoke(self, prompt_messages):
+        raise AssertionError("El camino async no debe llamar invoke del LLM")
+
+
+class LLMConversacionalFake:
+    """Reemplaza llm_conversacional del nodo de respuesta."""
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(LATENCIA_LLM_S)
+        return AIMessage(content="respuesta")
+
+    def invoke(self, prompt):
+        raise AssertionError("El camino async no debe llamar invoke del LLM")
+
+
+@pytest.fixture
+def grafo_real(monkeypatch):
+    """
+    Grafo real compilado con crear_grafo_whatsapp_async() sin checkpointer.
+
+    Solo se reemplazan las fronteras externas: LLMs (sleep async) y
+    consultas a BD (sleep sync dentro de una conexión del pool). El cache de
+    clasificación y el clasificador local se desactivan: todos los chats
+    mandan "Hola" y cada uno debe pasar por las dos llamadas LLM.
+    """
+    from langgraph.store.memory import InMemoryStore
+    import src.memory
+    from src import graph_whatsapp_etapa8
+    from src.medical import connection_pool
+    from src.nodes import filtrado_inteligente_node, identificacion_usuario_node, respuesta_conversacional_node
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    pool = PoolLimitadoFake(connection_pool.POOL_MAX_SIZE, connection_pool.POOL_TIMEOUT)
+
+    with patch.object(src.memory, "get_memory_store", return_value=InMemoryStore()):
+        grafo = asyncio.run(graph_whatsapp_etapa8.crear_grafo_whatsapp_async())
+
+    with patch.object(connection_pool, "get_connection_pool", return_value=pool), \
+         patch.object(identificacion_usuario_node, "consultar_usuario_bd", _consultar_usuario_fake), \
+         patch.object(identificacion_usuario_node, "actualizar_ultima_actividad", _actualizar_actividad_fake), \
+         patch.object(filtrado_inteligente_node, "registrar_clasificacion_bd", _registrar_clasificacion_fake), \
+         patch.object(filtrado_inteligente_node, "llm_primary", LLMClasificadorFake()), \
+         patch.object(filtrado_inteligente_node, "get_cache_clasificacion", return_value=None), \
+         patch.object(filtrado_inteligente_node, "get_clasificador_local", return_value=None), \
+         patch.object(respuesta_conversacional_node, "llm_conversacional", LLMConversacionalFake()), \
+         patch.object(servidor, "grafo", grafo), \
+         patch.object(servidor, "aget_or_create_session", _sesion_fake):
+        yield pool
+
+
+def test_carga_grafo_real_p99(grafo_real):
+    """
+    Prueba de carga sobre el grafo real: identificacion_usuario, cache_sesion
+    y generacion_resumen corren sync en el executor por defecto del loop y
+    toman conexiones del pool de POOL_MAX_SIZE; filtrado y respuesta esperan
+    al LLM con ainvoke.
+
+    Cada chat hace 2 llamadas LLM (clasificación + respuesta), así que su
+    latencia mínima es 2 x LATENCIA_LLM_S.
+    """
+    async def run():
+        servidor.configurar_executor_grafo()
+        transport = httpx.ASGITransport(app=servidor.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            base = await _enviar(client, 0)
+            latencias = await asyncio.gather(
+                *[_enviar(client, chat) for chat in range(1, CHATS_CONCURRENTES + 1)]
+            )
+            return base, latencias
+
+    base, latencias = asyncio.run(run())
+    p99 = _p99(latencias)
+
+    print(
+        f"\n📊 Grafo real | 1 chat: {base * 1000:.0f}ms | p99 ({CHATS_CONCURRENTES} chats): "
+        f"{p99 * 1000:.0f}ms | conexiones BD simultáneas: {grafo_real.max_en_uso}/{grafo_real.max_size}"
+    )
+
+    assert base >= 2 * LATENCIA_LLM_S
+    # El pool nunca se desborda
+    assert grafo_real.max_en_uso <= grafo_real.max_size
+    # p99 cercano a un solo chat: ni el executor ni el pool serializan los chats
+    assert p99 < base * 2
+    assert p99 < 2 * LATENCIA_LLM_S * CHATS_CONCURRENTES / 10
+
+
+def test_sesion_async_sin_pool_crea_thread():
+    """Sin pool de BD, aget_or_create_session crea un thread nuevo (fallback)."""
+    from src.utils.session_manager import aget_or_create_session, generate_user_id
+
+    user_id, session_id, config = asyncio.run(aget_or_create_session("+526641234567"))
+
+    assert user_id == generate_user_id("+526641234567")
+    assert session_id.startswith(f"thread_{user_id}_")
+    assert config == {"configurable": {"thread_id": session_id}}
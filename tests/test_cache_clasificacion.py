@@ -0,0 +1,214 @@
+"""
+Tests del cache de clasificaciones (src/utils/cache_clasificacion.py)
+
+✅ "¡Hola!" / "hola" / "HOLA" → una sola llamada al LLM
+✅ La clave distingue tipo_usuario y contexto previo
+✅ Tier semántico: vecino sobre el umbral; nunca sirve preguntas de aclaración
+✅ TTL, LRU y métricas de hit rate
+✅ Precarga desde clasificaciones_llm solo con mensajes frecuentes y consistentes
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.nodes import filtrado_inteligente_node as nodo
+from src.nodes.filtrado_inteligente_node import ClasificacionResponse
+from src.utils.cache_clasificacion import (
+    SIN_CONTEXTO,
+    CacheClasificacion,
+    ClaveClasificacion,
+    clave_clasificacion,
+    normalizar_texto,
+    seleccionar_precarga,
+)
+
+
+class LLMFake:
+    def __init__(self, clasificacion="chat", pregunta=None):
+        self.llamadas = 0
+        self.resultado = ClasificacionResponse(
+            clasificacion=clasificacion, confianza=0.9, razonamiento="fake", pregunta_aclaracion=pregunta
+        )
+
+    def invoke(self, prompt_messages):
+        self.llamadas += 1
+        return self.resultado
+
+    async def ainvoke(self, prompt_messages):
+        self.llamadas += 1
+        return self.resultado
+
+
+@pytest.fixture
+def entorno():
+    cache = CacheClasificacion(ttl_seg=60, max_entradas=100, umbral_similitud=0.9)
+    llm = LLMFake()
+    registros = []
+    with patch.object(nodo, "get_cache_clasificacion", return_value=cache), \
+         patch.object(nodo, "get_clasificador_local", return_value=None), \
+         patch.object(nodo, "llm_primary", llm), \
+         patch.object(nodo, "is_model_loaded", return_value=False), \
+         patch.object(nodo, "registrar_clasificacion_bd", side_effect=lambda **r: registros.append(r)):
+        yield cache, llm, registros
+
+
+def _estado(texto, previos=(), tipo_usuario="paciente_externo"):
+    return {
+        "messages": [*previos, HumanMessage(content=texto)],
+        "user_id": "+526641112233",
+        "tipo_usuario": tipo_usuario,
+    }
+
+
+def test_normalizacion():
+    assert normalizar_texto("¡Hola!  ") == "hola"
+    assert normalizar_texto("Quiero   AGENDAR, por favor.") == "quiero agendar por favor"
+    assert normalizar_texto("Mañana está bien") == "mañana esta bien"
+
+
+def test_variantes_un_solo_llm(entorno):
+    cache, llm, registros = entorno
+
+    comandos = [nodo.nodo_filtrado_inteligente(_estado(texto)) for texto in ["¡Hola!", "hola", "HOLA"]]
+
+    assert llm.llamadas == 1
+    assert [c.update["modelo_clasificacion_usado"] for c in comandos] == ["deepseek", "cache", "cache"]
+    assert all(c.goto == "generacion_resumen" for c in comandos)
+    # Los hits también quedan en la auditoría, marcados como cache
+    assert [r["modelo_usado"] for r in registros] == ["deepseek", "cache", "cache"]
+    assert registros[0]["metadata"] == {"tipo_usuario": "paciente_externo", "confianza": 0.9}
+
+    metricas = cache.obtener_metricas()
+    assert metricas["hits_exactos"] == 2 and metricas["misses"] == 1
+    assert metricas["hit_rate"] == pytest.approx(2 / 3, abs=1e-3)
+
+
+def test_clave_distingue_tipo_y_contexto(entorno):
+    cache, llm, _ = entorno
+    previos = [HumanMessage(content="quiero una cita"), AIMessage(content="¿Para qué día?")]
+
+    nodo.nodo_filtrado_inteligente(_estado("mañana"))
+    nodo.nodo_filtrado_inteligente(_estado("mañana", previos))
+    nodo.nodo_filtrado_inteligente(_estado("mañana", tipo_usuario="doctor"))
+    assert llm.llamadas == 3
+
+    nodo.nodo_filtrado_inteligente(_estado("Mañana.", previos))
+    assert llm.llamadas == 3
+
+    # El contexto de la clave excluye el mensaje actual
+    assert clave_clasificacion("hola", "doctor", []) == ClaveClasificacion("hola", "doctor", "")
+
+
+def test_async_usa_el_cache(entorno):
+    cache, llm, registros = entorno
+
+    async def run():
+        return [await nodo.anodo_filtrado_inteligente(_estado(texto)) for texto in ["gracias", "Gracias!!"]]
+
+    comandos = asyncio.run(run())
+
+    assert llm.llamadas == 1
+    assert comandos[1].update["modelo_clasificacion_usado"] == "cache"
+    assert len(registros) == 2
+
+
+def test_tier_semantico(entorno):
+    cache, llm, _ = entorno
+    vectores = {
+        "quiero agendar una cita": [1.0, 0.0, 0.0],
+        "quisiera agendar cita": [0.98, 0.1, 0.0],
+        "cual es mi diagnostico": [0.0, 1.0, 0.0],
+    }
+    llm.resultado = ClasificacionResponse(clasificacion="solicitud_cita_paciente", confianza=0.95, razonamiento="cita")
+
+    with patch.object(nodo, "is_model_loaded", return_value=True), \
+         patch.object(nodo, "generate_embedding", side_effect=lambda t: vectores[normalizar_texto(t)]):
+        nodo.nodo_filtrado_inteligente(_estado("Quiero agendar una cita"))
+        similar = nodo.nodo_filtrado_inteligente(_estado("Quisiera agendar cita"))
+        assert llm.llamadas == 1
+        assert similar.update["modelo_clasificacion_usado"] == "cache_semantico"
+        assert similar.goto == "recepcionista"
+
+        nodo.nodo_filtrado_inteligente(_estado("¿Cuál es mi diagnóstico?"))
+        assert llm.llamadas == 2
+
+    assert cache.obtener_metricas()["hits_semanticos"] == 1
+
+
+def test_aclaraciones_solo_por_clave_exacta():
+    cache = CacheClasificacion(ttl_seg=60, umbral_similitud=0.5)
+    aclaracion = ClasificacionResponse(
+        clasificacion="necesita_aclaracion", confianza=0.4, razonamiento="solo nombre",
+        pregunta_aclaracion="¿Qué necesitas hacer, Juan?"
+    )
+    clave = clave_clasificacion("mi nombre es Juan", "paciente_externo", [])
+    cache.guardar(clave, aclaracion, [1.0, 0.0])
+
+    assert cache.obtener(clave).pregunta_aclaracion == "¿Qué necesitas hacer, Juan?"
+    otra = clave_clasificacion("mi nombre es Pedro", "paciente_externo", [])
+    assert cache.obtener(otra) is None
+    assert cache.obtener_similar(otra, [1.0, 0.0]) is None
+
+
+def test_ttl_lru_y_copias():
+    resultado = ClasificacionResponse(clasificacion="chat", confianza=0.9, razonamiento="x")
+    cache = CacheClasificacion(ttl_seg=0.05, max_entradas=2)
+    claves = [ClaveClasificacion(f"m{i}", "doctor", "") for i in range(3)]
+
+    for clave in claves:
+        cache.guardar(clave, resultado)
+    assert cache.obtener(claves[0]) is None  # Expulsada por LRU
+    copia = cache.obtener(claves[2])
+    copia.clasificacion = "medica"
+    assert cache.obtener(claves[2]).clasificacion == "chat"
+
+    time.sleep(0.06)
+    assert cache.obtener(claves[2]) is None
+    assert cache.obtener_metricas()["entradas"] == 1  # La expirada se retiró; claves[1] sigue hasta consultarse
+
+
+def test_seleccionar_precarga():
+    filas = (
+        [("Hola", "paciente_externo", "chat")] * 9
+        + [("hola!", "paciente_externo", "solicitud_cita_paciente")]
+        + [("mañana", "paciente_externo", "solicitud_cita_paciente")] * 3
+        + [("Mañana", "paciente_externo", "chat")] * 2
+        + [("gracias", "doctor", "chat")] * 2
+    )
+
+    seleccionados = seleccionar_precarga(filas, min_ocurrencias=3, acuerdo_min=0.9)
+
+    # "mañana" depende del contexto (60% de acuerdo); "gracias" es poco frecuente
+    assert [(m.texto, m.clasificacion, m.ocurrencias) for m in seleccionados] == [("hola", "chat", 10)]
+    assert seleccionados[0].acuerdo == pytest.approx(0.9)
+
+
+def test_precarga_desde_auditoria(entorno):
+    cache, llm, _ = entorno
+    filas = [("Quiero agendar", "paciente_externo", "solicitud_cita_paciente")] * 5 + [("x", "doctor", "legacy")] * 5
+    cursor = MagicMock()
+    cursor.fetchall.return_value = filas
+    conn = MagicMock()
+    conn.__enter__.return_value = conn
+    conn.cursor.return_value.__enter__.return_value = cursor
+
+    with patch.object(nodo, "get_connection", return_value=conn):
+        assert nodo.precargar_cache_clasificacion() == 1  # "legacy" no es una clasificación válida
+
+    sql = cursor.execute.call_args[0][0]
+    assert "NOT LIKE 'cache%%'" in sql and "metadata->>'tipo_usuario'" in sql
+    assert ClaveClasificacion("quiero agendar", "paciente_externo", SIN_CONTEXTO) in cache._entradas
+
+    # La entrada precargada aplica con cualquier contexto previo
+    comando = nodo.nodo_filtrado_inteligente(_estado("quiero agendar", [AIMessage(content="¡Hola! ¿En qué te ayudo?")]))
+    assert llm.llamadas == 0
+    assert comando.goto == "recepcionista"
+    assert cache.obtener_metricas()["precargadas"] == 1
@@ -0,0 +1,158 @@
+"""
+Tests del cache de identidad (src/utils/cache_identidad.py)
+
+✅ Mensajes en ráfaga: la identificación no toca PostgreSQL en un hit
+✅ Cache negativo invalidado al registrar al usuario
+✅ activar_numero_temporal invalida el número nuevo
+✅ Errores de BD no se cachean; números temporales no pasan de expira_en
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.nodes import identificacion_usuario_node as nodo
+from src.utils import cache_identidad
+from src.utils.cache_identidad import CacheIdentidad
+
+PHONE = "+526641112233"
+DOCTOR_PHONE = "+526649990000"
+TEMPORAL = "+526647770000"
+
+
+class BDFake:
+    """get_connection() fake para usuarios y números temporales; cuenta las consultas."""
+
+    def __init__(self):
+        self.usuarios = {DOCTOR_PHONE: (2, "Dra. Joana", "Pediatría")}  # phone -> (doctor_id, nombre, esp)
+        self.temporales = {}
+        self.consultas = 0
+        self.falla = False
+
+    def _fila_usuario(self, phone):
+        doctor_id, nombre, especialidad = self.usuarios[phone]
+        return (10, phone, nombre, False, "America/Tijuana", {}, datetime(2026, 1, 1), None,
+                "paciente_externo", None, True, doctor_id, nombre if doctor_id else None, especialidad)
+
+    def get_connection(self):
+        bd = self
+        cursor = MagicMock()
+
+        def execute(sql, params=None):
+            bd.consultas += 1
+            if bd.falla:
+                raise RuntimeError("conexión perdida")
+            if "FROM numeros_temporales_doctores" in sql:
+                info = bd.temporales.get(params[0])
+                cursor.fetchone.return_value = info
+            elif "FROM usuarios u" in sql:
+                cursor.fetchone.return_value = bd._fila_usuario(params[0]) if params[0] in bd.usuarios else None
+            elif "INSERT INTO numeros_temporales_doctores" in sql:
+                doctor_id, original, temporal, expira_en = params
+                bd.temporales[temporal] = (doctor_id, original, temporal, expira_en, "Dra. Joana", "Pediatría")
+                cursor.fetchone.return_value = (1,)
+            elif "INSERT INTO usuarios" in sql:
+                bd.usuarios[params[0]] = (None, params[1], None)
+                cursor.fetchone.return_value = (11, params[0], params[1], params[2], params[3], True,
+                                                "America/Tijuana", {}, datetime.now())
+            elif "FROM doctores" in sql:
+                cursor.fetchone.return_value = None
+
+        cursor.execute.side_effect = execute
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value.__enter__.return_value = cursor
+        return conn
+
+
+@pytest.fixture
+def bd():
+    bd = BDFake()
+    cache_identidad.reset_cache_identidad()
+    with patch.object(nodo, "get_connection", side_effect=bd.get_connection), \
+         patch.object(nodo, "get_registro_actividad"):
+        yield bd
+    cache_identidad.reset_cache_identidad()
+
+
+def _estado(phone):
+    return {"messages": [HumanMessage(content="Hola")], "user_id": phone}
+
+
+def test_rafaga_sin_tocar_postgres(bd):
+    nodo.nodo_identificacion_usuario(_estado(DOCTOR_PHONE))
+    consultas_iniciales = bd.consultas
+
+    for _ in range(20):
+        estado = nodo.nodo_identificacion_usuario(_estado(DOCTOR_PHONE))
+
+    assert consultas_iniciales == 2  # Número temporal + usuario (last_seen va en lote)
+    assert bd.consultas == 2
+    assert estado["tipo_usuario"] == "doctor" and estado["doctor_id"] == 2
+    assert cache_identidad.obtener_metricas_identidad()["hits"] == 20
+
+
+def test_negativo_invalidado_al_registrar(bd):
+    assert nodo.consultar_usuario_bd(PHONE) is None
+    assert nodo.consultar_usuario_bd(PHONE) is None
+    assert bd.consultas == 2  # El segundo "no existe" sale del cache
+
+    nodo.crear_usuario_nuevo(PHONE)
+    usuario = nodo.consultar_usuario_bd(PHONE)
+
+    assert usuario is not None and usuario["tipo_usuario"] == "paciente_externo"
+
+
+def test_activar_numero_temporal_invalida(bd):
+    assert nodo.consultar_usuario_bd(TEMPORAL) is None
+
+    exito, _ = nodo.activar_numero_temporal(2, DOCTOR_PHONE, TEMPORAL, "24")
+    usuario = nodo.consultar_usuario_bd(TEMPORAL)
+
+    assert exito
+    assert usuario["es_numero_temporal"] is True
+    assert usuario["phone_number"] == DOCTOR_PHONE and usuario["phone_number_actual"] == TEMPORAL
+
+
+def test_errores_no_se_cachean(bd):
+    bd.falla = True
+    assert nodo.consultar_usuario_bd(DOCTOR_PHONE) is None
+
+    bd.falla = False
+    assert nodo.consultar_usuario_bd(DOCTOR_PHONE)["doctor_id"] == 2
+
+
+def test_copias_independientes(bd):
+    primero = nodo.consultar_usuario_bd(DOCTOR_PHONE)
+    primero["preferencias"]["modificado"] = True
+
+    assert nodo.consultar_usuario_bd(DOCTOR_PHONE)["preferencias"] == {}
+
+
+def test_ttl_temporal_y_carrera_con_invalidacion():
+    cache = CacheIdentidad(ttl_seg=60, ttl_negativo_seg=10)
+    vencido = {"es_numero_temporal": True, "expira_en": datetime.now() - timedelta(minutes=1)}
+    cache.guardar(TEMPORAL, vencido, cache.generacion)
+    assert cache.obtener(TEMPORAL) == (False, None)
+
+    generacion = cache.generacion
+    cache.invalidar(PHONE)  # Una escritura llega mientras se consultaba
+    cache.guardar(PHONE, None, generacion)
+    assert cache.obtener(PHONE) == (False, None)
+
+
+def test_lru_y_ttl_negativo():
+    cache = CacheIdentidad(ttl_seg=60, ttl_negativo_seg=0, max_entradas=2)
+    for i in range(3):
+        cache.guardar(f"+5266400000{i}", {"id": i}, cache.generacion)
+    cache.guardar(PHONE, None, cache.generacion)
+
+    assert cache.obtener_metricas()["entradas"] == 2
+    assert cache.obtener("+52664000000") == (False, None)
+    assert cache.obtener(PHONE) == (False, None)  # TTL negativo 0: no se guarda
@@ -0,0 +1,174 @@
+"""
+Tests del cache de ocupación por doctor y día (src/medical/cache_ocupacion.py)
+
+✅ check_doctor_availability responde desde el bitmap sin tocar PostgreSQL
+✅ Agendar / cancelar / sincronizar invalidan (nada de "disponible" viejo)
+✅ Una carga que corre durante una invalidación no guarda datos viejos
+✅ LRU acotado y TTL
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.medical import cache_ocupacion, crud, disponibilidad
+from src.medical.cache_ocupacion import CacheOcupacion
+
+TZ = cache_ocupacion.TIMEZONE
+JUEVES = datetime(2026, 2, 5)
+
+
+def _hora(h, m=0, dia=JUEVES):
+    return TZ.localize(dia.replace(hour=h, minute=m))
+
+
+class BDFake:
+    """get_connection() fake con citas en memoria; cuenta las consultas."""
+
+    def __init__(self, citas=None):
+        self.citas = list(citas or [])  # (doctor_id, inicio, fin, id)
+        self.consultas = 0
+        self.antes_de_responder = None
+
+    def get_connection(self):
+        bd = self
+        cursor = MagicMock()
+
+        def execute(sql, params=None):
+            bd.consultas += 1
+            if bd.antes_de_responder:
+                bd.antes_de_responder()
+            if "FROM doctores" in sql:
+                cursor.fetchall.return_value = [(1, "Dr. Santiago"), (2, "Dra. Joana")]
+            else:
+                doctor_id, fin, inicio = params
+                cursor.fetchall.return_value = sorted(
+                    (ini, f, cid) for d, ini, f, cid in bd.citas if d == doctor_id and ini < fin and f >= inicio
+                )
+
+        cursor.execute.side_effect = execute
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value.__enter__.return_value = cursor
+        return conn
+
+
+@pytest.fixture
+def bd():
+    bd = BDFake([(1, _hora(10, 30), _hora(11, 30), 101)])
+    cache_ocupacion.reset_cache_ocupacion()
+    with patch.object(cache_ocupacion, "get_connection", side_effect=bd.get_connection), \
+         patch.object(disponibilidad, "get_connection", side_effect=AssertionError("no debe consultar")):
+        yield bd
+    cache_ocupacion.reset_cache_ocupacion()
+
+
+def test_verificaciones_sin_tocar_postgres(bd):
+    for h in range(8, 18):
+        disponibilidad.check_doctor_availability(1, _hora(h, 30), _hora(h + 1, 30))
+    consultas_iniciales = bd.consultas
+
+    for _ in range(100):
+        ocupado = disponibilidad.check_doctor_availability(1, _hora(10, 30), _hora(11, 30))
+        libre = disponibilidad.check_doctor_availability(1, _hora(12, 30), _hora(13, 30))
+
+    assert consultas_iniciales == 2  # doctores + el día del doctor 1
+    assert bd.consultas == 2
+    assert ocupado["razon"] == "ocupado" and ocupado["conflicto_con"] == 101
+    assert ocupado["detalles"]["mensaje"] == "Conflicto con cita ID 101 de 10:30 a 11:30"
+    assert libre["disponible"] is True and libre["detalles"]["doctor"] == "Dr. Santiago"
+    assert cache_ocupacion.obtener_metricas_ocupacion()["hits"] >= 200
+
+
+def test_bordes_y_traslape_parcial(bd):
+    cache = cache_ocupacion.get_cache_ocupacion()
+    bd.citas.append((1, _hora(14, 10), _hora(14, 20), 102))  # Fuera de la rejilla de 15 min
+    bd.citas.append((1, _hora(16, 30), _hora(16, 30), 103))  # Duración cero
+
+    assert cache.conflicto(1, _hora(11, 30), _hora(12, 30)) is None   # Empieza justo al terminar
+    assert cache.conflicto(1, _hora(9, 30), _hora(10, 30)) is None    # Termina justo al empezar
+    assert cache.conflicto(1, _hora(14, 0), _hora(14, 5)) is None     # Misma unidad, sin traslape
+    assert cache.conflicto(1, _hora(13, 30), _hora(14, 30))[2] == 102
+    assert cache.conflicto(1, _hora(15, 30), _hora(16, 30))[2] == 103  # Caso 3 de check_conflicto_horario
+
+
+def test_doctor_inexistente(bd):
+    resultado = disponibilidad.check_doctor_availability(9, _hora(12, 30), _hora(13, 30))
+    assert resultado["razon"] == "doctor_no_existe"
+
+
+def test_agendar_invalida_el_dia(bd):
+    assert disponibilidad.check_doctor_availability(1, _hora(12, 30), _hora(13, 30))["disponible"]
+
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = None
+    db.execute.return_value.first.return_value = None  # check_conflicto_horario sin filas
+
+    def refresh(cita):
+        cita.id = 200
+        bd.citas.append((cita.doctor_id, cita.fecha_hora_inicio, cita.fecha_hora_fin, cita.id))
+
+    db.refresh.side_effect = refresh
+    sesion = MagicMock()
+    sesion.__enter__.return_value = db
+    with patch.object(crud, "get_db_session", return_value=sesion):
+        assert crud.agendar_cita_simple(1, 7, _hora(12, 30), _hora(13, 30)) == 200
+
+    resultado = disponibilidad.check_doctor_availability(1, _hora(12, 30), _hora(13, 30))
+    assert resultado["razon"] == "ocupado" and resultado["conflicto_con"] == 200
+
+
+def test_cancelar_invalida_el_dia(bd):
+    assert not disponibilidad.check_doctor_availability(1, _hora(10, 30), _hora(11, 30))["disponible"]
+
+    cita = MagicMock(doctor_id=1, fecha_hora_inicio=_hora(10, 30), notas_privadas=None)
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = cita
+    db.commit.side_effect = lambda: bd.citas.clear()
+    sesion = MagicMock()
+    sesion.__enter__.return_value = db
+    with patch.object(crud, "get_db_session", return_value=sesion):
+        crud.cancel_appointment(101, "Paciente no puede")
+
+    assert disponibilidad.check_doctor_availability(1, _hora(10, 30), _hora(11, 30))["disponible"]
+
+
+def test_invalidar_otro_dia_no_descarta(bd):
+    cache = cache_ocupacion.get_cache_ocupacion()
+    cache.conflicto(1, _hora(12, 30), _hora(13, 30))
+    cache.conflicto(2, _hora(12, 30), _hora(13, 30))
+
+    cache_ocupacion.invalidar_ocupacion(1, _hora(9, 0, dia=JUEVES + timedelta(days=1)))
+    cache_ocupacion.invalidar_ocupacion(2, _hora(9, 0))
+
+    assert cache.obtener_metricas()["dias_en_memoria"] == 1  # Solo queda el doctor 1
+
+
+def test_carga_concurrente_con_invalidacion_no_guarda(bd):
+    cache = cache_ocupacion.get_cache_ocupacion()
+    # Una escritura llega mientras la carga del día está en vuelo
+    bd.antes_de_responder = lambda: (bd.citas.clear(), cache.invalidar(1))
+
+    cache.conflicto(1, _hora(10, 30), _hora(11, 30))
+    bd.antes_de_responder = None
+
+    assert cache.obtener_metricas()["dias_en_memoria"] == 0
+    assert cache.conflicto(1, _hora(10, 30), _hora(11, 30)) is None
+
+
+def test_lru_y_ttl(bd):
+    cache = CacheOcupacion(ttl_seg=60, max_dias=2)
+    for dias in range(3):
+        dia = JUEVES + timedelta(days=dias)
+        cache.conflicto(1, _hora(12, 30, dia=dia), _hora(13, 30, dia=dia))
+    assert cache.obtener_metricas()["dias_en_memoria"] == 2
+
+    vencido = CacheOcupacion(ttl_seg=0, max_dias=2)
+    vencido.conflicto(1, _hora(12, 30), _hora(13, 30))
+    vencido.conflicto(1, _hora(12, 30), _hora(13, 30))
+    assert vencido.misses == 2
@@ -0,0 +1,127 @@
+"""
+Tests del clasificador local (src/utils/clasificador_local.py)
+
+✅ Aprende intenciones separables y distingue tipo_usuario
+✅ Confianza calibrada: un mensaje ambiguo escala al LLM
+✅ Guardar / cargar el modelo; otro modelo de embeddings → desactivado
+✅ Nodo N2: confianza alta responde sin LLM, baja llama al LLM
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain_core.messages import HumanMessage
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.nodes import filtrado_inteligente_node as nodo
+from src.nodes.filtrado_inteligente_node import ClasificacionResponse
+from src.utils import clasificador_local
+from src.utils.clasificador_local import ClasificadorLocal, clasificar_local
+
+DIM = 16
+CENTROS = {"chat": 0, "solicitud_cita_paciente": 1, "medica": 2}
+
+
+def _vector(clase, rng, ruido=0.15):
+    vector = rng.normal(0, ruido, DIM)
+    vector[CENTROS[clase]] += 1.0
+    return vector
+
+
+def _datos(n=300, semilla=1):
+    rng = np.random.default_rng(semilla)
+    vectores, tipos, etiquetas = [], [], []
+    for i in range(n):
+        clase = list(CENTROS)[i % 3]
+        # Los pacientes nunca reciben "medica": el LLM la reclasifica a cita
+        tipo = "doctor" if clase == "medica" or i % 2 else "paciente_externo"
+        vectores.append(_vector(clase, rng))
+        tipos.append(tipo)
+        etiquetas.append(clase)
+    return vectores, tipos, etiquetas
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    vectores, tipos, etiquetas = _datos()
+    modelo, reporte = ClasificadorLocal.entrenar(vectores, tipos, etiquetas, umbral=0.8)
+    assert reporte["validacion"] == 60 and reporte["exactitud"] >= 0.95
+    assert reporte["cobertura_local"] >= 0.8
+    return modelo
+
+
+def test_predice_y_evalua(modelo):
+    rng = np.random.default_rng(7)
+    prediccion = modelo.predecir(_vector("solicitud_cita_paciente", rng), "paciente_externo")
+    assert prediccion.clasificacion == "solicitud_cita_paciente" and prediccion.confianza > 0.8
+
+    vectores, tipos, etiquetas = _datos(90, semilla=3)
+    reporte = modelo.evaluar(vectores, tipos, etiquetas, umbral=0.8)
+    assert reporte["muestras"] == 90
+    assert reporte["exactitud_local"] >= reporte["exactitud"] >= 0.95
+
+
+def test_ambiguo_escala(modelo):
+    ambiguo = np.zeros(DIM)
+    ambiguo[CENTROS["chat"]] = ambiguo[CENTROS["medica"]] = 1.0
+
+    prediccion = modelo.predecir(ambiguo, "doctor")
+    assert prediccion.confianza < 0.8
+    assert clasificar_local(modelo, ambiguo, "doctor", umbral=0.8) is None
+
+
+def test_guardar_y_cargar(modelo, tmp_path):
+    ruta = str(tmp_path / "modelo.npz")
+    modelo.modelo_embeddings = "minilm@1"
+    modelo.guardar(ruta)
+
+    cargado = ClasificadorLocal.cargar(ruta)
+    vector = _vector("chat", np.random.default_rng(5))
+    assert cargado.clases == modelo.clases and cargado.dimension == DIM
+    assert cargado.predecir(vector, "doctor") == pytest.approx(modelo.predecir(vector, "doctor"))
+
+    with patch("src.embeddings.local_embedder.get_model_version", return_value="otro@2"):
+        assert clasificador_local._cargar_modelo(ruta) is None
+    with patch("src.embeddings.local_embedder.get_model_version", return_value="minilm@1"):
+        assert clasificador_local._cargar_modelo(ruta) is not None
+    assert clasificador_local._cargar_modelo(str(tmp_path / "no_existe.npz")) is None
+
+
+class LLMFake:
+    def __init__(self):
+        self.llamadas = 0
+
+    def invoke(self, prompt_messages):
+        self.llamadas += 1
+        return ClasificacionResponse(clasificacion="chat", confianza=0.9, razonamiento="llm")
+
+
+def test_nodo_usa_tier_local(modelo):
+    rng = np.random.default_rng(11)
+    vectores = {"quiero una cita": _vector("solicitud_cita_paciente", rng), "hmm": np.ones(DIM)}
+    llm = LLMFake()
+    registros = []
+
+    with patch.object(nodo, "get_cache_clasificacion", return_value=None), \
+         patch.object(nodo, "get_clasificador_local", return_value=modelo), \
+         patch.object(nodo, "is_model_loaded", return_value=True), \
+         patch.object(nodo, "generate_embedding", side_effect=lambda t: vectores[t]), \
+         patch.object(nodo, "llm_primary", llm), \
+         patch.object(nodo, "registrar_clasificacion_bd", side_effect=lambda **r: registros.append(r)):
+        local = nodo.nodo_filtrado_inteligente({
+            "messages": [HumanMessage(content="quiero una cita")], "tipo_usuario": "paciente_externo"
+        })
+        escalado = nodo.nodo_filtrado_inteligente({
+            "messages": [HumanMessage(content="hmm")], "tipo_usuario": "doctor"
+        })
+
+    assert local.goto == "recepcionista"
+    assert local.update["modelo_clasificacion_usado"] == "local"
+    assert escalado.update["modelo_clasificacion_usado"] == "deepseek"
+    assert llm.llamadas == 1
+    # Las predicciones locales quedan fuera del entrenamiento (modelo = 'local')
+    assert [r["modelo_usado"] for r in registros] == ["local", "deepseek"]
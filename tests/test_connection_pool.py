@@ -0,0 +1,159 @@
+"""
+Tests del pool de conexiones compartido (src/medical/connection_pool.py)
+
+✅ Tamaño configurable por variables de entorno DB_POOL_*
+✅ Health check (SELECT 1) y métricas del pool
+✅ db_auditoria, db_procedimental y session_manager toman conexiones del pool
+"""
+
+import importlib
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import psycopg
+from psycopg_pool import ConnectionPool
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.medical import connection_pool
+
+
+def _pool_fake(cursor=None):
+    """Pool fake cuyo connection() entrega una conexión mock como context manager."""
+    conn = MagicMock()
+    conn.__enter__.return_value = conn
+    if cursor is not None:
+        conn.cursor.return_value.__enter__.return_value = cursor
+    pool = MagicMock(spec=ConnectionPool)
+    pool.connection.return_value = conn
+    return pool, conn
+
+
+def test_tamano_pool_desde_entorno(monkeypatch):
+    """DB_POOL_* configura el tamaño; valores inválidos usan el default."""
+    monkeypatch.setenv("DB_POOL_MIN_SIZE", "4")
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "16")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "no-es-numero")
+    try:
+        modulo = importlib.reload(connection_pool)
+        assert modulo.POOL_MIN_SIZE == 4
+        assert modulo.POOL_MAX_SIZE == 16
+        assert modulo.POOL_TIMEOUT == 3.0
+    finally:
+        monkeypatch.delenv("DB_POOL_MIN_SIZE")
+        monkeypatch.delenv("DB_POOL_MAX_SIZE")
+        monkeypatch.delenv("DB_POOL_TIMEOUT")
+        importlib.reload(connection_pool)
+
+
+def test_max_size_nunca_menor_que_min(monkeypatch):
+    monkeypatch.setenv("DB_POOL_MIN_SIZE", "8")
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "2")
+    try:
+        modulo = importlib.reload(connection_pool)
+        assert modulo.POOL_MAX_SIZE == 8
+    finally:
+        monkeypatch.delenv("DB_POOL_MIN_SIZE")
+        monkeypatch.delenv("DB_POOL_MAX_SIZE")
+        importlib.reload(connection_pool)
+
+
+def test_metricas_sin_pools_abiertos_no_crea_pool():
+    with patch.object(connection_pool, "_pool", None), \
+         patch.object(connection_pool, "_async_pool", None), \
+         patch.object(connection_pool, "ConnectionPool") as pool_cls:
+        metricas = connection_pool.obtener_metricas_pool()
+
+    pool_cls.assert_not_called()
+    assert metricas["sync"] is None
+    assert metricas["async"] is None
+    assert metricas["config"]["max_size"] == connection_pool.POOL_MAX_SIZE
+
+
+def test_metricas_incluyen_stats_del_pool():
+    pool = MagicMock()
+    pool.get_stats.return_value = {"pool_size": 2, "pool_available": 1, "requests_num": 7}
+
+    with patch.object(connection_pool, "_pool", pool):
+        metricas = connection_pool.obtener_metricas_pool()
+
+    assert metricas["sync"]["requests_num"] == 7
+
+
+def test_health_check_ok():
+    pool, conn = _pool_fake()
+
+    with patch.object(connection_pool, "get_connection_pool", return_value=pool):
+        salud = connection_pool.verificar_salud_pool()
+
+    conn.execute.assert_called_once_with("SELECT 1")
+    assert salud["ok"] is True
+    assert salud["error"] is None
+
+
+def test_health_check_falla_sin_lanzar():
+    pool = MagicMock()
+    pool.connection.side_effect = psycopg.OperationalError("connection refused")
+
+    with patch.object(connection_pool, "get_connection_pool", return_value=pool):
+        salud = connection_pool.verificar_salud_pool()
+
+    assert salud["ok"] is False
+    assert "connection refused" in salud["error"]
+
+
+def test_engine_sqlalchemy_sin_pool_propio():
+    """El engine legacy (sincronizador) no abre un segundo pool."""
+    from sqlalchemy.pool import NullPool
+
+    engine = connection_pool.get_sqlalchemy_engine()
+
+    assert isinstance(engine.pool, NullPool)
+    assert engine is connection_pool.get_sqlalchemy_engine()
+
+
+def test_auditoria_usa_pool_compartido():
+    from src.database import db_auditoria
+
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (42,)
+    pool, conn = _pool_fake(cursor)
+
+    with patch.object(connection_pool, "get_connection_pool", return_value=pool):
+        ok = db_auditoria.insertar_auditoria("user_x", "thread_x", "user", "Hola")
+
+    assert ok is True
+    pool.connection.assert_called_once()
+    conn.close.assert_not_called()  # La conexión vuelve al pool, no se cierra
+
+
+def test_procedimental_usa_pool_compartido():
+    from src.database import db_procedimental
+
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [{"id": 1, "tool_name": "listar_citas", "descripcion": "Lista citas"}]
+    pool, _ = _pool_fake(cursor)
+
+    with patch.object(connection_pool, "get_connection_pool", return_value=pool):
+        herramientas = db_procedimental.get_herramientas_disponibles(force_refresh=True)
+
+    db_procedimental.clear_cache()
+    pool.connection.assert_called_once()
+    assert herramientas == [{"id_tool": "listar_citas", "description": "Lista citas"}]
+
+
+def test_session_manager_acepta_pool():
+    from src.utils.session_manager import get_or_create_session
+
+    pool, conn = _pool_fake()
+    cursor = MagicMock()
+    cursor.fetchone.return_value = None
+    conn.cursor.return_value = cursor
+
+    user_id, session_id, config = get_or_create_session("+526641234567", pool)
+
+    pool.connection.assert_called_once()
+    assert session_id.startswith(f"thread_{user_id}_")
+    assert "INSERT INTO user_sessions" in cursor.execute.call_args_list[-1].args[0]
+    assert config == {"configurable": {"thread_id": session_id}}
@@ -0,0 +1,213 @@
+"""
+Tests del despachador por chat (src/utils/despachador_chats.py)
+
+✅ Mensajes de un chat: en orden y nunca dos a la vez
+✅ Chats distintos en paralelo, acotados por la concurrencia del pool
+✅ Un chat ruidoso no acapara los workers (round-robin entre carriles)
+✅ Límites de cola → ColaLlenaError / 503 en el endpoint
+✅ Un error o una cancelación no bloquean el carril
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import app as servidor
+from src.utils.despachador_chats import ColaLlenaError, DespachadorChats
+
+
+def test_orden_por_chat_sin_solapamiento():
+    eventos = []
+    en_curso = set()
+
+    async def trabajo(chat_id, i):
+        assert chat_id not in en_curso  # Nunca dos mensajes del mismo chat a la vez
+        en_curso.add(chat_id)
+        await asyncio.sleep(0.001 * (5 - i % 5))
+        eventos.append((chat_id, i))
+        en_curso.discard(chat_id)
+        return i
+
+    async def run():
+        despachador = DespachadorChats(concurrencia=8)
+        resultados = await asyncio.gather(*[
+            despachador.despachar(f"chat_{i % 3}", lambda i=i: trabajo(f"chat_{i % 3}", i))
+            for i in range(30)
+        ])
+        await despachador.detener()
+        return resultados, despachador.obtener_metricas()
+
+    resultados, metricas = asyncio.run(run())
+
+    assert resultados == list(range(30))
+    for chat in range(3):
+        assert [i for c, i in eventos if c == f"chat_{chat}"] == list(range(chat, 30, 3))
+    assert metricas["completados"] == 30 and metricas["carriles_activos"] == 0
+
+
+def test_chats_en_paralelo_acotados():
+    activos = 0
+    max_activos = 0
+
+    async def trabajo():
+        nonlocal activos, max_activos
+        activos += 1
+        max_activos = max(max_activos, activos)
+        await asyncio.sleep(0.05)
+        activos -= 1
+
+    async def run():
+        despachador = DespachadorChats(concurrencia=4)
+        inicio = time.perf_counter()
+        await asyncio.gather(*[despachador.despachar(f"chat_{i}", trabajo) for i in range(20)])
+        duracion = time.perf_counter() - inicio
+        await despachador.detener()
+        return duracion, despachador.obtener_metricas()
+
+    duracion, metricas = asyncio.run(run())
+
+    assert max_activos == 4
+    assert duracion < 0.05 * 20 / 2  # Lejos de la serialización
+    assert metricas["espera_max_ms"] >= 100  # El último grupo esperó ~4 turnos
+    assert metricas["espera_p95_ms"] <= metricas["espera_max_ms"]
+
+
+def test_chat_ruidoso_no_acapara():
+    orden = []
+
+    async def trabajo(etiqueta):
+        await asyncio.sleep(0.005)
+        orden.append(etiqueta)
+
+    async def run():
+        despachador = DespachadorChats(concurrencia=1)
+        tareas = [asyncio.ensure_future(despachador.despachar("ruidoso", lambda i=i: trabajo(f"r{i}")))
+                  for i in range(10)]
+        await asyncio.sleep(0)
+        tareas.append(asyncio.ensure_future(despachador.despachar("otro", lambda: trabajo("otro"))))
+        await asyncio.gather(*tareas)
+        await despachador.detener()
+
+    asyncio.run(run())
+
+    assert orden.index("otro") <= 2
+
+
+def test_limites_de_cola_y_errores():
+    async def lento():
+        await asyncio.sleep(0.05)
+
+    async def falla():
+        raise ValueError("grafo falló")
+
+    async def run():
+        despachador = DespachadorChats(concurrencia=1, max_cola_chat=2, max_cola_total=3)
+        tareas = [asyncio.ensure_future(despachador.despachar("chat_a", lento))]
+        await asyncio.sleep(0.01)  # El primero ya corre
+        tareas += [asyncio.ensure_future(despachador.despachar("chat_a", lento)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(ColaLlenaError):
+            await despachador.despachar("chat_a", lento)  # 2 en espera en el carril
+        tareas.append(asyncio.ensure_future(despachador.despachar("chat_b", falla)))
+        await asyncio.sleep(0)
+        with pytest.raises(ColaLlenaError):
+            await despachador.despachar("chat_c", lento)  # Límite global
+
+        resultados = await asyncio.gather(*tareas, return_exceptions=True)
+        await despachador.detener()
+        return resultados, despachador.obtener_metricas()
+
+    resultados, metricas = asyncio.run(run())
+
+    assert isinstance(resultados[-1], ValueError)
+    assert metricas["rechazados"] == 2 and metricas["errores"] == 1 and metricas["completados"] == 3
+
+
+def test_cancelado_en_espera_no_bloquea_el_carril():
+    async def lento():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def run():
+        despachador = DespachadorChats(concurrencia=1)
+        primero = asyncio.ensure_future(despachador.despachar("chat_a", lento))
+        await asyncio.sleep(0)
+        cancelado = asyncio.ensure_future(despachador.despachar("chat_a", lento))
+        tercero = asyncio.ensure_future(despachador.despachar("chat_b", lento))
+        await asyncio.sleep(0)
+        cancelado.cancel()
+
+        resultados = await asyncio.gather(primero, tercero)
+        return resultados, despachador.obtener_metricas()
+
+    resultados, metricas = asyncio.run(run())
+
+    assert resultados == ["ok", "ok"]
+    assert metricas["en_cola"] == 0 and metricas["en_ejecucion"] == 0 and metricas["carriles_activos"] == 0
+
+
+class GrafoFake:
+    """Registra solapamientos por thread_id."""
+
+    def __init__(self):
+        self.en_curso = set()
+        self.solapamientos = 0
+        self.mensajes = []
+
+    async def ainvoke(self, estado, config):
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id in self.en_curso:
+            self.solapamientos += 1
+        self.en_curso.add(thread_id)
+        await asyncio.sleep(0.02)
+        self.en_curso.discard(thread_id)
+        self.mensajes.append(estado["messages"][0].content)
+        return {"messages": [{"content": "ok"}]}
+
+
+async def _sesion_fake(phone_number, pool=None):
+    return phone_number, f"thread_{phone_number}", {"configurable": {"thread_id": f"thread_{phone_number}"}}
+
+
+def test_endpoint_serializa_el_mismo_chat():
+    grafo = GrafoFake()
+
+    async def run():
+        transport = httpx.ASGITransport(app=servidor.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/api/whatsapp-agent/message",
+                            json={"chat_id": "5215550001@c.us", "message": f"mensaje {i}"})
+                for i in range(5)
+            ])
+
+    with patch.object(servidor, "grafo", grafo), \
+         patch.object(servidor, "aget_or_create_session", _sesion_fake):
+        respuestas = asyncio.run(run())
+
+    assert all(r.status_code == 200 for r in respuestas)
+    assert grafo.solapamientos == 0
+    assert grafo.mensajes == [f"mensaje {i}" for i in range(5)]
+
+
+def test_endpoint_cola_llena_503():
+    async def run():
+        transport = httpx.ASGITransport(app=servidor.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/whatsapp-agent/message",
+                                     json={"chat_id": "5215550002@c.us", "message": "hola"})
+
+    with patch.object(servidor, "get_despachador_chats", return_value=DespachadorChats(max_cola_total=0)):
+        respuesta = asyncio.run(run())
+
+    assert respuesta.status_code == 503
+    assert respuesta.headers["Retry-After"] == "1"
+    assert respuesta.json()["response"] is None
@@ -0,0 +1,116 @@
+"""
+Tests de backends de inferencia del servicio de embeddings
+
+✅ Paridad int8 vs fp32: similitud coseno ≥ 0.99 en tests/fixtures/frases_embeddings.csv
+✅ Selección de backend por EMBEDDING_BACKEND (inválido = error de configuración)
+✅ ONNX sin optimum/onnxruntime cae a torch fp32
+
+El modelo real (MiniLM) no siempre está en cache; la paridad se prueba sobre
+un BERT local con la misma forma (384 dims, 12 heads) y, si el modelo real
+está descargado, también sobre él.
+"""
+
+import copy
+import csv
+import re
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.embeddings import embedding_service
+from src.embeddings.embedding_service import EmbeddingService, cuantizar_int8
+
+FIXTURE = Path(__file__).parent / "fixtures" / "frases_embeddings.csv"
+PARIDAD_MINIMA = 0.99
+
+
+@pytest.fixture(scope="module")
+def frases():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return [fila["texto"] for fila in csv.DictReader(f)]
+
+
+@pytest.fixture(scope="module")
+def modelo_local(tmp_path_factory, frases):
+    """BERT de 2 capas con la forma de MiniLM, guardado en disco como modelo HF."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    ruta = tmp_path_factory.mktemp("bert_local")
+    palabras = sorted({p for f in frases for p in re.findall(r"\w+|[^\w\s]", f.lower())})
+    (ruta / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + palabras))
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=5 + len(palabras),
+        hidden_size=384,
+        num_hidden_layers=2,
+        num_attention_heads=12,
+        intermediate_size=1536
+    )
+    BertModel(config).save_pretrained(ruta)
+    BertTokenizer(str(ruta / "vocab.txt")).save_pretrained(ruta)
+    return SentenceTransformer(str(ruta), device="cpu")
+
+
+def _paridad(modelo_fp32, frases) -> float:
+    fp32 = modelo_fp32.encode(frases, normalize_embeddings=True)
+    int8 = cuantizar_int8(copy.deepcopy(modelo_fp32)).encode(frases, normalize_embeddings=True)
+    return float(np.min(np.sum(fp32 * int8, axis=1)))
+
+
+def test_paridad_int8_modelo_local(modelo_local, frases):
+    assert _paridad(modelo_local, frases) >= PARIDAD_MINIMA
+
+
+def test_paridad_int8_modelo_real(frases):
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        modelo = SentenceTransformer(embedding_service.MODELO_DEFAULT, device="cpu", local_files_only=True)
+    except Exception:
+        pytest.skip("Modelo real no descargado (sin acceso a HuggingFace)")
+
+    assert _paridad(modelo, frases) >= PARIDAD_MINIMA
+
+
+def test_servicio_int8_cuantiza_al_cargar(modelo_local, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "int8")
+    servicio = EmbeddingService()
+
+    with patch.object(embedding_service, "SentenceTransformer", return_value=copy.deepcopy(modelo_local)):
+        vector = servicio.encode(["Quiero agendar una cita para el martes"])
+
+    import torch
+    capas = [type(m) for m in servicio.get_model().modules()]
+    assert torch.ao.nn.quantized.dynamic.Linear in capas
+    assert torch.nn.Linear not in capas
+    assert vector.shape == (1, 384)
+    assert servicio.backend == "int8"
+
+
+def test_backend_invalido_falla(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "tensorrt")
+    with pytest.raises(ValueError, match="Backend de embeddings inválido"):
+        EmbeddingService()
+
+
+def test_onnx_no_disponible_cae_a_torch(modelo_local):
+    servicio = EmbeddingService(backend="onnx")
+
+    def cargar(*args, **kwargs):
+        if kwargs.get("backend") == "onnx":
+            raise ImportError("optimum no instalado")
+        return modelo_local
+
+    with patch.object(embedding_service, "SentenceTransformer", side_effect=cargar):
+        servicio.get_model()
+
+    assert servicio.backend == "torch"
+    assert servicio.get_model() is modelo_local
@@ -0,0 +1,136 @@
+"""
+Tests del executor de micro-batching (src/embeddings/batch_executor.py)
+
+✅ Peticiones concurrentes se resuelven en pocos lotes (no una pasada por petición)
+✅ Cada Future recibe el vector de su propio texto
+✅ Errores del modelo llegan a todos los Futures del lote
+✅ Métricas de profundidad de cola y tamaño de lote
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.embeddings.batch_executor import EmbeddingBatchExecutor
+
+
+class ServicioFake:
+    """EmbeddingService fake: un encode() tarda lo mismo sin importar el lote."""
+
+    dimension = 4
+
+    def __init__(self, latencia: float = 0.02, error: Exception = None):
+        self.latencia = latencia
+        self.error = error
+        self.lotes = []
+
+    def encode(self, textos):
+        self.lotes.append(list(textos))
+        time.sleep(self.latencia)
+        if self.error:
+            raise self.error
+        return np.array([[len(t), 0, 0, 1] for t in textos], dtype=np.float32)
+
+
+@pytest.fixture
+def executor():
+    servicio = ServicioFake()
+    ejecutor = EmbeddingBatchExecutor(servicio, ventana_ms=10, max_batch_size=16)
+    yield ejecutor, servicio
+    ejecutor.shutdown()
+
+
+def _lanzar_concurrentes(ejecutor, textos):
+    resultados = [None] * len(textos)
+
+    def tarea(i):
+        resultados[i] = ejecutor.encode(textos[i], timeout=5)
+
+    threads = [threading.Thread(target=tarea, args=(i,)) for i in range(len(textos))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultados
+
+
+def test_concurrentes_se_agrupan_en_lotes(executor):
+    ejecutor, servicio = executor
+    textos = [f"mensaje {'x' * i}" for i in range(40)]
+
+    resultados = _lanzar_concurrentes(ejecutor, textos)
+
+    # Cada thread recibe el vector de su texto
+    assert [r[0] for r in resultados] == [float(len(t)) for t in textos]
+    # Muchos menos encode() que peticiones, ninguno mayor al límite
+    assert len(servicio.lotes) < len(textos) / 2
+    assert max(len(lote) for lote in servicio.lotes) <= 16
+
+
+def test_textos_repetidos_se_codifican_una_vez(executor):
+    ejecutor, servicio = executor
+
+    resultados = _lanzar_concurrentes(ejecutor, ["hola"] * 10)
+
+    assert all(r == resultados[0] for r in resultados)
+    assert sum(len(lote) for lote in servicio.lotes) < 10
+    assert ejecutor.obtener_metricas()["textos_codificados"] < 10
+
+
+def test_error_del_modelo_llega_a_los_futures():
+    servicio = ServicioFake(error=RuntimeError("modelo no disponible"))
+    ejecutor = EmbeddingBatchExecutor(servicio, ventana_ms=5)
+    try:
+        futures = [ejecutor.submit(f"texto {i}") for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="modelo no disponible"):
+                future.result(timeout=5)
+        assert ejecutor.obtener_metricas()["errores"] >= 1
+    finally:
+        ejecutor.shutdown()
+
+
+def test_metricas_de_cola_y_lote(executor):
+    ejecutor, _ = executor
+
+    _lanzar_concurrentes(ejecutor, [f"t{i}" for i in range(20)])
+    metricas = ejecutor.obtener_metricas()
+
+    assert metricas["peticiones"] == 20
+    assert metricas["profundidad_cola"] == 0
+    assert metricas["profundidad_cola_max"] >= 1
+    assert metricas["tamano_lote_max"] > 1
+    assert metricas["tamano_lote_promedio"] == pytest.approx(20 / metricas["lotes"])
+
+
+def test_shutdown_rechaza_nuevas_peticiones(executor):
+    ejecutor, _ = executor
+    ejecutor.encode("antes", timeout=5)
+
+    ejecutor.shutdown()
+
+    with pytest.raises(RuntimeError):
+        ejecutor.submit("después")
+
+
+def test_generate_embedding_pasa_por_el_executor():
+    from src.embeddings import local_embedder
+
+    servicio = ServicioFake(latencia=0)
+    ejecutor = EmbeddingBatchExecutor(servicio, ventana_ms=1)
+    try:
+        with patch.object(local_embedder, "BATCHING_HABILITADO", True), \
+             patch.object(local_embedder, "get_batch_executor", return_value=ejecutor):
+            vector = local_embedder.generate_embedding("quiero una cita")
+    finally:
+        ejecutor.shutdown()
+
+    assert vector == [15.0, 0.0, 0.0, 1.0]
+    assert servicio.lotes == [["quiero una cita"]]
@@ -0,0 +1,140 @@
+"""
+Tests del cache de embeddings por contenido (src/embeddings/embedding_cache.py)
+
+✅ LRU en memoria acotado con contadores hit/miss
+✅ Tier de disco (memmap float32 + índice) que sobrevive reinicios
+✅ Cambio de modelo = cache nuevo (sin vectores de otro espacio)
+✅ generate_embedding / generate_embeddings no recalculan textos repetidos
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.embeddings import embedding_cache
+from src.embeddings.embedding_cache import EmbeddingCache
+
+MODELO = "paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def _vector(semilla: int, dims: int = 8) -> np.ndarray:
+    return np.random.default_rng(semilla).standard_normal(dims).astype(np.float32)
+
+
+def test_lru_hit_miss_y_desalojo():
+    cache = EmbeddingCache(MODELO, 8, max_entradas=2, directorio=None)
+
+    assert cache.get("hola") is None
+    cache.put("hola", _vector(1))
+    cache.put("cita", _vector(2))
+    np.testing.assert_array_equal(cache.get("hola"), _vector(1))  # "hola" pasa a ser el más reciente
+    cache.put("gracias", _vector(3))                               # desaloja "cita"
+
+    assert cache.get("cita") is None
+    assert cache.get("gracias") is not None
+    metricas = cache.obtener_metricas()
+    assert metricas["entradas_memoria"] == 2
+    assert metricas["hits_memoria"] == 2
+    assert metricas["misses"] == 2
+    assert metricas["hit_rate"] == 0.5
+
+
+def test_clave_depende_del_modelo():
+    assert embedding_cache.hash_texto("modelo-a", "hola") != embedding_cache.hash_texto("modelo-b", "hola")
+
+
+def test_disco_sobrevive_reinicio(tmp_path):
+    cache = EmbeddingCache(MODELO, 8, max_entradas=0, directorio=str(tmp_path), filas_disco=4)
+    cache.put("quiero una cita", _vector(7))
+    cache.close()
+
+    reiniciado = EmbeddingCache(MODELO, 8, max_entradas=10, directorio=str(tmp_path), filas_disco=4)
+    vector = reiniciado.get("quiero una cita")
+
+    np.testing.assert_array_equal(vector, _vector(7))
+    assert reiniciado.obtener_metricas()["hits_disco"] == 1
+    # Otro modelo usa otros archivos: no ve el vector
+    otro = EmbeddingCache("all-MiniLM-L6-v2", 8, directorio=str(tmp_path), filas_disco=4)
+    assert otro.get("quiero una cita") is None
+    reiniciado.close()
+    otro.close()
+
+
+def test_disco_reutiliza_filas_en_anillo(tmp_path):
+    cache = EmbeddingCache(MODELO, 8, max_entradas=0, directorio=str(tmp_path), filas_disco=2)
+    for i in range(3):
+        cache.put(f"texto {i}", _vector(i))
+    cache.close()
+
+    reiniciado = EmbeddingCache(MODELO, 8, max_entradas=0, directorio=str(tmp_path), filas_disco=2)
+
+    assert reiniciado.get("texto 0") is None  # Su fila fue reutilizada
+    np.testing.assert_array_equal(reiniciado.get("texto 1"), _vector(1))
+    np.testing.assert_array_equal(reiniciado.get("texto 2"), _vector(2))
+    assert reiniciado.obtener_metricas()["entradas_disco"] == 2
+    reiniciado.close()
+
+
+class ServicioFake:
+    def __init__(self, model_version=MODELO):
+        self.model_version = model_version
+        self.dimension = 8
+        self.textos_codificados = []
+
+    def encode(self, textos):
+        self.textos_codificados.extend(textos)
+        return np.stack([_vector(len(t)) for t in textos])
+
+    def encode_one(self, texto):
+        return self.encode([texto])[0].tolist()
+
+
+@pytest.fixture
+def servicio_fake():
+    from src.embeddings import local_embedder
+
+    servicio = ServicioFake()
+    embedding_cache.reset_embedding_cache()
+    with patch("src.embeddings.embedding_service.get_embedding_service", return_value=servicio), \
+         patch.object(local_embedder, "get_embedding_service", return_value=servicio), \
+         patch.object(local_embedder, "BATCHING_HABILITADO", False):
+        yield servicio
+    embedding_cache.reset_embedding_cache()
+
+
+def test_generate_embedding_usa_cache(servicio_fake):
+    from src.embeddings.local_embedder import generate_embedding
+
+    primero = generate_embedding("Hola")
+    segundo = generate_embedding("Hola")
+
+    assert primero == segundo
+    assert servicio_fake.textos_codificados == ["Hola"]
+    assert embedding_cache.obtener_metricas_cache()["hits_memoria"] == 1
+
+
+def test_generate_embeddings_solo_calcula_faltantes(servicio_fake):
+    from src.embeddings.local_embedder import generate_embedding, generate_embeddings
+
+    generate_embedding("Hola")
+    vectores = generate_embeddings(["Hola", "Quiero una cita", "Hola"])
+
+    assert len(vectores) == 3
+    assert vectores[0] == vectores[2]
+    assert servicio_fake.textos_codificados == ["Hola", "Quiero una cita"]
+
+
+def test_cambio_de_modelo_crea_cache_nuevo(servicio_fake):
+    from src.embeddings.local_embedder import generate_embedding
+
+    generate_embedding("Hola")
+    servicio_fake.model_version = "all-MiniLM-L6-v2"
+    generate_embedding("Hola")
+
+    assert servicio_fake.textos_codificados == ["Hola", "Hola"]
+    assert embedding_cache.obtener_metricas_cache()["modelo"] == "all-MiniLM-L6-v2"
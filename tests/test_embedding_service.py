@@ -0,0 +1,159 @@
+"""
+Tests del servicio unificado de embeddings (src/embeddings/embedding_service.py)
+
+✅ Un solo modelo cargado por proceso (thread-safe)
+✅ encode() batched: float32 normalizado (n, 384)
+✅ Etiqueta de versión del modelo guardada junto al vector
+✅ local_embedder, recuperación médica y el store de LangGraph usan el mismo servicio
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.embeddings import embedding_cache, embedding_service
+from src.embeddings.embedding_service import EmbeddingService
+
+
+class ModeloFake:
+    """SentenceTransformer fake: vectores deterministas por texto, sin descargar nada."""
+
+    instancias = 0
+
+    def __init__(self, model_name, device="cpu", revision=None):
+        ModeloFake.instancias += 1
+        self.model_name = model_name
+        time.sleep(0.05)  # Simula la carga lenta del modelo
+
+    def encode(self, textos, batch_size=32, convert_to_numpy=True,
+               show_progress_bar=False, normalize_embeddings=False):
+        vectores = np.stack([
+            np.random.default_rng(abs(hash(texto)) % (2 ** 32)).standard_normal(384)
+            for texto in textos
+        ])
+        if normalize_embeddings:
+            vectores = vectores / np.linalg.norm(vectores, axis=1, keepdims=True)
+        return vectores
+
+
+@pytest.fixture
+def servicio_fake(monkeypatch):
+    """Singleton del servicio con el modelo fake."""
+    monkeypatch.delenv("EMBEDDING_MODEL", raising=False)
+    monkeypatch.delenv("EMBEDDING_MODEL_REVISION", raising=False)
+    ModeloFake.instancias = 0
+    embedding_service.reset_embedding_service()
+    embedding_cache.reset_embedding_cache()
+    with patch.object(embedding_service, "SentenceTransformer", ModeloFake):
+        yield embedding_service.get_embedding_service()
+    embedding_service.reset_embedding_service()
+    embedding_cache.reset_embedding_cache()
+
+
+def test_modelo_se_carga_una_sola_vez_con_threads(servicio_fake):
+    threads = [threading.Thread(target=servicio_fake.encode, args=(["hola"],)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert ModeloFake.instancias == 1
+    assert servicio_fake.is_loaded
+
+
+def test_encode_batched_normalizado_float32(servicio_fake):
+    vectores = servicio_fake.encode(["dolor de cabeza", "cita el martes", "gracias"])
+
+    assert vectores.shape == (3, 384)
+    assert vectores.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vectores, axis=1), 1.0, rtol=1e-5)
+    # Mismo texto → mismo vector, en lote o individual
+    np.testing.assert_allclose(servicio_fake.encode_one("gracias"), vectores[2], rtol=1e-6)
+
+
+def test_encode_lista_vacia_no_carga_modelo(servicio_fake):
+    assert servicio_fake.encode([]).shape == (0, 384)
+    assert not servicio_fake.is_loaded
+
+
+def test_encode_rechaza_string_suelto(servicio_fake):
+    with pytest.raises(TypeError):
+        servicio_fake.encode("hola")
+
+
+def test_modelo_no_registrado_falla(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_MODEL", "modelo-inventado")
+    with pytest.raises(ValueError, match="no registrado"):
+        EmbeddingService()
+
+
+def test_version_incluye_revision(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    monkeypatch.setenv("EMBEDDING_MODEL_REVISION", "abc123")
+
+    servicio = EmbeddingService()
+
+    assert servicio.model_version == "all-MiniLM-L6-v2@abc123"
+    assert servicio.dimension == 384
+
+
+def test_local_embedder_usa_servicio(servicio_fake):
+    from src.embeddings.local_embedder import generate_embedding, generate_embeddings, get_model_version
+
+    unico = generate_embedding("Tengo fiebre")
+    lote = generate_embeddings(["Tengo fiebre", "Quiero una cita"])
+
+    assert len(unico) == 384
+    np.testing.assert_allclose(unico, lote[0], rtol=1e-6)
+    assert get_model_version() == "paraphrase-multilingual-MiniLM-L12-v2"
+    assert ModeloFake.instancias == 1
+
+
+def test_recuperacion_medica_usa_servicio(servicio_fake):
+    from src.nodes.recuperacion_medica_node import generar_embedding
+    from src.embeddings.local_embedder import generate_embedding
+
+    assert generar_embedding("Busca paciente Juan") == pytest.approx(generate_embedding("Busca paciente Juan"))
+    assert ModeloFake.instancias == 1
+
+
+def test_store_langgraph_usa_servicio(servicio_fake):
+    from src.memory.store_config import clear_memory_store, get_memory_store
+
+    try:
+        store = get_memory_store(reset=True)
+        store.put(("user_1", "episodios"), "e1", {"content": "cita con cardiología"})
+        resultados = store.search(("user_1", "episodios"), query="cita con cardiología", limit=1)
+    finally:
+        clear_memory_store()
+
+    assert resultados[0].key == "e1"
+    assert resultados[0].score == pytest.approx(1.0, abs=1e-5)
+    assert ModeloFake.instancias == 1
+
+
+def test_guardar_en_pgvector_guarda_version_modelo(servicio_fake):
+    from src.nodes import persistencia_episodica_node
+
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (7,)
+    conn = MagicMock()
+    conn.__enter__.return_value = conn
+    conn.cursor.return_value.__enter__.return_value = cursor
+
+    with patch.object(persistencia_episodica_node, "get_connection", return_value=conn):
+        episodio_id = persistencia_episodica_node.guardar_en_pgvector(
+            "+526641234567", "thread_1", "Resumen de prueba", [0.1] * 384
+        )
+
+    sql, params = cursor.execute.call_args.args
+    assert episodio_id == 7
+    assert "embedding_modelo" in sql
+    assert "paraphrase-multilingual-MiniLM-L12-v2" in params
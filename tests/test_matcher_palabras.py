@@ -0,0 +1,71 @@
+"""
+Tests del matcher precompilado (src/utils/matcher_palabras.py)
+
+✅ Todas las categorías en una pasada, con coincidencias solapadas
+✅ Sin acentos ni mayúsculas en patrones y mensajes
+✅ Misma semántica de subcadena que `kw in mensaje`
+✅ Call sites: fecha/hora del recepcionista, cortesía y acentos de tool.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.nodes.recepcionista_optimizado_node import _extraer_fecha_y_hora
+from src.nodes.respuesta_conversacional_node import es_despedida, es_saludo
+from src.tool import _add_common_accents
+from src.utils.matcher_palabras import MatcherPalabras, normalizar
+
+
+def test_categorias_en_una_pasada():
+    matcher = MatcherPalabras({
+        "saludo": ["hola", "buenos días"],
+        "accion": ["cita", "agendar"],
+        "medico": ["cita médica", "paciente"],
+    })
+
+    assert matcher.categorias("Hola, quiero agendar una cita médica") == {"saludo", "accion", "medico"}
+    # "cita médica" gana en su posición, pero "cita" (prefijo) también cuenta
+    assert matcher.categorias("CITA MEDICA") == {"accion", "medico"}
+    assert matcher.categorias("pacientes de hoy") == {"medico"}
+    assert matcher.categorias("nada que ver") == frozenset()
+
+
+def test_acentos_y_solapamientos():
+    matcher = MatcherPalabras({"pasado": ["pasado mañana"], "manana": ["mañana"], "sabado": ["sábado"]})
+
+    assert normalizar("Mañana Sábado") == "manana sabado"
+    assert matcher.categorias("pasado manana") == {"pasado", "manana"}
+    assert matcher.categorias("el SABADO") == {"sabado"}
+    assert matcher.patrones("mañana o pasado mañana") == ["manana", "pasado manana", "manana"]
+
+
+def test_misma_semantica_que_subcadena():
+    palabras = {"a": ["8", "10", "tarde"], "b": ["18", "hi", "noche"], "c": ["1", "hijo"]}
+    matcher = MatcherPalabras(palabras)
+    rng = random.Random(3)
+    alfabeto = "0189 tardehijonc"
+
+    for _ in range(500):
+        texto = "".join(rng.choice(alfabeto) for _ in range(rng.randint(0, 12)))
+        esperado = {cat for cat, kws in palabras.items() if any(kw in texto for kw in kws)}
+        assert matcher.categorias(texto) == esperado, texto
+
+
+def test_sin_palabras():
+    with pytest.raises(ValueError):
+        MatcherPalabras({"vacia": [""]})
+
+
+def test_call_sites():
+    assert _extraer_fecha_y_hora("Pasado manana")[0].startswith("pasado mañana (")
+    fecha, hora = _extraer_fecha_y_hora("el sabado en la noche")
+    assert fecha.startswith("sábado (") and hora == "en la noche"
+    assert _extraer_fecha_y_hora("a la 1") == (None, "a las 1")
+
+    assert es_saludo("Que tal") and es_despedida("Adios!") and not es_saludo("gracias")
+    assert _add_common_accents("cita con maria GARCIA lopez") == "cita con María García López"
@@ -397,7 +397,7 @@ def test_maya_maneja_error_llm(mock_info, mock_resumen, mock_llm, estado_base_do
 
 # ==================== TESTS DE FUNCIONES AUXILIARES ====================
 
-@patch('src.nodes.maya_detective_doctor_node.psycopg.connect')
+@patch('src.nodes.maya_detective_doctor_node.get_connection')
 def test_obtener_resumen_dia_sin_citas(mock_connect):
     """Maneja correctamente día sin citas."""
     mock_cursor = Mock()
@@ -409,7 +409,7 @@ def test_obtener_resumen_dia_sin_citas(mock_connect):
     assert "No tienes citas" in resumen
 
 
-@patch('src.nodes.maya_detective_doctor_node.psycopg.connect')
+@patch('src.nodes.maya_detective_doctor_node.get_connection')
 def test_obtener_info_doctor(mock_connect):
     """Obtiene info del doctor correctamente."""
     mock_cursor = Mock()
@@ -422,7 +422,7 @@ def test_obtener_info_doctor(mock_connect):
     assert info['especialidad'] == 'Podología'
 
 
-@patch('src.nodes.maya_detective_doctor_node.psycopg.connect')
+@patch('src.nodes.maya_detective_doctor_node.get_connection')
 def test_obtener_info_doctor_sin_especialidad(mock_connect):
     """Obtiene info del doctor sin especialidad definida."""
     mock_cursor = Mock()
@@ -435,7 +435,7 @@ def test_obtener_info_doctor_sin_especialidad(mock_connect):
     assert info['especialidad'] == 'Medicina General'
 
 
-@patch('src.nodes.maya_detective_doctor_node.psycopg.connect')
+@patch('src.nodes.maya_detective_doctor_node.get_connection')
 def test_obtener_info_doctor_no_existe(mock_connect):
     """Maneja correctamente doctor que no existe."""
     mock_cursor = Mock()
@@ -450,7 +450,7 @@ def test_obtener_info_doctor_no_existe(mock_connect):
 
 # ==================== TESTS DE TIEMPO INYECTABLE ====================
 
-@patch('src.nodes.maya_detective_doctor_node.psycopg.connect')
+@patch('src.nodes.maya_detective_doctor_node.get_connection')
 def test_resumen_con_tiempo_inyectado(mock_connect):
     """✅ MEJORA 3: Tiempo inyectable para tests consistentes."""
     import pendulum
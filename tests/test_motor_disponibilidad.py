@@ -0,0 +1,222 @@
+"""
+Tests del motor de disponibilidad en bloque (src/medical/motor_disponibilidad.py)
+
+✅ generar_slots_con_turnos hace 1 consulta para toda la ventana (antes O(slots))
+✅ buscar_slots: solo los días y la franja pedidos, se detiene en el límite
+✅ Mismos slots que la verificación por slot con check_doctor_availability
+✅ Traslapes con los 3 casos de check_conflicto_horario
+✅ Error de BD → sin slots (como antes, cada slot fallaba)
+"""
+
+import sys
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.medical import disponibilidad, motor_disponibilidad, slots
+from src.medical.motor_disponibilidad import AgendaOcupacion, _se_traslapan
+
+TZ = slots.TIMEZONE
+AHORA = TZ.localize(datetime(2026, 2, 2, 9, 45))  # Lunes
+DOCTORES = {1: "Dr. Santiago", 2: "Dra. Joana"}
+
+
+def _cita(doctor_id, dia, hora_ini, hora_fin, cita_id):
+    inicio = TZ.localize(datetime(2026, 2, dia, *hora_ini))
+    fin = TZ.localize(datetime(2026, 2, dia, *hora_fin))
+    return (doctor_id, inicio, fin, cita_id)
+
+
+CITAS = [
+    _cita(1, 2, (10, 30), (11, 30), 101),  # Lunes: Santiago ocupado
+    _cita(2, 2, (10, 30), (11, 30), 102),  # Lunes: ambos ocupados 10:30
+    _cita(1, 5, (12, 0), (12, 45), 103),   # Jueves: traslape parcial
+    _cita(2, 7, (13, 30), (15, 30), 104),  # Sábado: cita de 2 horas
+    _cita(1, 8, (16, 30), (16, 30), 105),  # Domingo: cita degenerada (caso 3)
+]
+
+
+class DatetimeFijo(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return AHORA
+
+
+class CursorFake:
+    """Cursor que responde las consultas de doctores, citas y check_conflicto_horario."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.ventanas = []
+        self._resultado = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        self.consultas += 1
+        if "check_conflicto_horario" in sql:
+            doctor_id, inicio, fin = params
+            choques = [c for c in CITAS if c[0] == doctor_id and _se_traslapan(inicio, fin, c[1], c[2])]
+            self._resultado = [(True, choques[0][3], "Conflicto")] if choques else [(False, None, "Sin conflictos")]
+        elif "LEFT JOIN citas_medicas" in sql:
+            hasta, desde = params
+            self.ventanas.append((desde, hasta))
+            self._resultado = []
+            for doctor_id, nombre in DOCTORES.items():
+                citas = [c for c in CITAS if c[0] == doctor_id and c[1] <= hasta and c[2] >= desde]
+                self._resultado += [(doctor_id, nombre, ini, fin, cid) for _, ini, fin, cid in citas]
+                if not citas:
+                    self._resultado.append((doctor_id, nombre, None, None, None))
+        elif "WHERE id = %s" in sql:
+            self._resultado = [(DOCTORES[params[0]],)] if params[0] in DOCTORES else []
+
+    def fetchone(self):
+        return self._resultado[0] if self._resultado else None
+
+    def fetchall(self):
+        return self._resultado
+
+
+@pytest.fixture
+def bd_fake():
+    cursor = CursorFake()
+    conn = MagicMock()
+    conn.__enter__.return_value = conn
+    conn.cursor.return_value = cursor
+
+    with patch.object(motor_disponibilidad, "get_connection", return_value=conn), \
+         patch.object(disponibilidad, "get_connection", return_value=conn), \
+         patch.object(slots, "datetime", DatetimeFijo):
+        yield cursor
+
+
+def _slots_por_consulta(dias_adelante):
+    """Verificación por slot (el algoritmo anterior) para comparar resultados."""
+    resultado = []
+    for turno, (ini, fin, hora_ini, hora_fin) in enumerate(slots._iterar_slots(AHORA, dias_adelante), start=1):
+        doctor_id = 1 if turno % 2 == 1 else 2
+        disp = disponibilidad.check_doctor_availability(doctor_id, ini, fin, use_cache=False)
+        if not disp["disponible"]:
+            otro = 2 if doctor_id == 1 else 1
+            disp_otro = disponibilidad.check_doctor_availability(otro, ini, fin, use_cache=False)
+            if disp_otro["disponible"]:
+                doctor_id, disp = otro, disp_otro
+        if disp["disponible"]:
+            resultado.append({
+                "fecha": ini.strftime("%Y-%m-%d"),
+                "hora_inicio": hora_ini.strftime("%H:%M"),
+                "hora_fin": hora_fin.strftime("%H:%M"),
+                "slot_id": ini.strftime("%Y-%m-%dT%H:%M"),
+                "disponible": True,
+                "doctor_asignado_id": doctor_id,
+                "turno_numero": turno
+            })
+    return resultado
+
+
+def test_consultas_constantes_y_mismos_slots(bd_fake):
+    nuevos = slots.generar_slots_con_turnos(dias_adelante=14)
+    consultas_motor = bd_fake.consultas
+
+    bd_fake.consultas = 0
+    anteriores = _slots_por_consulta(14)
+
+    assert consultas_motor == 1
+    assert bd_fake.consultas > 100  # 2 por slot verificado
+    assert nuevos == anteriores
+
+
+def test_reasigna_y_omite_slots_ocupados(bd_fake):
+    por_id = {s["slot_id"]: s for s in slots.generar_slots_con_turnos(dias_adelante=6)}
+
+    assert "2026-02-02T09:30" not in por_id                    # Ya pasó
+    assert "2026-02-02T10:30" not in por_id                    # Ambos doctores ocupados
+    assert por_id["2026-02-05T11:30"]["doctor_asignado_id"] == 2  # Santiago ocupado desde 12:00
+    assert "2026-02-07T09:30" not in por_id                    # Sábado abre 10:30
+    assert "2026-02-07T16:30" in por_id and "2026-02-07T17:30" not in por_id
+    assert not any(s["fecha"] in ("2026-02-03", "2026-02-04") for s in por_id.values())
+
+
+def test_slots_doctor_una_carga(bd_fake):
+    resultado = slots.generar_slots_doctor(2, dias_adelante=6)
+
+    assert bd_fake.consultas == 1
+    horas_sabado = [s["hora_inicio"] for s in resultado if s["fecha"] == "2026-02-07"]
+    assert horas_sabado == ["10:30", "11:30", "12:30", "15:30", "16:30"]
+    assert all(s["doctor_id"] == 2 for s in resultado)
+
+
+def test_casos_de_traslape():
+    agenda = AgendaOcupacion(DOCTORES, [c for c in CITAS if c[0] == 1])
+
+    def conflicto(dia, hora_ini, hora_fin):
+        _, ini, fin, _ = _cita(1, dia, hora_ini, hora_fin, 0)
+        encontrado = agenda.conflicto(1, ini, fin)
+        return encontrado[2] if encontrado else None
+
+    assert conflicto(2, (11, 0), (12, 0)) == 101     # Empieza durante la cita
+    assert conflicto(2, (10, 0), (11, 0)) == 101     # Termina durante la cita
+    assert conflicto(2, (10, 0), (12, 0)) == 101     # La envuelve
+    assert conflicto(2, (11, 30), (12, 30)) is None  # Empieza justo al terminar
+    assert conflicto(2, (9, 30), (10, 30)) is None   # Termina justo al empezar
+    assert conflicto(8, (16, 30), (17, 30)) == 105   # Cita de duración cero en el borde
+
+
+def test_doctor_inexistente_y_dia_cerrado():
+    agenda = AgendaOcupacion(DOCTORES, [])
+    lunes = TZ.localize(datetime(2026, 2, 2, 12, 30))
+    martes = lunes + timedelta(days=1)
+
+    assert agenda.verificar(3, lunes, lunes + timedelta(hours=1))["razon"] == "doctor_no_existe"
+    assert agenda.verificar(1, martes, martes + timedelta(hours=1))["razon"] == "dia_cerrado"
+    assert agenda.verificar(1, lunes, lunes + timedelta(hours=1))["disponible"] is True
+
+
+def test_error_bd_sin_slots():
+    with patch.object(motor_disponibilidad, "get_connection", side_effect=Exception("sin conexión")):
+        assert slots.generar_slots_con_turnos(dias_adelante=3) == []
+
+
+def test_buscar_slots_solo_dia_y_franja_pedidos(bd_fake):
+    jueves = date(2026, 2, 5)
+    resultado = slots.buscar_slots(jueves, hora_desde=time(12, 0), hora_hasta=time(18, 0), limite=3)
+
+    assert bd_fake.consultas == 1
+    desde, hasta = bd_fake.ventanas[0]
+    assert desde.date() == jueves and hasta - desde == timedelta(days=1)
+    assert [s["slot_id"] for s in resultado] == ["2026-02-05T12:30", "2026-02-05T13:30", "2026-02-05T14:30"]
+    assert resultado[0]["doctor_asignado_id"] == 2  # Santiago ocupado 12:00-12:45
+
+
+def test_buscar_slots_se_detiene_en_limite(bd_fake):
+    with patch.object(slots, "_asignar_doctor_turno", wraps=slots._asignar_doctor_turno) as asignar:
+        resultado = slots.buscar_slots(date(2026, 2, 2), date(2026, 2, 16), limite=2)
+
+    assert [s["slot_id"] for s in resultado] == ["2026-02-02T11:30", "2026-02-02T12:30"]
+    assert asignar.call_count == 3  # 10:30 ocupado, 11:30 y 12:30: no recorre las 2 semanas
+
+
+def test_buscar_slots_rango_pasado_o_cerrado(bd_fake):
+    assert slots.buscar_slots(date(2026, 2, 1)) == []  # Ayer
+    assert slots.buscar_slots(date(2026, 2, 3)) == []  # Martes: clínica cerrada
+    assert bd_fake.consultas == 1                      # Solo el martes llega a consultar
+
+
+def test_recepcionista_busca_fecha_y_franja_pedidas():
+    from src.nodes import recepcionista_optimizado_node as recepcionista
+
+    with patch.object(recepcionista, "buscar_slots", return_value=[]) as buscar:
+        recepcionista._buscar_slots_por_preferencias("viernes (2026-02-06)", "por la tarde")
+        recepcionista._buscar_slots_por_preferencias("viernes (2026-02-06)", "a las 4")
+
+    assert buscar.call_args_list[0].args == (date(2026, 2, 6), date(2026, 2, 6))
+    assert buscar.call_args_list[0].kwargs == {"hora_desde": time(12, 0), "hora_hasta": time(18, 0), "limite": 3, "titular": None}
+    assert buscar.call_args_list[1].kwargs["hora_desde"] == time(16, 0)
@@ -69,16 +69,16 @@ def mock_pendulum_now():
 
 # ==================== TESTS ====================
 
-@patch.object(recordatorios_node, 'psycopg')
+@patch.object(recordatorios_node, 'get_connection')
 @patch.object(recordatorios_node, 'enviar_whatsapp')
 @patch.object(recordatorios_node, 'get_current_time')
-def test_retorna_command(mock_time, mock_whatsapp, mock_psycopg, mock_connection, mock_cursor, mock_pendulum_now):
+def test_retorna_command(mock_time, mock_whatsapp, mock_get_connection, mock_connection, mock_cursor, mock_pendulum_now):
     """Nodo retorna Command."""
     # Setup mocks
     mock_time.return_value = mock_pendulum_now
     mock_whatsapp.return_value = True
     mock_cursor.fetchall.return_value = []
-    mock_psycopg.connect.return_value = mock_connection
+    mock_get_connection.return_value = mock_connection
     
     estado = {
         'tipo_ejecucion': 'scheduler'
@@ -93,10 +93,10 @@ def test_retorna_command(mock_time, mock_whatsapp, mock_psycopg, mock_connection
     assert 'recordatorios_2h' in resultado.update
 
 
-@patch.object(recordatorios_node, 'psycopg')
+@patch.object(recordatorios_node, 'get_connection')
 @patch.object(recordatorios_node, 'enviar_whatsapp')
 @patch.object(recordatorios_node, 'get_current_time')
-def test_envia_recordatorio_24h(mock_time, mock_whatsapp, mock_psycopg, mock_connection, mock_cursor, mock_pendulum_now):
+def test_envia_recordatorio_24h(mock_time, mock_whatsapp, mock_get_connection, mock_connection, mock_cursor, mock_pendulum_now):
     """Envía recordatorio 24h antes."""
     # Setup mocks
     mock_time.return_value = mock_pendulum_now
@@ -121,7 +121,7 @@ def test_envia_recordatorio_24h(mock_time, mock_whatsapp, mock_psycopg, mock_con
         [cita_mock],  # Citas 24h
         []  # Citas 2h
     ]
-    mock_psycopg.connect.return_value = mock_connection
+    mock_get_connection.return_value = mock_connection
     
     resultado = nodo_recordatorios({'tipo_ejecucion': 'scheduler'})
     
@@ -129,14 +129,14 @@ def test_envia_recordatorio_24h(mock_time, mock_whatsapp, mock_psycopg, mock_con
     assert mock_whatsapp.called
 
 
-@patch.object(recordatorios_node, 'psycopg')
+@patch.object(recordatorios_node, 'get_connection')
 @patch.object(recordatorios_node, 'get_current_time')
-def test_sin_citas_proximas(mock_time, mock_psycopg, mock_connection, mock_cursor, mock_pendulum_now):
+def test_sin_citas_proximas(mock_time, mock_get_connection, mock_connection, mock_cursor, mock_pendulum_now):
     """Retorna correctamente cuando no hay citas próximas."""
     # Setup mocks
     mock_time.return_value = mock_pendulum_now
     mock_cursor.fetchall.return_value = []
-    mock_psycopg.connect.return_value = mock_connection
+    mock_get_connection.return_value = mock_connection
     
     resultado = nodo_recordatorios({'tipo_ejecucion': 'scheduler'})
     
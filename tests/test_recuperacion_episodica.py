@@ -132,7 +132,7 @@ def test_mensaje_vacio():
 
 # ==================== TESTS BÚSQUEDA SEMÁNTICA ====================
 
-@patch('src.nodes.recuperacion_episodica_node.psycopg.connect')
+@patch('src.nodes.recuperacion_episodica_node.get_connection')
 def test_buscar_episodios_con_resultados(mock_connect, episodios_mock):
     """Búsqueda semántica retorna episodios correctamente."""
     mock_cursor = Mock()
@@ -146,7 +146,7 @@ def test_buscar_episodios_con_resultados(mock_connect, episodios_mock):
     assert episodios[0]['similarity'] == 0.85
 
 
-@patch('src.nodes.recuperacion_episodica_node.psycopg.connect')
+@patch('src.nodes.recuperacion_episodica_node.get_connection')
 def test_buscar_episodios_sin_resultados(mock_connect):
     """Sin episodios sobre threshold → lista vacía."""
     mock_cursor = Mock()
@@ -159,7 +159,7 @@ def test_buscar_episodios_sin_resultados(mock_connect):
     assert episodios == []
 
 
-@patch('src.nodes.recuperacion_episodica_node.psycopg.connect')
+@patch('src.nodes.recuperacion_episodica_node.get_connection')
 def test_query_usa_threshold_en_sql(mock_connect):
     """Query SQL incluye filtro threshold."""
     mock_cursor = Mock()
@@ -95,7 +95,7 @@ def test_detecta_estado_activo():
 
 # ==================== TESTS BÚSQUEDA SEMÁNTICA ====================
 
-@patch('src.nodes.recuperacion_medica_node.psycopg.connect')
+@patch('src.nodes.recuperacion_medica_node.get_connection')
 def test_busqueda_semantica_con_embedding(mock_connect):
     """Búsqueda semántica funciona con embedding."""
     from datetime import datetime
@@ -123,10 +123,10 @@ def test_busqueda_semantica_sin_embedding():
     assert historiales == []
 
 
-@patch('src.nodes.recuperacion_medica_node.get_embedding_model')
-def test_generar_embedding_funciona(mock_model):
+@patch('src.nodes.recuperacion_medica_node.generate_embedding')
+def test_generar_embedding_funciona(mock_generate):
     """Genera embedding de 384 dimensiones."""
-    mock_model.return_value.encode.return_value = Mock(tolist=lambda: [0.1] * 384)
+    mock_generate.return_value = [0.1] * 384
     
     embedding = generar_embedding("Busca paciente Juan")
     
@@ -134,10 +134,10 @@ def test_generar_embedding_funciona(mock_model):
     assert len(embedding) == 384
 
 
-@patch('src.nodes.recuperacion_medica_node.get_embedding_model')
-def test_generar_embedding_maneja_error(mock_model):
+@patch('src.nodes.recuperacion_medica_node.generate_embedding')
+def test_generar_embedding_maneja_error(mock_generate):
     """Maneja error al generar embedding."""
-    mock_model.side_effect = Exception("Model error")
+    mock_generate.side_effect = RuntimeError("Model error")
     
     embedding = generar_embedding("Test")
     
@@ -146,7 +146,7 @@ def test_generar_embedding_maneja_error(mock_model):
 
 # ==================== TESTS FUNCIONES AUXILIARES ====================
 
-@patch('src.nodes.recuperacion_medica_node.psycopg.connect')
+@patch('src.nodes.recuperacion_medica_node.get_connection')
 def test_obtener_pacientes_recientes(mock_connect):
     """Obtiene últimos pacientes correctamente."""
     from datetime import datetime
@@ -166,7 +166,7 @@ def test_obtener_pacientes_recientes(mock_connect):
     assert pacientes[0]['total_citas'] == 5
 
 
-@patch('src.nodes.recuperacion_medica_node.psycopg.connect')
+@patch('src.nodes.recuperacion_medica_node.get_connection')
 def test_obtener_citas_del_dia(mock_connect):
     """Obtiene citas del día correctamente."""
     from datetime import datetime
@@ -185,7 +185,7 @@ def test_obtener_citas_del_dia(mock_connect):
     assert citas[0]['paciente_nombre'] == 'María García'
 
 
-@patch('src.nodes.recuperacion_medica_node.psycopg.connect')
+@patch('src.nodes.recuperacion_medica_node.get_connection')
 def test_obtener_estadisticas_doctor(mock_connect):
     """Obtiene estadísticas correctamente."""
     mock_cursor = Mock()
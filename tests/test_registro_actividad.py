@@ -0,0 +1,137 @@
+"""
+Tests del registro de actividad con escritura diferida
+(src/utils/registro_actividad.py)
+
+✅ Muchos mensajes → un UPDATE ... FROM (VALUES ...) por tabla
+✅ Si el flush falla, lo pendiente se reintenta en el siguiente
+✅ La ventana de 24h usa la actividad en memoria (session_manager)
+✅ Flush final al detener
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import registro_actividad, registro_sesiones, session_manager
+from src.utils.registro_actividad import RegistroActividad
+
+
+class BDFake:
+    """get_connection() fake que guarda cada (sql, params) ejecutado."""
+
+    def __init__(self):
+        self.ejecutadas = []
+        self.falla = False
+
+    def get_connection(self):
+        bd = self
+        cursor = MagicMock()
+
+        def execute(sql, params=None):
+            if bd.falla:
+                raise RuntimeError("conexión perdida")
+            bd.ejecutadas.append((sql, params))
+
+        cursor.execute.side_effect = execute
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value.__enter__.return_value = cursor
+        return conn
+
+
+@pytest.fixture
+def bd():
+    bd = BDFake()
+    # Singleton propio: otros tests pueden haber dejado actividad pendiente
+    with patch.object(registro_actividad, "get_connection", side_effect=bd.get_connection), \
+         patch.object(registro_actividad, "_registro_instance", None):
+        yield bd
+        registro_actividad.detener_registro_actividad()
+
+
+def _registro():
+    registro = RegistroActividad(flush_seg=60)
+    registro._asegurar_hilo = lambda: None  # Flush manual en los tests
+    return registro
+
+
+def test_rafaga_colapsa_en_un_update_por_tabla(bd):
+    registro = _registro()
+    base = datetime(2026, 2, 5, 10, 0)
+    for i in range(100):
+        registro.tocar_usuario(f"+52664000000{i % 3}", cuando=base + timedelta(seconds=i))
+        registro.tocar_sesion(f"+52664000000{i % 3}", f"thread_{i % 3}", mensajes=1, cuando=base + timedelta(seconds=i))
+
+    assert bd.ejecutadas == []  # Nada en el camino crítico
+    assert registro.flush() == 6
+
+    (sql_usuarios, params_usuarios), (sql_sesiones, params_sesiones) = bd.ejecutadas
+    assert "UPDATE usuarios" in sql_usuarios and "FROM (VALUES" in sql_usuarios
+    assert "GREATEST" in sql_sesiones
+    assert len(params_usuarios) == 3 * 2 and len(params_sesiones) == 3 * 4
+    assert params_usuarios[:2] == ["+526640000000", base + timedelta(seconds=99)]
+    assert params_sesiones[:4] == ["+526640000000", "thread_0", base + timedelta(seconds=99), 34]
+
+    assert registro.flush() == 0  # Ya no queda nada
+    assert len(bd.ejecutadas) == 2
+
+
+def test_flush_fallido_se_reintenta(bd):
+    registro = _registro()
+    registro.tocar_sesion("u1", "t1", mensajes=2)
+
+    bd.falla = True
+    assert registro.flush() == 0
+    assert registro.ultima_actividad_sesion("u1")[0] == "t1"  # Sigue visible
+
+    registro.tocar_sesion("u1", "t1", mensajes=1)
+    bd.falla = False
+    registro.flush()
+
+    _, params = bd.ejecutadas[0]
+    assert params[3] == 3  # Los mensajes del lote fallido no se pierden
+    assert registro.obtener_metricas()["errores"] == 1
+
+
+def test_actividad_en_vuelo_visible(bd):
+    registro = _registro()
+    registro.tocar_sesion("u1", "t1")
+    vista_durante_flush = []
+    bd.get_connection = lambda: (vista_durante_flush.append(registro.ultima_actividad_sesion("u1")), MagicMock())[1]
+
+    with patch.object(registro_actividad, "get_connection", side_effect=bd.get_connection):
+        registro.flush()
+
+    assert vista_durante_flush[0][0] == "t1"
+    assert registro.ultima_actividad_sesion("u1") is None
+
+
+def test_detener_hace_flush_final(bd):
+    registro = registro_actividad.get_registro_actividad()
+    registro.tocar_usuario("+526641112233")
+
+    registro_actividad.detener_registro_actividad()
+
+    assert len(bd.ejecutadas) == 1
+    assert registro_actividad.obtener_metricas_actividad() is None
+
+
+def test_ventana_24h_usa_valor_en_memoria(bd):
+    registro_sesiones.reset_registro_sesiones()  # Forzar la consulta a user_sessions
+    user_id = session_manager.generate_user_id("+526641112233")
+    registro_actividad.get_registro_actividad().tocar_sesion(user_id, "thread_activo")
+
+    cursor = MagicMock()
+    cursor.fetchone.return_value = ("thread_activo", datetime.now() - timedelta(hours=24, minutes=1))
+    conexion = MagicMock()
+    conexion.cursor.return_value = cursor
+
+    _, thread_id, _ = session_manager.get_or_create_session("+526641112233", conexion)
+
+    assert thread_id == "thread_activo"  # La BD aún no tiene el último mensaje
+    assert not any("UPDATE" in c.args[0] for c in cursor.execute.call_args_list)
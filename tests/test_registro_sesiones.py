@@ -0,0 +1,121 @@
+"""
+Tests del registro de sesiones activas (src/utils/registro_sesiones.py)
+
+✅ Mensajes en ráfaga: una sola consulta a user_sessions, el resto en memoria
+✅ Camino async: un hit no pide conexión al pool
+✅ Sesión vencida en memoria o sin revalidar → la BD decide (varios workers)
+✅ Un commit fallido no deja el thread en el registro
+✅ LRU
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from psycopg_pool import ConnectionPool
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import registro_sesiones, session_manager
+from src.utils.registro_sesiones import RegistroSesiones
+
+PHONE = "+526641112233"
+
+
+@pytest.fixture
+def actividad():
+    registro_sesiones.reset_registro_sesiones()
+    actividad = MagicMock()
+    actividad.ultima_actividad_sesion.return_value = None
+    with patch.object(session_manager, "get_registro_actividad", return_value=actividad):
+        yield actividad
+    registro_sesiones.reset_registro_sesiones()
+
+
+def _pool_fake(fila=None):
+    """Pool fake: fetchone() entrega `fila` (thread_id, last_activity) o None."""
+    cursor = MagicMock()
+    cursor.fetchone.return_value = fila
+    conn = MagicMock()
+    conn.__enter__.return_value = conn
+    conn.cursor.return_value = cursor
+    pool = MagicMock(spec=ConnectionPool)
+    pool.connection.return_value = conn
+    return pool, cursor
+
+
+def test_rafaga_una_consulta(actividad):
+    pool, cursor = _pool_fake()
+
+    threads = {session_manager.get_or_create_session(PHONE, pool)[1] for _ in range(50)}
+
+    assert len(threads) == 1
+    pool.connection.assert_called_once()  # SELECT + INSERT del primer mensaje
+    assert actividad.tocar_sesion.call_count == 49  # Los hits van al registro de actividad
+    assert registro_sesiones.obtener_metricas_sesiones()["hits"] == 49
+
+
+def test_async_hit_no_pide_conexion(actividad):
+    cursor = AsyncMock()
+    cursor.fetchone.return_value = ("thread_existente", datetime.now() - timedelta(hours=1))
+    conn = MagicMock()
+    conn.cursor.return_value.__aenter__.return_value = cursor
+    pool = MagicMock()
+    pool.connection.return_value.__aenter__.return_value = conn
+
+    async def run():
+        return [await session_manager.aget_or_create_session(PHONE, pool) for _ in range(5)]
+
+    resultados = asyncio.run(run())
+
+    assert {thread_id for _, thread_id, _ in resultados} == {"thread_existente"}
+    pool.connection.assert_called_once()
+
+
+def test_revalidacion_adopta_thread_de_otro_worker(actividad):
+    user_id = session_manager.generate_user_id(PHONE)
+    registro_sesiones._registro_instance = RegistroSesiones(revalidar_seg=0)
+    registro_sesiones.get_registro_sesiones().guardar(user_id, "thread_viejo")
+
+    # Otro worker creó un thread nuevo; la entrada local ya no está validada
+    pool, _ = _pool_fake(("thread_otro_worker", datetime.now() - timedelta(minutes=1)))
+    _, thread_id, _ = session_manager.get_or_create_session(PHONE, pool)
+
+    assert thread_id == "thread_otro_worker"
+    assert registro_sesiones.obtener_metricas_sesiones()["vencidas"] == 1
+
+
+def test_vencida_en_memoria_consulta_bd():
+    registro = RegistroSesiones()
+    ahora = datetime(2026, 2, 5, 10, 0)
+    registro.guardar("u1", "t1", ultima_actividad=ahora)
+
+    assert registro.resolver("u1", ahora + timedelta(hours=23)) == "t1"
+    # La actividad de un hit extiende la ventana
+    assert registro.resolver("u1", ahora + timedelta(hours=46)) == "t1"
+    assert registro.resolver("u1", ahora + timedelta(hours=71)) is None
+    assert registro.obtener_metricas()["entradas"] == 0
+
+
+def test_commit_fallido_no_se_registra(actividad):
+    pool, _ = _pool_fake()
+    pool.connection.return_value.commit.side_effect = RuntimeError("conexión perdida")
+
+    session_manager.get_or_create_session(PHONE, pool)
+    session_manager.get_or_create_session(PHONE, pool)
+
+    assert pool.connection.call_count == 2
+    assert registro_sesiones.obtener_metricas_sesiones()["entradas"] == 0
+
+
+def test_lru():
+    registro = RegistroSesiones(max_entradas=2)
+    for i in range(3):
+        registro.guardar(f"u{i}", f"t{i}")
+
+    assert registro.resolver("u0") is None
+    assert registro.resolver("u2") == "t2"
+    assert registro.obtener_metricas()["entradas"] == 2
@@ -0,0 +1,254 @@
+"""
+Tests de concurrencia al confirmar citas (src/medical/reservas_slot.py y
+crud.agendar_cita_simple)
+
+✅ Cientos de pacientes reservando el mismo slot → solo uno lo aparta
+✅ Reservas expiran (TTL) y se liberan al confirmar o rechazar
+✅ Slots apartados por otro paciente no se ofrecen
+✅ Cientos de confirmaciones simultáneas al mismo slot → una sola cita
+"""
+
+import os
+import sys
+import threading
+import time as _time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.medical import crud, reservas_slot, slots
+from src.medical.motor_disponibilidad import AgendaOcupacion
+from src.medical.reservas_slot import ReservasSlot
+
+TZ = reservas_slot.TIMEZONE
+HILOS = 300
+SLOT = {
+    "fecha": "2026-02-05",
+    "hora_inicio": "12:30",
+    "hora_fin": "13:30",
+    "slot_id": "2026-02-05T12:30",
+    "doctor_asignado_id": 1,
+}
+INICIO, FIN = reservas_slot.slot_a_intervalo(SLOT)
+
+
+@pytest.fixture(autouse=True)
+def reservas_limpias():
+    reservas_slot.reset_reservas_slot()
+    yield
+    reservas_slot.reset_reservas_slot()
+
+
+def _en_paralelo(funcion, argumentos):
+    barrera = threading.Barrier(len(argumentos))
+
+    def tarea(arg):
+        barrera.wait()
+        return funcion(arg)
+
+    with ThreadPoolExecutor(max_workers=len(argumentos)) as pool:
+        return list(pool.map(tarea, argumentos))
+
+
+# ==================== RESERVAS ====================
+
+def test_reservas_simultaneas_un_solo_ganador():
+    resultados = _en_paralelo(lambda i: reservas_slot.reservar_slot(SLOT, f"+52664{i:07d}"), range(HILOS))
+
+    assert resultados.count(True) == 1
+    metricas = reservas_slot.obtener_metricas_reservas()
+    assert metricas["reservas_vigentes"] == 1
+    assert metricas["reservas_rechazadas"] == HILOS - 1
+
+
+def test_traslape_parcial_y_otro_doctor():
+    reservas = ReservasSlot(ttl_seg=60)
+    assert reservas.reservar(1, INICIO, FIN, "A")
+
+    assert not reservas.reservar(1, INICIO + timedelta(minutes=30), FIN + timedelta(minutes=30), "B")
+    assert reservas.reservar(1, FIN, FIN + timedelta(hours=1), "B")  # Empieza justo al terminar
+    assert reservas.reservar(2, INICIO, FIN, "C")                    # Otro doctor
+    assert reservas.reservar(1, INICIO, FIN, "A")                    # Renovar la propia
+
+
+def test_ttl_y_liberar():
+    reservas = ReservasSlot(ttl_seg=300)
+    with patch.object(reservas_slot._time, "monotonic", return_value=1000.0):
+        assert reservas.reservar(1, INICIO, FIN, "A")
+    with patch.object(reservas_slot._time, "monotonic", return_value=1299.0):
+        assert reservas.retenido_por_otro(1, INICIO, FIN, "B")
+    with patch.object(reservas_slot._time, "monotonic", return_value=1300.0):
+        assert not reservas.retenido_por_otro(1, INICIO, FIN, "B")
+        assert reservas.obtener_metricas()["reservas_vigentes"] == 0
+
+    assert reservas.reservar(1, INICIO, FIN, "A")
+    reservas.liberar("A")
+    assert reservas.reservar(1, INICIO, FIN, "B")
+
+
+def test_un_titular_una_reserva():
+    reservas = ReservasSlot(ttl_seg=60)
+    assert reservas.reservar(1, INICIO, FIN, "A")
+    assert reservas.reservar(2, INICIO + timedelta(days=1), FIN + timedelta(days=1), "A")
+
+    assert not reservas.retenido_por_otro(1, INICIO, FIN, "B")  # Cambió de horario
+
+
+def test_slots_apartados_no_se_ofrecen():
+    agenda = AgendaOcupacion({1: "Dr. Santiago", 2: "Dra. Joana"}, [])
+    reservas_slot.reservar_slot(SLOT, "A")
+
+    assert slots._asignar_doctor_turno(agenda, 0, INICIO, FIN, titular="A") == 1
+    assert slots._asignar_doctor_turno(agenda, 0, INICIO, FIN, titular="B") == 2  # Reasignado
+
+    reservas_slot.reservar_slot({**SLOT, "doctor_asignado_id": 2}, "C")
+    assert slots._asignar_doctor_turno(agenda, 0, INICIO, FIN, titular="B") is None
+
+
+def test_confirmar_slot():
+    reservas_slot.reservar_slot(SLOT, "A")
+
+    with patch.object(crud, "agendar_cita_simple", return_value=200) as agendar:
+        assert reservas_slot.confirmar_slot(SLOT, "B", paciente_id=8) is None
+        assert reservas_slot.confirmar_slot(SLOT, "A", paciente_id=7) == 200
+
+    assert agendar.call_count == 1
+    kwargs = agendar.call_args.kwargs
+    assert kwargs["fecha_inicio"] == datetime(2026, 2, 5, 12, 30)  # Hora local sin tzinfo
+    assert kwargs["doctor_id"] == 1 and kwargs["paciente_id"] == 7
+    assert not reservas_slot.get_reservas_slot().retenido_por_otro(1, INICIO, FIN, "B")
+
+
+# ==================== AGENDAR BAJO ADVISORY LOCK ====================
+
+class BDCitasFake:
+    """
+    Sesiones SQLAlchemy fake sobre una lista compartida de citas.
+
+    pg_advisory_xact_lock toma un lock real por (doctor, día) que se suelta
+    en commit/rollback, como en PostgreSQL.
+    """
+
+    def __init__(self):
+        self.citas = []  # (doctor_id, inicio, fin, id)
+        self.locks = {}
+        self._mutex = threading.Lock()
+
+    def sesion(self):
+        bd = self
+
+        class Sesion:
+            def __init__(self):
+                self.lock = None
+                self.pendiente = None
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                self.rollback()
+                return False
+
+            def execute(self, sql, params):
+                sql = str(sql)
+                resultado = MagicMock()
+                if "pg_advisory_xact_lock" in sql:
+                    with bd._mutex:
+                        self.lock = bd.locks.setdefault((params["doctor_id"], params["dia"]), threading.Lock())
+                    self.lock.acquire()
+                elif "check_conflicto_horario" in sql:
+                    choque = next(
+                        (c for c in list(bd.citas)
+                         if c[0] == params["doctor_id"] and c[1] < params["fin"] and c[2] > params["inicio"]),
+                        None
+                    )
+                    _time.sleep(0.001)  # Ventana entre verificar e insertar
+                    resultado.first.return_value = (True, choque[3]) if choque else (False, None)
+                return resultado
+
+            def add(self, cita):
+                self.pendiente = cita
+
+            def commit(self):
+                if self.pendiente is not None:
+                    with bd._mutex:
+                        self.pendiente.id = 1000 + len(bd.citas)
+                        bd.citas.append((self.pendiente.doctor_id, self.pendiente.fecha_hora_inicio,
+                                         self.pendiente.fecha_hora_fin, self.pendiente.id))
+                    self.pendiente = None
+                self._soltar()
+
+            def rollback(self):
+                self.pendiente = None
+                self._soltar()
+
+            def _soltar(self):
+                if self.lock is not None:
+                    self.lock.release()
+                    self.lock = None
+
+            def refresh(self, cita):
+                pass
+
+            def query(self, *args):
+                consulta = MagicMock()
+                consulta.filter.return_value.first.return_value = None
+                return consulta
+
+        return Sesion()
+
+
+def test_confirmaciones_simultaneas_una_sola_cita():
+    bd = BDCitasFake()
+    inicio, fin = INICIO.replace(tzinfo=None), FIN.replace(tzinfo=None)
+
+    with patch.object(crud, "get_db_session", side_effect=bd.sesion):
+        resultados = _en_paralelo(
+            lambda paciente_id: crud.agendar_cita_simple(1, paciente_id, inicio, fin),
+            range(HILOS)
+        )
+
+    assert len(bd.citas) == 1
+    assert [r for r in resultados if r is not None] == [bd.citas[0][3]]
+
+
+def test_sin_lock_se_duplicaria():
+    """Control: sin el advisory lock la misma carrera agenda varias citas."""
+    bd = BDCitasFake()
+    bd.locks = MagicMock()  # Lock que no bloquea
+    inicio, fin = INICIO.replace(tzinfo=None), FIN.replace(tzinfo=None)
+
+    with patch.object(crud, "get_db_session", side_effect=bd.sesion):
+        _en_paralelo(lambda paciente_id: crud.agendar_cita_simple(1, paciente_id, inicio, fin), range(50))
+
+    assert len(bd.citas) > 1
+
+
+@pytest.mark.skipif(not os.getenv("POSTGRES_STRESS"), reason="POSTGRES_STRESS=1 para correr contra PostgreSQL")
+def test_confirmaciones_simultaneas_postgres():
+    from sqlalchemy import text
+
+    motivo = "stress-test-reservas"
+    inicio = datetime(2099, 1, 5, 12, 30)  # Lunes lejano, sin citas reales
+    fin = inicio + timedelta(hours=1)
+
+    with crud.get_db_session() as db:
+        paciente_id = db.execute(text("SELECT id FROM pacientes ORDER BY id LIMIT 1")).scalar()
+    if paciente_id is None:
+        pytest.skip("Sin pacientes en la BD")
+
+    try:
+        resultados = _en_paralelo(
+            lambda _: crud.agendar_cita_simple(1, paciente_id, inicio, fin, motivo=motivo),
+            range(HILOS)
+        )
+        assert sum(r is not None for r in resultados) == 1
+    finally:
+        with crud.get_db_session() as db:
+            db.execute(text("DELETE FROM citas_medicas WHERE motivo_consulta = :m"), {"m": motivo})
+            db.commit()
@@ -32,7 +32,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
 @patch('src.tool.list_events_tool')
-@patch('src.nodes.sincronizador_hibrido_node.psycopg.connect')
+@patch('src.nodes.sincronizador_hibrido_node.get_connection')
 def test_retorna_command(mock_conn, mock_calendar):
     """Nodo retorna Command."""
     from src.nodes.sincronizador_hibrido_node import nodo_sincronizador_hibrido
@@ -123,7 +123,7 @@ def test_detectar_cambios_encuentra_eliminadas():
 
 
 @patch('src.tool.list_events_tool')
-@patch('src.nodes.sincronizador_hibrido_node.psycopg.connect')
+@patch('src.nodes.sincronizador_hibrido_node.get_connection')
 def test_maneja_errores_con_command(mock_conn, mock_calendar):
     """Maneja errores y retorna Command con error."""
     from src.nodes.sincronizador_hibrido_node import nodo_sincronizador_hibrido